@@ -0,0 +1,8 @@
+"""
+Benchmarks for the shared support code in zoo.lib.
+
+Run them from the top-level directory of the repository, e.g.
+
+    python -m benchmarks.obpg_cntlpt
+
+"""
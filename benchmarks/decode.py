@@ -0,0 +1,93 @@
+"""
+Compare the usual decoding of a packed field with zoo.lib.decode.
+
+The examples turn a packed field into physical values with a run of
+whole-array operations (astype, the valid range and fill value tests, NaN
+assignment, scaling, masking), each allocating a temporary as large as the
+field.  zoo.lib.decode does the same a block of rows at a time.  Both are run
+on a synthetic 16-bit field, timing each and measuring the peak memory
+allocated, and their results are checked to agree.
+
+Usage:
+
+    python -m benchmarks.decode [nrows]
+
+"""
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from zoo.lib import decode
+
+NCOLS = 1354
+
+ATTRS = {
+    'scale_factor': 0.01,
+    'add_offset': 0.0,
+    '_FillValue': -9999,
+    'valid_range': [0, 10000],
+}
+
+
+def legacy(raw, attrs):
+    """
+    The decoding steps as found in e.g. MOD06_L2_Cloud_Optical_Thickness.py.
+    """
+    data = raw.astype(np.double)
+    valid_range = attrs['valid_range']
+    invalid = np.logical_or(data > valid_range[1], data < valid_range[0])
+    invalid = np.logical_or(invalid, data == attrs['_FillValue'])
+    data[invalid] = np.nan
+    data = (data - attrs['add_offset']) * attrs['scale_factor']
+    data = np.ma.masked_array(data, np.isnan(data))
+    return data
+
+
+def measure(func, repeat=3):
+    """
+    Mean time and peak memory allocated by a call.
+    """
+    elapsed = timeit.timeit(func, number=repeat) / repeat
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(nrows=20300):
+    raw = np.random.RandomState(0).randint(-500, 12000, (nrows, NCOLS))
+    raw = raw.astype(np.int16)
+    raw[::17] = -9999
+    print('field: {0} x {1} int16'.format(nrows, NCOLS))
+
+    expected = legacy(raw, ATTRS)
+    out = np.empty(raw.shape)
+    runs = [
+        ('legacy', lambda: legacy(raw, ATTRS)),
+        ('decode', lambda: decode.decode(raw, ATTRS, 'modis')),
+        ('decode float32',
+         lambda: decode.decode(raw, ATTRS, 'modis', dtype=np.float32)),
+        ('decode into out', lambda: decode.decode(raw, ATTRS, 'modis',
+                                                  out=out)),
+    ]
+    t_legacy = None
+    for label, func in runs:
+        elapsed, peak = measure(func)
+        if t_legacy is None:
+            t_legacy = elapsed
+        print('{0:16s} {1:8.3f} s {2:9.1f} MB   speedup {3:5.1f}x'.format(
+            label, elapsed, peak / 1e6, t_legacy / elapsed))
+        got = func()
+        np.testing.assert_array_equal(got.mask, expected.mask)
+        np.testing.assert_allclose(got.filled(0), expected.filled(0),
+                                   rtol=1e-6)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,123 @@
+"""
+Compare fixed-stride subsampling of a tile with zoo.lib.lod.
+
+The examples read a whole MODIS tile, decode it and then keep every second
+cell with 'data[::2, ::2]', whatever the figure can show.  zoo.lib.lod works
+out the factor from the figure size instead and either averages blocks of
+decoded cells a band at a time or hands the stride down to zoo.lib.reader.
+A synthetic HDF4 file with one 4800 x 4800 16-bit field, the size of a
+MYD09GQ tile, is read each way, timing each and measuring the peak memory
+allocated.
+
+Usage:
+
+    python -m benchmarks.lod [nrows]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+from pyhdf.SD import SD, SDC
+
+from zoo.lib import decode, lod, reader
+
+ATTRS = {
+    'scale_factor': 10000.0,
+    'add_offset': 0.0,
+    '_FillValue': -28672,
+    'valid_range': [-100, 16000],
+}
+
+
+def write_synthetic(hdffile, nrows):
+    """
+    Write an HDF4 file with one (nrows, nrows) int16 field.
+    """
+    hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+    sds = hdf.create('field', SDC.INT16, (nrows, nrows))
+    for name, value in ATTRS.items():
+        setattr(sds, name, value)
+    for start in range(0, nrows, 1000):
+        stop = min(start + 1000, nrows)
+        rows = np.arange(start, stop, dtype=np.int32)[:, np.newaxis]
+        block = ((rows * 7 + np.arange(nrows)) % 16000).astype(np.int16)
+        block[:, ::97] = ATTRS['_FillValue']
+        sds[start:stop] = block
+    sds.endaccess()
+    hdf.end()
+
+
+def fixed_stride(hdffile):
+    """
+    The way the examples read, decode and subsample a tile.
+    """
+    hdf = SD(hdffile, SDC.READ)
+    data = hdf.select('field')[:, :].astype(np.double)
+    hdf.end()
+    invalid = np.logical_or(data < ATTRS['valid_range'][0],
+                            data > ATTRS['valid_range'][1])
+    invalid = np.logical_or(invalid, data == ATTRS['_FillValue'])
+    data[invalid] = np.nan
+    data = (data - ATTRS['add_offset']) / ATTRS['scale_factor']
+    data = np.ma.masked_array(data, np.isnan(data))
+    return data[::2, ::2]
+
+
+def level_of_detail(hdffile, method):
+    """
+    A read through zoo.lib.lod at the default figure size.
+    """
+    def apply_attrs(raw):
+        return decode.decode(raw, ATTRS, 'lpdaac')
+    field = reader.open_file(hdffile)['field']
+    return lod.read(field, method=method, decode=apply_attrs)[0]
+
+
+def measure(func, repeat=3):
+    """
+    Mean time and peak memory allocated by a call.
+    """
+    elapsed = timeit.timeit(func, number=repeat) / repeat
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(nrows=4800):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        hdffile = os.path.join(tmpdir, 'synthetic.hdf')
+        write_synthetic(hdffile, nrows)
+        print('field: {0} x {0} int16, factor {1} for the figure'.format(
+            nrows, lod.factor_for((nrows, nrows))))
+        runs = [
+            ('[::2, ::2]', lambda: fixed_stride(hdffile)),
+            ('lod mean', lambda: level_of_detail(hdffile, 'mean')),
+            ('lod stride', lambda: level_of_detail(hdffile, 'stride')),
+        ]
+        t_fixed = None
+        for label, func in runs:
+            elapsed, peak = measure(func)
+            if t_fixed is None:
+                t_fixed = elapsed
+            print('{0:12s} {1:7.3f} s {2:9.1f} MB  {3:>11s} cells   '
+                  'speedup {4:6.1f}x'.format(
+                      label, elapsed, peak / 1e6,
+                      '{0} x {1}'.format(*func().shape), t_fixed / elapsed))
+        reader.close_all()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,94 @@
+"""
+Compare the vectorized OBPG control point expansion with the original loops.
+
+The original loops (as found in zoo/obpg/*.L2_*.hdf.py) fill column 0 with the
+first control point and then write each segment one column to the right of the
+control point column given by 'cntl_pt_cols'.  The vectorized version places
+every control point on its own column, so the two agree after shifting the
+legacy result left by one column.
+
+Usage:
+
+    python -m benchmarks.obpg_cntlpt [nscans]
+
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from zoo.lib import obpg
+
+
+def legacy(latnp, lonnp, cpc, nopcp, m, n):
+    """
+    The doubly nested loop used by the OBPG Level-2 examples.
+    """
+    step1 = cpc[2] - cpc[1]
+    step2 = cpc[nopcp - 1] - cpc[nopcp - 2]
+    longitude = np.zeros((m,n), dtype=np.float64)
+    latitude = np.zeros((m,n), dtype=np.float64)
+    for i in range (0,  m):
+        for j in range (0,  nopcp):
+            if j == 0:
+                latitude[i,j] = latnp[i,j]
+                longitude[i,j] = lonnp[i,j]
+                continue
+            if j > 0 and j < nopcp-1:
+                count=step1*(j-1)+1
+                arr_fill=np.linspace(latnp[i,(j-1)], latnp[i, j], (step1+1))
+                latitude[i, count:count+(step1)] = arr_fill[0:step1]
+                arr_fill=np.linspace(lonnp[i,(j-1)], lonnp[i, j], (step1+1))
+                longitude[i, count:count+(step1)] = arr_fill[0:step1]
+                continue
+            if j == nopcp-1:
+                count=step1*(j-1)+1
+                arr_fill=np.linspace(latnp[i,(j-1)], latnp[i, j], (step2+1))
+                latitude[i, count:count+(step2)] = arr_fill[0:step2]
+                arr_fill=np.linspace(lonnp[i,(j-1)], lonnp[i, j], (step2+1))
+                longitude[i, count:count+(step2)] = arr_fill[0:step2]
+                continue
+    return latitude, longitude
+
+
+def synthetic_granule(nscans=2724, nopcp=247, ncols=1968):
+    """
+    Build MODIS LAC sized control point arrays with an uneven last step.
+    """
+    cpc = np.append(np.arange(1, 8 * (nopcp - 1), 8), ncols).astype(np.int32)
+    scan = np.linspace(0, 1, nopcp)
+    row = np.linspace(0, 1, nscans)[:, np.newaxis]
+    lat = 60 - 120 * row + 5 * np.sin(3 * scan)
+    lon = -170 + 40 * scan + 10 * row
+    return lat, lon, cpc
+
+
+def main(nscans=2724):
+    lat, lon, cpc = synthetic_granule(nscans)
+    nopcp = len(cpc)
+    m, n = lat.shape[0], cpc[-1]
+
+    t0 = timeit.default_timer()
+    old_lat, old_lon = legacy(lat, lon, cpc, nopcp, m, n)
+    t_legacy = timeit.default_timer() - t0
+
+    t0 = timeit.default_timer()
+    new_lat = obpg.expand_control_points(lat, cpc, n)
+    new_lon = obpg.expand_longitude(lon, cpc, n)
+    t_new = timeit.default_timer() - t0
+
+    print('granule:    {0} scans x {1} control points -> {2} columns'.format(m, nopcp, n))
+    print('legacy:     {0:8.3f} s'.format(t_legacy))
+    print('vectorized: {0:8.3f} s'.format(t_new))
+    print('speedup:    {0:8.1f}x'.format(t_legacy / t_new))
+
+    # Same values, one column to the left.
+    print('max |lat diff|: {0:g}'.format(np.abs(old_lat[:, 1:] - new_lat[:, :-1]).max()))
+    print('max |lon diff|: {0:g}'.format(np.abs(old_lon[:, 1:] - new_lon[:, :-1]).max()))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
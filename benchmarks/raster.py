@@ -0,0 +1,83 @@
+"""
+Compare scatter plots of swath samples with zoo.lib.raster.
+
+Many examples draw every sample of a swath with scatter(..., s=1).
+zoo.lib.raster bins the samples to the pixels of the axes and draws one
+image instead.  Both draw the same synthetic global swath on plain
+matplotlib axes, timing the drawing and saving it to PNG, and the size of
+the figure saved as PDF is compared as well.
+
+Usage:
+
+    python -m benchmarks.raster [npoints]
+
+"""
+import io
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from zoo.lib import raster
+
+
+def swath(npoints):
+    """
+    Longitude, latitude and values along a few orbits, 200 samples wide.
+    """
+    nscans = npoints // 200
+    t = np.linspace(0, 4 * np.pi, nscans)[:, np.newaxis]
+    across = np.linspace(-10, 10, 200)[np.newaxis, :]
+    lat = 80 * np.sin(t) + 0 * across
+    lon = (np.degrees(t) * 0.95 + across + 180) % 360 - 180
+    values = np.cos(np.radians(lat)) * 300 + across
+    return lon, lat, values
+
+
+def scatter(ax, lon, lat, values):
+    ax.scatter(lon, lat, c=values, s=1, cmap=plt.cm.jet, edgecolors=None,
+               linewidth=0)
+
+
+def binned(ax, lon, lat, values):
+    raster.draw(lon, lat, values, ax=ax, extent=(-180, 180, -90, 90),
+                cmap=plt.cm.jet)
+
+
+def measure(func, lon, lat, values):
+    """
+    Seconds spent drawing and saving to PNG, and bytes of PDF output.
+    """
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    start = time.perf_counter()
+    func(ax, lon, lat, values)
+    fig.savefig(io.BytesIO(), format='png')
+    elapsed = time.perf_counter() - start
+    pdf = io.BytesIO()
+    fig.savefig(pdf, format='pdf')
+    plt.close(fig)
+    return elapsed, len(pdf.getvalue())
+
+
+def main(npoints=1000000):
+    lon, lat, values = swath(npoints)
+    print('swath: {0} points'.format(lon.size))
+
+    t_scatter = None
+    for label, func in [('scatter', scatter), ('raster.draw', binned)]:
+        elapsed, size = measure(func, lon, lat, values)
+        if t_scatter is None:
+            t_scatter = elapsed
+        print('{0:12s} {1:8.3f} s  PDF {2:9.1f} kB   speedup {3:6.1f}x'.format(
+            label, elapsed, size / 1e3, t_scatter / elapsed))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,105 @@
+"""
+Compare full reads of a field with strided reads through zoo.lib.reader.
+
+The examples used to read a whole field, convert it to double precision and
+only then subsample it, e.g. every tenth CALIPSO profile.  zoo.lib.reader
+hands the stride to the library instead, so only the elements plotted are
+ever read.  A synthetic HDF4 file with one large 16-bit field is written to a
+temporary directory and subsets of it are read both ways, timing each and
+measuring the peak memory allocated.
+
+Usage:
+
+    python -m benchmarks.reader [nrows]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+from pyhdf.SD import SD, SDC
+
+from zoo.lib import reader
+
+NCOLS = 1000
+
+# Subsets read, as in the CALIPSO example (every tenth profile of one
+# altitude bin) and the AVHRR example (every eighth point).
+SUBSETS = [
+    ('[::10, 750]', (slice(None, None, 10), 750)),
+    ('[::8, ::8]', (slice(None, None, 8), slice(None, None, 8))),
+]
+
+
+def write_synthetic(hdffile, nrows):
+    """
+    Write an HDF4 file with one (nrows, NCOLS) int16 field.
+    """
+    hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+    sds = hdf.create('field', SDC.INT16, (nrows, NCOLS))
+    for start in range(0, nrows, 1000):
+        stop = min(start + 1000, nrows)
+        rows = np.arange(start, stop, dtype=np.int32)[:, np.newaxis]
+        sds[start:stop] = ((rows + np.arange(NCOLS)) % 30000).astype(np.int16)
+    sds.endaccess()
+    hdf.end()
+
+
+def full_read(hdffile, key):
+    """
+    The way the examples used to read and subsample.
+    """
+    hdf = SD(hdffile, SDC.READ)
+    data = hdf.select('field')[:].astype(np.double)
+    hdf.end()
+    return data[key]
+
+
+def subset_read(hdffile, key):
+    """
+    A subset read through zoo.lib.reader.
+    """
+    return reader.open_file(hdffile)['field'][key].astype(np.double)
+
+
+def measure(func, repeat=3):
+    """
+    Mean time and peak memory allocated by a call.
+    """
+    elapsed = timeit.timeit(func, number=repeat) / repeat
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(nrows=40000):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        hdffile = os.path.join(tmpdir, 'synthetic.hdf')
+        write_synthetic(hdffile, nrows)
+        print('field: {0} x {1} int16'.format(nrows, NCOLS))
+        for label, key in SUBSETS:
+            t_full, m_full = measure(lambda: full_read(hdffile, key))
+            t_sub, m_sub = measure(lambda: subset_read(hdffile, key))
+            print('{0:12s} full read {1:7.3f} s {2:9.1f} MB   '
+                  'reader {3:7.3f} s {4:9.1f} MB   speedup {5:6.1f}x'.format(
+                      label, t_full, m_full / 1e6, t_sub, m_sub / 1e6,
+                      t_full / t_sub))
+            np.testing.assert_array_equal(full_read(hdffile, key),
+                                          subset_read(hdffile, key))
+        reader.close_all()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,125 @@
+"""
+Compare 1 x 1 degree window reads of an HDF4 grid before and after
+repackaging with zoo.lib.repack.
+
+An HDF4 SDS compressed as a whole, as the MODIS climate modeling grids are,
+has to be decompressed from its start up to the rows asked for, however
+small the window.  A synthetic HDF-EOS2 file with one deflated 3600 x 7200
+16-bit field on a 0.05 degree geographic grid, the size of MOD13C2 NDVI, is
+repackaged once into a chunked NetCDF-4 file, and windows of 1 x 1 degree
+spread over the globe are then read from each through zoo.lib.reader.
+
+Usage:
+
+    python -m benchmarks.repack [nrows]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+from pyhdf.SD import SD, SDC
+
+from zoo.lib import reader, repack
+
+METADATA = """GROUP=GridStructure
+	GROUP=GRID_1
+		GridName="CMG"
+		XDim={1}
+		YDim={0}
+		UpperLeftPointMtrs=(-180000000.000000,90000000.000000)
+		LowerRightMtrs=(180000000.000000,-90000000.000000)
+		Projection=GCTP_GEO
+		GridOrigin=HDFE_GD_UL
+		GROUP=DataField
+			OBJECT=DataField_1
+				DataFieldName="NDVI"
+				DataType=DFNT_INT16
+				DimList=("YDim","XDim")
+			END_OBJECT=DataField_1
+		END_GROUP=DataField
+	END_GROUP=GRID_1
+END_GROUP=GridStructure
+END
+"""
+
+# Windows read from each file.
+WINDOWS = 20
+
+
+def write_synthetic(hdffile, nrows):
+    """
+    Write an HDF-EOS2 file with one deflated (nrows, 2 * nrows) int16 grid
+    field.
+    """
+    ncols = 2 * nrows
+    hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+    setattr(hdf, 'StructMetadata.0', METADATA.format(nrows, ncols))
+    sds = hdf.create('NDVI', SDC.INT16, (nrows, ncols))
+    sds.setcompress(SDC.COMP_DEFLATE, 5)
+    sds.scale_factor = 0.0001
+    sds.setfillvalue(-3000)
+    rows = np.arange(nrows)[:, np.newaxis]
+    sds[:] = ((rows * 7 + np.arange(ncols)) % 10000).astype(np.int16)
+    sds.endaccess()
+    hdf.end()
+
+
+def windows(nrows, count=WINDOWS):
+    """
+    Row and column slices of 'count' 1 x 1 degree windows.
+    """
+    size = max(1, nrows // 180)
+    starts = np.random.RandomState(0).randint(0, nrows - size, (count, 2))
+    return [(slice(r, r + size), slice(2 * c, 2 * c + size))
+            for r, c in starts]
+
+
+def read_windows(filename, slices):
+    """
+    Read each window from a freshly opened file.
+    """
+    reader.close_all()
+    field = reader.open_file(filename)['NDVI']
+    return [field[rows, cols] for rows, cols in slices]
+
+
+def main(nrows=3600):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        hdffile = os.path.join(tmpdir, 'synthetic.hdf')
+        ncfile = os.path.join(tmpdir, 'synthetic.nc')
+        write_synthetic(hdffile, nrows)
+        elapsed = timeit.timeit(lambda: repack.repack(hdffile, ncfile),
+                                number=1)
+        print('field: {0} x {1} int16, repackaged in {2:.3f} s'.format(
+            nrows, 2 * nrows, elapsed))
+
+        slices = windows(nrows)
+        t_hdf = None
+        for label, filename in (('HDF4', hdffile), ('NetCDF-4', ncfile)):
+            elapsed = timeit.timeit(lambda: read_windows(filename, slices),
+                                    number=3) / 3 / len(slices)
+            if t_hdf is None:
+                t_hdf = elapsed
+            print('{0:10s} {1:9.1f} MB  {2:8.2f} ms per window   '
+                  'speedup {3:6.1f}x'.format(
+                      label, os.path.getsize(filename) / 1e6,
+                      elapsed * 1e3, t_hdf / elapsed))
+        same = all(np.array_equal(a, b) for a, b in
+                   zip(read_windows(hdffile, slices),
+                       read_windows(ncfile, slices)))
+        print('windows identical: {0}'.format(same))
+        reader.close_all()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
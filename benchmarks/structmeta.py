@@ -0,0 +1,182 @@
+"""
+Compare regular expression scans of StructMetadata with the parsed model.
+
+The examples used to pull each value they needed out of StructMetadata.0
+with its own regular expression, rescanning the whole text every time.
+Here every StructMetadata blob reachable from the test files (the files named
+by 'hdffile' in testing/, looked up in HDFEOS_ZOO_DIR) is queried for the
+corners of each of its grids, first with the old regular expressions and
+then through zoo.lib.structmeta, once cold (parse) and once warm (memoized).
+The headline figure is the cold parse against the regular expressions, as
+that is what the first query of a file pays; later queries of the same blob
+are cache hits.
+
+If none of the test files are available, a synthetic multi-grid blob is used
+instead.
+
+Usage:
+
+    python -m benchmarks.structmeta [repeat]
+
+"""
+import glob
+import os
+import re
+import sys
+import timeit
+
+from zoo.lib import structmeta
+
+UL_REGEX = re.compile(r'''UpperLeftPointMtrs=\(
+                          (?P<upper_left_x>[+-]?\d+\.\d+)
+                          ,
+                          (?P<upper_left_y>[+-]?\d+\.\d+)
+                          \)''', re.VERBOSE)
+LR_REGEX = re.compile(r'''LowerRightMtrs=\(
+                          (?P<lower_right_x>[+-]?\d+\.\d+)
+                          ,
+                          (?P<lower_right_y>[+-]?\d+\.\d+)
+                          \)''', re.VERBOSE)
+
+GRID_TEMPLATE = """	GROUP=GRID_{0}
+		GridName="Grid{0}"
+		XDim=1200
+		YDim=1200
+		UpperLeftPointMtrs=(-7783653.637667,1111950.519667)
+		LowerRightMtrs=(-6671703.118000,0.000000)
+		Projection=GCTP_SNSOID
+		ProjParams=(6371007.181000,0,0,0,0,0,0,0,0,0,0,0,0)
+		SphereCode=-1
+		GridOrigin=HDFE_GD_UL
+		GROUP=Dimension
+		END_GROUP=Dimension
+		GROUP=DataField
+{1}		END_GROUP=DataField
+		GROUP=MergedFields
+		END_GROUP=MergedFields
+	END_GROUP=GRID_{0}
+"""
+
+FIELD_TEMPLATE = """			OBJECT=DataField_{0}
+				DataFieldName="field_{0}"
+				DataType=DFNT_INT16
+				DimList=("YDim","XDim")
+				CompressionType=HDFE_COMP_DEFLATE
+				DeflateLevels=(6)
+			END_OBJECT=DataField_{0}
+"""
+
+
+def test_files():
+    """
+    Names of the data files used by the test suite.
+    """
+    top = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'testing')
+    sources = glob.glob(os.path.join(top, '*.py'))
+    sources += glob.glob(os.path.join(top, '**', 'test_*.py'), recursive=True)
+    names = set()
+    for source in sources:
+        with open(source) as f:
+            names.update(re.findall(r"hdffile = '([^']+)'", f.read()))
+    return sorted(names)
+
+
+def blobs():
+    """
+    StructMetadata text of every test file that is available.
+    """
+    datadir = os.environ.get('HDFEOS_ZOO_DIR', '.')
+    found = []
+    for name in test_files():
+        path = os.path.join(datadir, name)
+        if not os.path.exists(path):
+            continue
+        try:
+            text = structmeta.read(path)
+        except Exception:
+            # Not an HDF-EOS file.
+            continue
+        if text:
+            found.append((name, text))
+    return found
+
+
+def synthetic(ngrids=12, nfields=40):
+    """
+    A StructMetadata blob with several grids of many fields each.
+    """
+    fields = ''.join(FIELD_TEMPLATE.format(i + 1) for i in range(nfields))
+    grids = ''.join(GRID_TEMPLATE.format(i + 1, fields)
+                    for i in range(ngrids))
+    return ('GROUP=SwathStructure\nEND_GROUP=SwathStructure\n'
+            'GROUP=GridStructure\n' + grids + 'END_GROUP=GridStructure\n'
+            'GROUP=PointStructure\nEND_GROUP=PointStructure\nEND\n')
+
+
+def regex_corners(text):
+    """
+    Corners of every grid, the way the examples used to find them.
+    """
+    corners = []
+    for section in re.findall(r'GROUP=(GRID_\d+)(.*?)END_GROUP=\1', text,
+                              re.S):
+        ul = UL_REGEX.search(section[1])
+        lr = LR_REGEX.search(section[1])
+        if ul is None or lr is None:
+            continue
+        corners.append(((float(ul.group('upper_left_x')),
+                         float(ul.group('upper_left_y'))),
+                        (float(lr.group('lower_right_x')),
+                         float(lr.group('lower_right_y')))))
+    return corners
+
+
+def model_corners(text):
+    """
+    Corners of every grid through the parsed StructMetadata.
+    """
+    meta = structmeta.parse(text)
+    return [(g.upleft, g.lowright) for g in meta.grids.values()]
+
+
+def main(repeat=100):
+    found = blobs()
+    if not found:
+        print('no test files found in HDFEOS_ZOO_DIR, '
+              'using synthetic metadata')
+        found = [('synthetic', synthetic())]
+    texts = [text for _, text in found]
+    nbytes = sum(len(text) for text in texts)
+    ngrids = sum(len(structmeta.parse(text).grids) for text in texts)
+    print('{0} blobs, {1} grids, {2} bytes'.format(len(texts), ngrids, nbytes))
+
+    t_regex = timeit.timeit(lambda: [regex_corners(t) for t in texts],
+                            number=repeat) / repeat
+
+    def cold():
+        structmeta.parse.cache_clear()
+        return [model_corners(t) for t in texts]
+    t_cold = timeit.timeit(cold, number=repeat) / repeat
+
+    [model_corners(t) for t in texts]
+    t_warm = timeit.timeit(lambda: [model_corners(t) for t in texts],
+                           number=repeat) / repeat
+
+    print('regex scan:    {0:10.3f} ms'.format(t_regex * 1e3))
+    print('parse (cold):  {0:10.3f} ms   {1:6.2f}x the regex time'.format(
+        t_cold * 1e3, t_cold / t_regex))
+    print('cache hit:     {0:10.3f} ms   {1:6.1f}x faster than the regex, '
+          'once parsed'.format(t_warm * 1e3, t_regex / t_warm))
+
+    # Both ways find the same corners, grids without corners aside.
+    for text in texts:
+        expected = regex_corners(text)
+        got = [c for c in model_corners(text) if isinstance(c[0], tuple)]
+        assert got == expected, 'corner mismatch'
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,81 @@
+"""
+Compare drawing a classified ground track point by point with
+zoo.lib.track.
+
+The CALIPSO VFM example drew one marker per profile with its own m.plot call,
+each creating a Line2D artist.  zoo.lib.track draws all of them in one
+rasterized collection.  Both draw a synthetic track of random feature types
+on plain matplotlib axes and save it to PNG, timing the drawing and the
+saving separately.
+
+Usage:
+
+    python -m benchmarks.track [npoints]
+
+"""
+import io
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib import colors
+import numpy as np
+
+from zoo.lib import track
+
+COLORS = ['black', 'blue', 'yellow', 'green', 'red', 'purple', 'gray',
+          'white']
+
+
+def legacy(ax, x, y, data):
+    """
+    The loop as found in the CALIPSO VFM example.
+    """
+    cmap = colors.ListedColormap(COLORS)
+    for i, feature in enumerate(data):
+        ax.plot(x[i], y[i], 'o', color=cmap(feature), markersize=3)
+
+
+def vectorized(ax, x, y, data):
+    track.draw(x, y, data, COLORS, ax=ax)
+
+
+def measure(func, x, y, data):
+    """
+    Seconds spent drawing and saving a figure.
+    """
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    start = time.perf_counter()
+    func(ax, x, y, data)
+    drawn = time.perf_counter()
+    fig.savefig(io.BytesIO(), format='png')
+    saved = time.perf_counter()
+    plt.close(fig)
+    return drawn - start, saved - drawn
+
+
+def main(npoints=3728):
+    t = np.linspace(0, np.pi, npoints)
+    x = np.degrees(np.cos(t) * 2.5)
+    y = np.degrees(t) - 90
+    data = np.random.RandomState(0).randint(0, 8, npoints)
+    print('track: {0} points'.format(npoints))
+
+    t_legacy = None
+    for label, func in [('legacy', legacy), ('track.draw', vectorized)]:
+        draw, save = measure(func, x, y, data)
+        if t_legacy is None:
+            t_legacy = draw + save
+        print('{0:12s} draw {1:7.3f} s  savefig {2:7.3f} s   '
+              'speedup {3:6.1f}x'.format(label, draw, save,
+                                         t_legacy / (draw + save)))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,90 @@
+"""
+Compare reading vdata geolocation with pyhdf and with zoo.lib.vdata.
+
+A synthetic HDF4 file holds Latitude, Longitude and Profile_time vdatas of
+one field each, as CloudSat and MOPITT granules do.  They are read as the
+examples did, with vs.find, setfields and read, then turned into arrays,
+and with zoo.lib.vdata.read_fields in one call.
+
+Usage:
+
+    python -m benchmarks.vdata [nrecs]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pyhdf.VS
+from pyhdf.HDF import HDF, HC
+
+from zoo.lib import vdata
+
+NAMES = ('Latitude', 'Longitude', 'Profile_time')
+
+
+def write_synthetic(hdffile, nrecs):
+    """
+    Write a file with three vdatas of 'nrecs' records.
+    """
+    hdf = HDF(hdffile, HC.WRITE | HC.CREATE)
+    vs = hdf.vstart()
+    values = (np.linspace(-80, 80, nrecs), np.linspace(-180, 180, nrecs),
+              np.arange(nrecs) * 0.16)
+    types = (HC.FLOAT32, HC.FLOAT32, HC.FLOAT64)
+    for name, data_type, data in zip(NAMES, types, values):
+        vd = vs.create(name, ((name, data_type, 1),))
+        vd.write([[x] for x in data.tolist()])
+        vd.detach()
+    vs.end()
+    hdf.close()
+
+
+def read_pyhdf(hdffile):
+    """
+    Read the vdatas as the examples did.
+    """
+    hdf = HDF(hdffile)
+    vs = hdf.vstart()
+    arrays = []
+    for name in NAMES:
+        vd = vs.attach(vs.find(name))
+        vd.setfields(name)
+        nrecs, _, _, _, _ = vd.inquire()
+        arrays.append(np.array(vd.read(nRec=nrecs)).ravel())
+        vd.detach()
+    vs.end()
+    hdf.close()
+    return arrays
+
+
+def main(nrecs=37081):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        hdffile = os.path.join(tmpdir, 'synthetic.hdf')
+        write_synthetic(hdffile, nrecs)
+        print('vdatas: {0} x {1} records'.format(len(NAMES), nrecs))
+        t_pyhdf = None
+        for label, func in (('pyhdf', read_pyhdf),
+                            ('zoo.lib.vdata',
+                             lambda f: vdata.read_fields(f, NAMES))):
+            elapsed = timeit.timeit(lambda: func(hdffile), number=5) / 5
+            if t_pyhdf is None:
+                t_pyhdf = elapsed
+            print('{0:14s} {1:8.2f} ms   speedup {2:6.1f}x'.format(
+                label, elapsed * 1e3, t_pyhdf / elapsed))
+        same = all(np.array_equal(a, b) for a, b in
+                   zip(read_pyhdf(hdffile), vdata.read_fields(hdffile, NAMES)))
+        print('values identical: {0}'.format(same))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -28,6 +28,9 @@ class TestDocstrings(unittest.TestCase):
         Verify that the docstring in each example has the EOS contact info.
         """
         for center_name, center_module in inspect.getmembers(zoo, inspect.ismodule):
+            if center_name == 'lib':
+                # Shared support code, not examples.
+                continue
             for inst_name, inst_module in inspect.getmembers(center_module, inspect.ismodule):
                 for example_name, example_module in inspect.getmembers(inst_module, inspect.ismodule):
                     msg = "Failed to verify docstring in {0}".format(example_name)
@@ -40,6 +43,9 @@ class TestDocstrings(unittest.TestCase):
         Verify instructions to run each script.
         """
         for center_name, center_module in inspect.getmembers(zoo, inspect.ismodule):
+            if center_name == 'lib':
+                # Shared support code, not examples.
+                continue
             for inst_name, inst_module in inspect.getmembers(center_module, inspect.ismodule):
                 for example_name, example_module in inspect.getmembers(inst_module, inspect.ismodule):
                     msg = "Failed to verify docstring in {0}".format(example_name)
@@ -0,0 +1,1276 @@
+"""
+Tests for the shared support code in zoo.lib.
+"""
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from zoo import batch
+from zoo.lib import (binning, columnar, decode, geocache, grid, lod, mabel,
+                     maps, misr, mosaic, obpg, profiling, proj, raster,
+                     reader, repack, structmeta, swath, track, vdata, vfm)
+
+
+class TestObpg(unittest.TestCase):
+    """
+    Exercise the OBPG control point expansion.
+    """
+    def test_control_points_are_kept(self):
+        """
+        Every control point lands on its own column, uneven last step too.
+        """
+        cpc = np.array([1, 9, 17, 24])
+        cp = np.array([[0.0, 8.0, 24.0, 31.0],
+                       [1.0, 2.0, 3.0, 4.0]])
+        out = obpg.expand_control_points(cp, cpc)
+        self.assertEqual(out.shape, (2, 24))
+        np.testing.assert_array_equal(out[:, cpc - 1], cp)
+        np.testing.assert_allclose(out[0], [0, 1, 2, 3, 4, 5, 6, 7,
+                                            8, 10, 12, 14, 16, 18, 20, 22,
+                                            24, 25, 26, 27, 28, 29, 30, 31])
+
+    def test_longitude_dateline(self):
+        """
+        Longitudes are interpolated the short way across the dateline.
+        """
+        cpc = np.array([1, 5])
+        cp = np.array([[178.0, -178.0]])
+        out = obpg.expand_longitude(cp, cpc)
+        np.testing.assert_allclose(out[0], [178, 179, -180, -179, -178])
+
+
+SINUSOIDAL_METADATA = """GROUP=GridStructure
+	GROUP=GRID_1
+		GridName="MODIS_Grid_1km_2D"
+		XDim=1200
+		YDim=1200
+		UpperLeftPointMtrs=(-7783653.637667,1111950.519667)
+		LowerRightMtrs=(-6671703.118000,0.000000)
+		Projection=GCTP_SNSOID
+		ProjParams=(6371007.181000,0,0,0,0,0,0,0,0,0,0,0,0)
+		SphereCode=-1
+		GridOrigin=HDFE_GD_UL
+	END_GROUP=GRID_1
+	GROUP=GRID_2
+		GridName="CMG"
+		XDim=360
+		YDim=180
+		UpperLeftPointMtrs=(-180000000.000000,90000000.000000)
+		LowerRightMtrs=(180000000.000000,-90000000.000000)
+		Projection=GCTP_GEO
+		GridOrigin=HDFE_GD_UL
+	END_GROUP=GRID_2
+END_GROUP=GridStructure
+END
+"""
+
+
+class TestGrid(unittest.TestCase):
+    """
+    Exercise grid geolocation from StructMetadata.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.environ = os.environ.get('HDFEOS_ZOO_CACHE')
+        os.environ['HDFEOS_ZOO_CACHE'] = self.tmpdir
+        grid._latlon_cache.clear()
+
+    def tearDown(self):
+        grid._latlon_cache.clear()
+        if self.environ is None:
+            del os.environ['HDFEOS_ZOO_CACHE']
+        else:
+            os.environ['HDFEOS_ZOO_CACHE'] = self.environ
+        shutil.rmtree(self.tmpdir)
+
+    def test_sinusoidal(self):
+        """
+        MODIS tile h10v08 spans 0N to 10N.
+        """
+        modis = grid.from_metadata(SINUSOIDAL_METADATA, 'MODIS_Grid_1km_2D')
+        self.assertEqual(modis.shape, (1200, 1200))
+        lat, lon = modis.latlon()
+        self.assertFalse(lat.flags.writeable)
+        self.assertTrue(9.99 < lat[0, 0] < 10)
+        self.assertTrue(0 < lat[-1, -1] < 0.01)
+
+        # A strided window agrees with the full grid.
+        sublat, sublon = modis.latlon(slice(0, 100, 7), slice(3, None, 50))
+        np.testing.assert_array_equal(sublat, lat[0:100:7, 3::50])
+        np.testing.assert_array_equal(sublon, lon[0:100:7, 3::50])
+
+    def test_persisted(self):
+        """
+        Projected coordinates are saved once and reloaded in a new process.
+        """
+        modis = grid.from_metadata(SINUSOIDAL_METADATA, 'MODIS_Grid_1km_2D')
+        window = slice(0, 1200, 100)
+        lat, lon = modis.latlon(window, window, persist=False)
+        grid._latlon_cache.clear()
+        saved = modis.latlon(window, window, persist=True)
+        self.assertEqual(len(os.listdir(os.path.join(self.tmpdir,
+                                                     'latlon'))), 1)
+        grid._latlon_cache.clear()
+        reloaded = modis.latlon(window, window, persist=True)
+        self.assertFalse(reloaded[0].flags.writeable)
+        for result in (saved, reloaded):
+            np.testing.assert_array_equal(result[0], lat)
+            np.testing.assert_array_equal(result[1], lon)
+
+    def test_geographic(self):
+        """
+        GCTP_GEO corners are packed DMS and pixels are registered at centers.
+        """
+        cmg = grid.from_metadata(SINUSOIDAL_METADATA, 'CMG')
+        self.assertIsNone(cmg.proj4)
+        lat, lon = cmg.latlon()
+        np.testing.assert_allclose(lat[:, 0], np.arange(89.5, -90, -1))
+        np.testing.assert_allclose(lon[0], np.arange(-179.5, 180, 1))
+
+    def test_equal_angle(self):
+        """
+        Standard grids are shared, counted exactly and never meshed.
+        """
+        trmm = grid.standard('trmm_0.25')
+        self.assertIs(trmm, grid.equal_angle(400, 1440, -50, 50,
+                                             'HDFE_GD_LL'))
+        lat, lon = trmm.axes()
+        self.assertFalse(lat.flags.writeable)
+        np.testing.assert_allclose(lat, np.arange(400) * 0.25 - 49.875)
+        np.testing.assert_allclose(lon, np.arange(1440) * 0.25 - 179.875)
+
+        lat2d, lon2d = grid.standard('cmg_0.05').latlon()
+        self.assertEqual(lat2d.shape, (3600, 7200))
+        self.assertEqual(lat2d.strides[1], 0)
+        self.assertEqual(lon2d.strides[0], 0)
+        self.assertAlmostEqual(lat2d[0, 0], 89.975)
+        self.assertRaises(ValueError, grid.standard, 'unknown')
+
+
+class TestProj(unittest.TestCase):
+    """
+    Exercise the cached, chunked coordinate transforms.
+    """
+    def test_matches_proj(self):
+        """
+        A broadcast row and column give what Proj does on a meshgrid.
+        """
+        import pyproj
+        x = np.linspace(-1e7, -8.9e6, 30)
+        y = np.linspace(1.1e6, 0, 20)
+        xv, yv = np.meshgrid(x, y)
+        elon, elat = pyproj.Proj(proj.SINUSOIDAL)(xv, yv, inverse=True)
+        lon, lat = proj.transform(proj.SINUSOIDAL, x[np.newaxis, :],
+                                  y[:, np.newaxis], chunk_size=70)
+        np.testing.assert_allclose(lon, elon, atol=1e-9)
+        np.testing.assert_allclose(lat, elat, atol=1e-9)
+
+        lon32, lat32 = proj.transform(proj.SINUSOIDAL, x[np.newaxis, :],
+                                      y[:, np.newaxis], dtype=np.float32)
+        self.assertEqual(lat32.dtype, np.float32)
+        np.testing.assert_allclose(lat32, elat, atol=1e-4)
+
+    def test_transformer_cached(self):
+        """
+        A transformer is only set up once per projection.
+        """
+        self.assertIs(proj.transformer(proj.SINUSOIDAL),
+                      proj.transformer(proj.SINUSOIDAL))
+
+
+SWATH_METADATA = """GROUP=SwathStructure
+	GROUP=SWATH_1
+		SwathName="mod05"
+		GROUP=Dimension
+			OBJECT=Dimension_1
+				DimensionName="Cell_Across_Swath_1km"
+				Size=1354
+			END_OBJECT=Dimension_1
+			OBJECT=Dimension_2
+				DimensionName="Cell_Across_Swath_5km"
+				Size=270
+			END_OBJECT=Dimension_2
+		END_GROUP=Dimension
+		GROUP=DimensionMap
+			OBJECT=DimensionMap_1
+				GeoDimension="Cell_Across_Swath_5km"
+				DataDimension="Cell_Across_Swath_1km"
+				Offset=2
+				Increment=5
+			END_OBJECT=DimensionMap_1
+		END_GROUP=DimensionMap
+		GROUP=IndexDimensionMap
+		END_GROUP=IndexDimensionMap
+		GROUP=GeoField
+			OBJECT=GeoField_1
+				GeoFieldName="Latitude"
+				DataType=DFNT_FLOAT32
+				DimList=("Cell_Along_Swath_5km","Cell_Across_Swath_5km")
+			END_OBJECT=GeoField_1
+		END_GROUP=GeoField
+		GROUP=DataField
+			OBJECT=DataField_1
+				DataFieldName="Water_Vapor_Near_Infrared"
+				DataType=DFNT_INT16
+				DimList=("Cell_Along_Swath_1km","Cell_Across_Swath_1km")
+			END_OBJECT=DataField_1
+		END_GROUP=DataField
+	END_GROUP=SWATH_1
+END_GROUP=SwathStructure
+GROUP=GridStructure
+	GROUP=GRID_1
+		GridName="NadirGrid"
+		XDim=72
+		YDim=46
+		UpperLeftPointMtrs=(-180000000.000000,90000000.000000)
+		LowerRightMtrs=(180000000.000000,-90000000.000000)
+		Projection=HE5_GCTP_GEO
+		ProjParams=(0,0,0,0,0,0,
+			0,0,0,0,0,0,0)
+		GridOrigin=HE5_HDFE_GD_UL
+	END_GROUP=GRID_1
+END_GROUP=GridStructure
+GROUP=PointStructure
+END_GROUP=PointStructure
+END
+"""
+
+
+class TestStructmeta(unittest.TestCase):
+    """
+    Exercise the StructMetadata object model.
+    """
+    def test_swath(self):
+        """
+        Dimensions, dimension maps and fields of a swath.
+        """
+        meta = structmeta.parse(SWATH_METADATA)
+        swath = meta.swath('mod05')
+        self.assertEqual(swath.dimensions['Cell_Across_Swath_5km'], 270)
+        dimmap = swath.dimension_map('Cell_Across_Swath_5km')
+        self.assertEqual((dimmap.offset, dimmap.increment), (2, 5))
+        self.assertEqual(swath.geo_fields['Latitude'].dimlist,
+                         ('Cell_Along_Swath_5km', 'Cell_Across_Swath_5km'))
+        self.assertIs(meta.find_field('Water_Vapor_Near_Infrared'), swath)
+
+        # The same text is only parsed once.
+        self.assertIs(structmeta.parse(SWATH_METADATA), meta)
+
+    def test_hdfeos5_grid(self):
+        """
+        HE5_ prefixes are dropped and continued lists are joined.
+        """
+        nadir = structmeta.parse(SWATH_METADATA).grid('NadirGrid')
+        self.assertEqual(nadir.projection, 'GCTP_GEO')
+        self.assertEqual(nadir.origin, 'HDFE_GD_UL')
+        self.assertEqual(len(nadir.projparams), 13)
+        self.assertEqual(grid.from_structure(nadir).shape, (46, 72))
+        with self.assertRaises(KeyError):
+            structmeta.parse(SWATH_METADATA).grid('NoSuchGrid')
+
+
+class TestSwath(unittest.TestCase):
+    """
+    Exercise swath geolocation from dimension maps.
+    """
+    def test_dateline(self):
+        """
+        A smooth field across the dateline is reproduced at 1-km.
+        """
+        # Two scans of 10 lines, 5-km geolocation at offset 2, increment 5.
+        cols, rows = np.meshgrid(np.arange(2, 100, 5), [2, 7, 12, 17])
+        geo = swath.Geolocation(10 + 0.01 * rows, 175 + 0.1 * cols,
+                                (2, 5), (2, 5), (20, 100), scan_lines=10)
+        lat, lon = geo.latlon()
+        self.assertEqual(lat.shape, (20, 100))
+        expected = 175 + 0.1 * np.arange(100)
+        expected = (expected + 180) % 360 - 180
+        np.testing.assert_allclose(lon[5], expected, atol=1e-3)
+        np.testing.assert_allclose(lat[:, 50], 10 + 0.01 * np.arange(20),
+                                   atol=0.02)
+
+        # A strided window agrees with the full result.
+        sublat, sublon = geo.latlon(slice(1, None, 2), slice(None, None, 3))
+        np.testing.assert_allclose(sublat, lat[1::2, ::3], atol=1e-9)
+        np.testing.assert_allclose(sublon, lon[1::2, ::3], atol=1e-9)
+
+
+class TestReader(unittest.TestCase):
+    """
+    Exercise the lazy field reader.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        reader.close_all()
+        shutil.rmtree(self.tmpdir)
+
+    def test_hyperslab(self):
+        """
+        Strided, integer and leftover indices read the right elements.
+        """
+        from pyhdf.SD import SD, SDC
+        hdffile = os.path.join(self.tmpdir, 'test.hdf')
+        expected = np.arange(600, dtype=np.int16).reshape(60, 10)
+        hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+        sds = hdf.create('field', SDC.INT16, expected.shape)
+        sds[:] = expected
+        sds.units = 'K'
+        sds.endaccess()
+        hdf.end()
+
+        f = reader.open_file(hdffile)
+        self.assertEqual(f.backend.name, 'pyhdf')
+        field = f['field']
+        self.assertEqual((field.shape, field.dtype), ((60, 10), np.int16))
+        self.assertEqual(field.attrs['units'], 'K')
+        for key in [(slice(None, None, 10), 7), Ellipsis, -1,
+                    (slice(2, 50, 7), slice(None, None, -3)),
+                    ([1, 4], slice(1, None, 3)), slice(5, 5)]:
+            np.testing.assert_array_equal(field[key], expected[key])
+
+        # The open file is reused.
+        self.assertIs(reader.open_file(hdffile), f)
+
+    def test_evicted(self):
+        """
+        Fields of a file pushed out of the pool reopen it when read.
+        """
+        from pyhdf.SD import SD, SDC
+        max_open = reader.MAX_OPEN
+        reader.MAX_OPEN = 2
+        try:
+            fields = []
+            for i in range(3):
+                hdffile = os.path.join(self.tmpdir, '{0}.hdf'.format(i))
+                hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+                sds = hdf.create('field', SDC.INT16, (4,))
+                sds[:] = np.arange(4, dtype=np.int16) + i
+                sds.endaccess()
+                hdf.end()
+                fields.append(reader.open_file(hdffile)['field'])
+            self.assertIsNone(fields[0].file.handle)
+            for i, field in enumerate(fields):
+                np.testing.assert_array_equal(field[:], np.arange(4) + i)
+                np.testing.assert_array_equal(np.asarray(field),
+                                              np.arange(4) + i)
+                self.assertIsNotNone(field.file.handle)
+            self.assertEqual(np.array(fields[1], dtype=np.float32).dtype,
+                             np.float32)
+            if np.lib.NumpyVersion(np.__version__) >= '2.0.0':
+                self.assertRaises(ValueError, np.asarray, fields[2],
+                                  copy=False)
+        finally:
+            reader.MAX_OPEN = max_open
+
+
+class TestDecode(unittest.TestCase):
+    """
+    Exercise the single-pass decoding of packed fields.
+    """
+    def test_modis(self):
+        """
+        Same result as the usual whole-array steps, a few rows at a time.
+        """
+        raw = np.arange(-50, 550, dtype=np.int16).reshape(60, 10)
+        raw[::7, 3] = -9999
+        attrs = {'scale_factor': 0.5, 'add_offset': 10.0,
+                 '_FillValue': -9999, 'valid_range': [0, 500]}
+
+        expected = raw.astype(np.double)
+        invalid = np.logical_or(expected < 0, expected > 500)
+        invalid = np.logical_or(invalid, expected == -9999)
+        expected = (expected - 10.0) * 0.5
+        data = decode.decode(raw, attrs, 'modis', chunk_size=25)
+        np.testing.assert_array_equal(data.mask, invalid)
+        np.testing.assert_array_equal(data.data[~invalid],
+                                      expected[~invalid])
+        self.assertTrue(np.isnan(data.data[invalid]).all())
+
+        data = decode.decode(raw, attrs, 'modis', dtype=np.float32)
+        self.assertEqual(data.dtype, np.float32)
+
+    def test_misr_rdqi(self):
+        """
+        The RDQI bits are dropped and flag values are masked.
+        """
+        raw = np.array([65515, 4 * 100 + 3, 4 * 16377, 4 * 16376],
+                       dtype=np.uint16)
+        data = decode.decode(raw, {'_FillValue': 65515}, 'misr', scale=0.5)
+        np.testing.assert_array_equal(data.mask, [True, False, True, False])
+        np.testing.assert_array_equal(data.data[[1, 3]], [50, 8188])
+
+
+class TestProfiling(unittest.TestCase):
+    """
+    Exercise the phase breakdown.
+    """
+    def test_phases(self):
+        """
+        Nested calls are charged to the outer phase and patches are undone.
+        """
+        phases = {'geolocation': [('zoo.lib.obpg', 'expand_longitude')],
+                  'read': [('zoo.lib.obpg', 'expand_control_points')]}
+        original = obpg.expand_control_points
+        cpc = np.array([1, 5])
+        with profiling.Profile(phases=phases) as prof:
+            obpg.expand_longitude(np.array([[178.0, -178.0]]), cpc)
+            obpg.expand_control_points(np.array([[0.0, 4.0]]), cpc)
+        report = prof.report()
+        self.assertEqual(report['phases']['geolocation']['calls'], 1)
+        self.assertEqual(report['phases']['read']['calls'], 1)
+        self.assertTrue(report['other'] >= 0)
+        self.assertIs(obpg.expand_control_points, original)
+
+
+class TestTrack(unittest.TestCase):
+    """
+    Exercise the categorical ground track drawing.
+    """
+    def test_one_collection(self):
+        """
+        Every point lands in one collection with the color of its category.
+        """
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        fig = plt.figure()
+        try:
+            ax = fig.add_subplot(111)
+            data = np.array([0, 1, 2, 2, 1, 0, 2])
+            pts = track.draw(np.arange(7), np.arange(7), data,
+                             ['black', 'blue', 'red'], ax=ax)
+            self.assertEqual(len(ax.collections), 1)
+            self.assertEqual(len(ax.lines), 0)
+            self.assertEqual(len(pts.get_offsets()), 7)
+            fig.canvas.draw()
+            rgb = pts.get_facecolors()[:, :3]
+            np.testing.assert_array_equal(rgb[2], [1, 0, 0])
+            np.testing.assert_array_equal(rgb[4], [0, 0, 1])
+
+            pts = track.draw(np.arange(7), np.arange(7), data,
+                             ['black', 'blue', 'red'], ax=ax, stride=3)
+            self.assertEqual(len(pts.get_offsets()), 3)
+        finally:
+            plt.close(fig)
+
+
+class TestLod(unittest.TestCase):
+    """
+    Exercise the level of detail reduction.
+    """
+    def test_mean_and_mode(self):
+        """
+        Whole blocks are reduced, read a band at a time, masked cells left
+        out.
+        """
+        data = np.ma.masked_array(np.arange(7 * 9, dtype=float).reshape(7, 9))
+        data[0, 0] = np.ma.masked
+        cells = np.ma.stack([np.zeros((7, 9)), data])
+        chunk_size = lod.CHUNK_SIZE
+        lod.CHUNK_SIZE = 9
+        try:
+            mean, rows, cols = lod.read(cells, 2, 'mean',
+                                        plane=(1, slice(None), slice(None)))
+        finally:
+            lod.CHUNK_SIZE = chunk_size
+        self.assertEqual((rows, cols), (slice(1, 6, 2), slice(1, 8, 2)))
+        np.testing.assert_allclose(mean[:, 1:], data[0:6:2, 2:8:2] + 5)
+        self.assertAlmostEqual(mean[0, 0], (1 + 9 + 10) / 3.0)
+
+        flags = np.array([[1, 1, 2, 2], [1, 3, 2, 5], [7, 7, 9, 9],
+                          [7, 9, 9, 9]], dtype=np.uint8)
+        mode = lod.reduce(np.ma.masked_equal(flags, 2), 2, 'mode')
+        np.testing.assert_array_equal(mode, [[1, 5], [7, 9]])
+
+
+class TestRaster(unittest.TestCase):
+    """
+    Exercise the binning of scattered points to pixels.
+    """
+    def test_reductions(self):
+        """
+        Each reduction of the valid points falling in a pixel.
+        """
+        x = np.array([0.1, 0.2, 1.5, 1.9, 2.0, 5.0, 0.4])
+        y = np.array([0.1, 0.3, 0.5, 1.9, 2.0, 0.0, 0.2])
+        values = np.ma.masked_array([1.0, 3.0, 5.0, 7.0, 9.0, 11.0, np.nan],
+                                    [0, 0, 0, 0, 1, 0, 0])
+        expected = {'mean': [2, 5, 7], 'max': [3, 5, 7], 'min': [1, 5, 7],
+                    'count': [2, 1, 1], 'last': [3, 5, 7]}
+        for reduction, pixels in expected.items():
+            grid = raster.bin_points(x, y, values, (0, 2, 0, 2), (2, 2),
+                                     reduction)
+            np.testing.assert_array_equal(grid.mask, [[0, 0], [1, 0]])
+            np.testing.assert_array_equal(grid.compressed(), pixels)
+
+
+class TestVfm(unittest.TestCase):
+    """
+    Exercise the CALIPSO VFM decoder.
+    """
+    def test_regimes(self):
+        """
+        Each word lands on the bins and profiles it covers, top down.
+        """
+        words = np.arange(2 * vfm.RECORD_WORDS).reshape(2, -1)
+        curtain = vfm.expand(words)
+        self.assertEqual(curtain.shape, (30, 1020))
+        # 20.2 - 30.1 km: 3 profiles of 55 bins of 180 m.
+        np.testing.assert_array_equal(curtain[:5, :6], 0)
+        np.testing.assert_array_equal(curtain[5:10, 6], 56)
+        # 8.2 - 20.2 km: 5 profiles of 200 bins of 60 m.
+        np.testing.assert_array_equal(curtain[:3, 330:332], 165)
+        np.testing.assert_array_equal(curtain[12, 729], 165 + 4 * 200 + 199)
+        # -0.5 - 8.2 km: 15 profiles of 290 bins of 30 m.
+        np.testing.assert_array_equal(curtain[14, 730:], np.arange(5225, 5515))
+        np.testing.assert_array_equal(curtain[15, 0], 5515)
+        alt = vfm.altitudes()
+        self.assertAlmostEqual(alt[329], 20.215)
+        self.assertAlmostEqual(alt[-1], -0.485)
+
+    def test_unpack(self):
+        """
+        Bit fields come out of signed and unsigned words alike.
+        """
+        word = 0b1110101101011010
+        for dtype in (np.uint16, np.int16):
+            words = np.array([word], dtype=np.uint16).astype(dtype)
+            fields = [vfm.unpack(words, name)[0] for name in vfm.FIELDS]
+            self.assertEqual(fields, [2, 3, 2, 2, 5, 0, 7])
+
+    def test_profile_edges(self):
+        """
+        Profile edges are evenly spaced, the records centered between them.
+        """
+        edges = vfm.profile_edges([0.0, 15.0, 30.0])
+        np.testing.assert_allclose(edges, np.arange(46) - 7.5)
+        centers = (edges[:-1] + edges[1:]) / 2
+        np.testing.assert_allclose(centers[7::15], [0, 15, 30])
+
+
+class TestMabel(unittest.TestCase):
+    """
+    Exercise the streaming MABEL photon summaries.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        reader.close_all()
+        shutil.rmtree(self.tmpdir)
+
+    def test_segments(self):
+        """
+        Segments summarized chunk by chunk match the whole channel's.
+        """
+        import h5py
+        h5file = os.path.join(self.tmpdir, 'mabel.h5')
+        time = np.sort(np.random.RandomState(0).uniform(10, 40, 3000))
+        elev = np.random.RandomState(1).normal(500, 50, 3000)
+        elev[::97] = np.nan
+        with h5py.File(h5file, 'w') as f:
+            for channel in ('channel002', 'channel001'):
+                group = f.create_group('photon/' + channel)
+                group['delta_time'] = time
+                group['latitude'] = 30 + time / 100
+                group['longitude'] = -120 + time / 50
+                group['elev'] = elev
+
+        f = reader.open_file(h5file)
+        self.assertEqual(mabel.channels(f), ['channel001', 'channel002'])
+        s = mabel.segments(f, 'channel001', seconds=2.0, chunk_size=333)
+
+        segment = np.floor((time - time[0]) / 2.0)
+        valid = np.isfinite(elev)
+        ids = np.unique(segment[valid])
+        np.testing.assert_allclose(s['delta_time'], time[0] + ids * 2.0)
+        for i, k in enumerate(ids):
+            photons = valid & (segment == k)
+            self.assertEqual(s['count'][i], photons.sum())
+            np.testing.assert_allclose(s['latitude'][i],
+                                       np.mean(30 + time[photons] / 100))
+            np.testing.assert_allclose(
+                s['elev'][i], np.percentile(elev[photons], mabel.PERCENTILES))
+
+
+class TestColumnar(unittest.TestCase):
+    """
+    Exercise the partition columns of the Parquet export.
+    """
+    def test_partitions(self):
+        """
+        Latitude bands and days, with invalid values kept apart.
+        """
+        lat = np.ma.masked_array([-90, -0.5, 0, 45.2, 90, 0],
+                                 [0, 0, 0, 0, 0, 1])
+        np.testing.assert_array_equal(columnar.latitude_band(lat),
+                                      [-90, -10, 0, 40, 90, -999])
+        days = columnar.day(np.array([0, 86399.9, 86400]), columnar.TAI93)
+        self.assertEqual(list(days),
+                         ['1993-01-01', '1993-01-01', '1993-01-02'])
+
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import mpl_toolkits.basemap as basemap
+except ImportError:
+    basemap = None
+
+
+@unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+class TestColumnarExport(unittest.TestCase):
+    """
+    Exercise the Parquet export and its partitioned reads.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.h5file = os.path.join(self.tmpdir, 'granule.h5')
+        self.root = os.path.join(self.tmpdir, 'dataset')
+
+    def tearDown(self):
+        reader.close_all()
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, lat):
+        """
+        Write a granule of records at 'lat', a day apart, each with a value
+        (-999 for fill every third record) and a profile of 3 levels.
+        """
+        import h5py
+        reader.close_all()
+        n = len(lat)
+        with h5py.File(self.h5file, 'w') as f:
+            f['time'] = np.arange(n) * 86400.0
+            f['lat'] = np.asarray(lat, dtype=np.float64)
+            f['lon'] = np.zeros(n)
+            value = np.where(np.arange(n) % 3 == 0, -999,
+                             np.arange(n)).astype(np.int16)
+            f['value'] = value
+            f['value'].attrs['_FillValue'] = np.int16(-999)
+            f['value'].attrs['scale_factor'] = 0.5
+            f['profile'] = np.arange(n * 3, dtype=np.float32).reshape(n, 3)
+        return reader.open_file(self.h5file)
+
+    def export(self, lat):
+        fields = collections.OrderedDict([
+            ('time', '/time'), ('latitude', '/lat'), ('longitude', '/lon'),
+            ('value', '/value'), ('profile', '/profile')])
+        return columnar.export(self.write(lat), self.root,
+                               (columnar.TAI93, fields), block_size=2)
+
+    def test_round_trip(self):
+        """
+        Values, nulls and profiles come back, partitioned and filterable.
+        """
+        import pyarrow.dataset as ds
+        self.assertEqual(self.export([-5.0, 5.0, 15.0, 25.0, 35.0]), 5)
+        self.assertTrue(os.path.isdir(os.path.join(
+            self.root, 'band=10', 'day=1993-01-03')))
+
+        table = columnar.dataset(self.root).to_table().sort_by('time')
+        self.assertEqual(table.column('value').to_pylist(),
+                         [None, 0.5, 1.0, None, 2.0])
+        self.assertEqual(table.column('band').to_pylist(),
+                         [-10, 0, 10, 20, 30])
+        profile = table.column('profile')
+        self.assertEqual(profile.type.list_size, 3)
+        self.assertEqual(profile.to_pylist()[1], [3.0, 4.0, 5.0])
+
+        d = columnar.dataset(self.root)
+        table = d.to_table(filter=(ds.field('latitude') > 10) &
+                           (ds.field('band') < 30))
+        self.assertEqual(sorted(table.column('latitude').to_pylist()),
+                         [15.0, 25.0])
+
+    def test_reexport(self):
+        """
+        Exporting a granule again leaves none of its old files behind.
+        """
+        self.export([-5.0, 5.0, 15.0, 25.0, 35.0])
+        self.assertEqual(self.export([1.0, 2.0]), 2)
+        table = columnar.dataset(self.root).to_table()
+        self.assertEqual(sorted(table.column('latitude').to_pylist()),
+                         [1.0, 2.0])
+
+
+REPACK_METADATA = """GROUP=GridStructure
+	GROUP=GRID_1
+		GridName="CMG"
+		XDim=36
+		YDim=18
+		UpperLeftPointMtrs=(-180000000.000000,90000000.000000)
+		LowerRightMtrs=(180000000.000000,-90000000.000000)
+		Projection=GCTP_GEO
+		GridOrigin=HDFE_GD_UL
+		GROUP=DataField
+			OBJECT=DataField_1
+				DataFieldName="Albedo"
+				DataType=DFNT_INT16
+				DimList=("YDim","XDim","Num_Bands")
+			END_OBJECT=DataField_1
+		END_GROUP=DataField
+	END_GROUP=GRID_1
+END_GROUP=GridStructure
+END
+"""
+
+
+class TestRepack(unittest.TestCase):
+    """
+    Exercise the repackaging of HDF-EOS2 grids.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        reader.close_all()
+        shutil.rmtree(self.tmpdir)
+
+    def test_geographic(self):
+        """
+        Values, fill and scaling survive, bands last, on CF lat/lon axes.
+        """
+        from pyhdf.SD import SD, SDC
+        hdffile = os.path.join(self.tmpdir, 'cmg.hdf')
+        raw = (np.arange(18 * 36 * 3) % 1000).astype(np.int16)
+        raw = raw.reshape(18, 36, 3)
+        raw[0, 0] = -1
+        hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+        setattr(hdf, 'StructMetadata.0', REPACK_METADATA)
+        sds = hdf.create('Albedo', SDC.INT16, raw.shape)
+        sds.scale_factor = 0.001
+        sds.add_offset = 100.0
+        sds.setfillvalue(-1)
+        sds[:] = raw
+        sds.endaccess()
+        hdf.end()
+
+        ncfile = repack.repack(hdffile, os.path.join(self.tmpdir, 'cmg.nc'),
+                               convention='modis', chunk=8)
+        f = reader.open_file(ncfile)
+        np.testing.assert_array_equal(f['Albedo'][:], raw)
+        np.testing.assert_allclose(
+            decode.decode(f['Albedo'], convention='cf'),
+            decode.decode(raw, {'scale_factor': 0.001, 'add_offset': 100.0,
+                                '_FillValue': -1}, 'modis'))
+        np.testing.assert_allclose(f['lat'][:], np.arange(85, -90, -10))
+        np.testing.assert_allclose(f['lon'][:], np.arange(-175, 180, 10))
+
+    def test_zarr_target(self):
+        """
+        A '.zarr' target is written as a Zarr store, not as NetCDF-4.
+        """
+        from pyhdf.SD import SD, SDC
+        hdffile = os.path.join(self.tmpdir, 'cmg.hdf')
+        hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+        setattr(hdf, 'StructMetadata.0', REPACK_METADATA)
+        sds = hdf.create('Albedo', SDC.INT16, (18, 36, 3))
+        sds[:] = np.zeros((18, 36, 3), dtype=np.int16)
+        sds.endaccess()
+        hdf.end()
+
+        target = os.path.join(self.tmpdir, 'cmg.zarr')
+        try:
+            import zarr
+        except ImportError:
+            # Only the Zarr backend needs zarr.
+            self.assertRaises(ImportError, repack.repack, hdffile, target)
+            self.assertEqual(os.listdir(self.tmpdir), ['cmg.hdf'])
+        else:
+            repack.repack(hdffile, target)
+            self.assertIn('Albedo', zarr.open_group(target, mode='r'))
+
+
+class TestBinning(unittest.TestCase):
+    """
+    Exercise the swath to grid binning.
+    """
+    def test_merge(self):
+        """
+        Merged partial results match brute force over all the points.
+        """
+        rs = np.random.RandomState(0)
+        lat = rs.uniform(-90, 90, 5000)
+        lon = rs.uniform(-180, 540, 5000)
+        values = np.ma.masked_array(rs.normal(size=5000),
+                                    rs.uniform(size=5000) < 0.1)
+        for bins in (binning.LatLonBins(grid.standard('trmm_0.25')),
+                     binning.EqualAreaBins(18)):
+            first = binning.Accumulator(bins)
+            first.add(lat[:3000], lon[:3000], values[:3000], chunk_size=700)
+            second = binning.Accumulator(bins)
+            second.add(lat[3000:], lon[3000:], values[3000:])
+            acc = first.merge(second)
+
+            index = bins.index(lat, lon)
+            keep = ~values.mask & (index >= 0)
+            count = np.bincount(index[keep], minlength=bins.size)
+            total = np.bincount(index[keep], values.data[keep],
+                                minlength=bins.size)
+            np.testing.assert_array_equal(acc.counts().ravel(), count)
+            np.testing.assert_allclose(acc.mean().filled(0).ravel(),
+                                       total / np.maximum(count, 1))
+            self.assertTrue(np.all(acc.mean().mask.ravel() == (count == 0)))
+
+            # Bin centers fall in their own bins.
+            clat, clon = bins.centers()
+            np.testing.assert_array_equal(
+                bins.index(np.ravel(clat), np.ravel(clon)),
+                np.arange(bins.size))
+
+
+class TestMosaic(unittest.TestCase):
+    """
+    Exercise the mosaicking of MODIS sinusoidal tiles.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        reader.close_all()
+        shutil.rmtree(self.tmpdir)
+
+    def test_window(self):
+        """
+        A strided window holds each tile's pixels in place, masked between.
+        """
+        from pyhdf.SD import SD, SDC
+        n = 6
+        tiles = [(8, 4), (9, 4), (8, 5)]
+        for h, v in tiles:
+            hdffile = os.path.join(self.tmpdir,
+                                   'MOD.A2000001.h{0:02d}v{1:02d}.hdf'.format(
+                                       h, v))
+            hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+            sds = hdf.create('field', SDC.INT32, (n, n))
+            sds.setfillvalue(-1)
+            rows = np.arange(v * n, (v + 1) * n)[:, np.newaxis]
+            sds[:] = (rows * 1000 + np.arange(h * n, (h + 1) * n)).astype(
+                np.int32)
+            sds.endaccess()
+            hdf.end()
+
+        m = mosaic.Mosaic(mosaic.find_tiles(os.path.join(self.tmpdir,
+                                                         '*.hdf')), 'field')
+        rows, cols = m.window(20, 45, -110, -85)
+        self.assertEqual(len(m.needed(rows, cols)), 15)
+        rows = slice(rows.start, rows.stop, 4)
+        data = m.read(rows, cols)
+        r = np.arange(m.shape[0])[rows][:, np.newaxis]
+        c = np.arange(m.shape[1])[cols]
+        have = np.isin((r // n) * 100 + c // n,
+                       [v * 100 + h for h, v in tiles])
+        np.testing.assert_array_equal(data.mask, ~have)
+        np.testing.assert_array_equal(data.data[have],
+                                      (r * 1000 + c)[have])
+        self.assertTrue(np.all(data.data[~have] == -1))
+
+        # The grid of a tile's window has the tile's corners.
+        g = m.grid(slice(4 * n, 5 * n), slice(8 * n, 9 * n))
+        np.testing.assert_allclose(g.upleft, (-11119505.197665,
+                                              5559752.598833))
+
+
+MISR_METADATA = """GROUP=GridStructure
+	GROUP=GRID_1
+		GridName="BlueBand"
+		XDim=2
+		YDim=6
+		Projection=GCTP_SOM
+		GROUP=DataField
+			OBJECT=DataField_1
+				DataFieldName="Blue Radiance/RDQI"
+				DataType=DFNT_UINT16
+				DimList=("SOMBlockDim","XDim","YDim")
+			END_OBJECT=DataField_1
+		END_GROUP=DataField
+	END_GROUP=GRID_1
+END_GROUP=GridStructure
+END
+"""
+
+
+class TestMisr(unittest.TestCase):
+    """
+    Exercise the stitching of MISR SOM blocks.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        reader.close_all()
+        shutil.rmtree(self.tmpdir)
+
+    def test_read(self):
+        """
+        Blocks land at their offsets, paired with their AGP blocks.
+        """
+        import pyhdf.VS
+        from pyhdf.HDF import HDF, HC
+        from pyhdf.SD import SD, SDC
+        hdffile = os.path.join(self.tmpdir, 'misr.hdf')
+        raw = np.arange(1, 49, dtype=np.uint16).reshape(4, 2, 6)
+        hdf = SD(hdffile, SDC.WRITE | SDC.CREATE)
+        setattr(hdf, 'StructMetadata.0', MISR_METADATA)
+        sds = hdf.create('Blue Radiance/RDQI', SDC.UINT16, raw.shape)
+        sds.setfillvalue(65515)
+        sds[:] = raw
+        sds.endaccess()
+        hdf.end()
+        hdf = HDF(hdffile, HC.WRITE)
+        vs = hdf.vstart()
+        vd = vs.create('_BLKSOM:BlueBand', (('AttrValues', HC.FLOAT32, 3),))
+        vd.write([[[2.0, -3.0, 1.0]]])
+        vd.detach()
+        vs.end()
+        hdf.close()
+
+        # The AGP blocks are at twice the resolution.
+        agpfile = os.path.join(self.tmpdir, 'agp.hdf')
+        hdf = SD(agpfile, SDC.WRITE | SDC.CREATE)
+        for name in misr.AGP_FIELDS:
+            sds = hdf.create(name, SDC.FLOAT64, (4, 4, 12))
+            sds[:] = np.arange(4 * 4 * 12.0).reshape(4, 4, 12)
+            sds.endaccess()
+        hdf.end()
+
+        field = 'Blue Radiance/RDQI'
+        np.testing.assert_array_equal(misr.positions(hdffile, field),
+                                      [1, 3, 0, 1])
+        data, lat, lon = misr.read(hdffile, field, slice(1, 4),
+                                   agp=agpfile)
+        self.assertEqual(data.shape, (6, 9))
+        np.testing.assert_array_equal(data[0:2, 3:9], raw[1])
+        np.testing.assert_array_equal(data[2:4, 0:6], raw[2])
+        np.testing.assert_array_equal(data[4:6, 1:7], raw[3])
+        self.assertEqual(data.count(), 36)
+        self.assertEqual(data.data[0, 0], 65515)
+        np.testing.assert_array_equal(lat[0],
+                                      [61, 61, 61, 61, 63, 65, 67, 69, 71])
+
+    def test_radiance(self):
+        """
+        Each band's scale factor is read from its own grid, and radiance and
+        RDQI are split with flags and unusable values masked.
+        """
+        import pyhdf.V
+        import pyhdf.VS
+        from pyhdf.HDF import HDF, HC
+        hdffile = os.path.join(self.tmpdir, 'misr.hdf')
+        hdf = HDF(hdffile, HC.WRITE | HC.CREATE)
+        vs = hdf.vstart()
+        v = hdf.vgstart()
+        for gridname, scale in (('BlueBand', 0.5), ('GreenBand', 0.25)):
+            grid = v.create(gridname)
+            attrs = v.create('Grid Attributes')
+            vd = vs.create('Scale factor', (('AttrValues', HC.FLOAT32, 1),))
+            vd.write([[scale]])
+            attrs.insert(vd)
+            vd.detach()
+            grid.insert(attrs)
+            attrs.detach()
+            grid.detach()
+        v.end()
+        vs.end()
+        hdf.close()
+        self.assertEqual(misr.scale_factor(hdffile, 'BlueBand'), 0.5)
+        self.assertEqual(misr.scale_factor(hdffile, 'GreenBand'), 0.25)
+        self.assertEqual(
+            misr.grid_attribute(hdffile, 'BlueBand', 'SCALE FACTOR')[0], 0.5)
+
+        raw = np.array([[100 << 2, (100 << 2) | 3],
+                        [65515, (16376 << 2) | 2]], dtype=np.uint16)
+        data, rdqi = misr.radiance(raw, 0.5, chunk_size=3)
+        self.assertEqual(data.dtype, np.float32)
+        np.testing.assert_array_equal(rdqi, [[0, 3], [3, 2]])
+        np.testing.assert_array_equal(data.mask, [[False, True],
+                                                  [True, False]])
+        np.testing.assert_array_equal(data[~data.mask], [50, 8188])
+
+
+class TestVdata(unittest.TestCase):
+    """
+    Exercise the bulk reading of vdata fields.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_read(self):
+        """
+        Records come back typed, as pyhdf reads them, for a record range.
+        """
+        import pyhdf.VS
+        from pyhdf.HDF import HDF, HC
+        hdffile = os.path.join(self.tmpdir, 'vdata.hdf')
+        hdf = HDF(hdffile, HC.WRITE | HC.CREATE)
+        vs = hdf.vstart()
+        vd = vs.create('Latitude', (('Latitude', HC.FLOAT32, 1),))
+        vd.write([[x * 0.5] for x in range(10)])
+        vd.attr('units').set(HC.CHAR8, 'degrees')
+        vd.detach()
+        vd = vs.create('Geolocation', (('Count', HC.INT16, 2),
+                                       ('Time', HC.FLOAT64, 1)))
+        vd.write([[[i, -i], i * 1.5] for i in range(6)])
+        vd.detach()
+        vs.end()
+        hdf.close()
+
+        self.assertEqual(vdata.names(hdffile), ['Geolocation', 'Latitude'])
+        lat, = vdata.read_fields(hdffile, ['Latitude'], start=2, stop=5)
+        self.assertEqual(lat.dtype, np.float32)
+        np.testing.assert_array_equal(lat, [1.0, 1.5, 2.0])
+        records = vdata.read(hdffile, 'Geolocation', start=-2)
+        np.testing.assert_array_equal(records['Count'], [[4, -4], [5, -5]])
+        np.testing.assert_array_equal(records['Time'], [6.0, 7.5])
+        self.assertEqual(vdata.attrs(hdffile, 'Latitude')['units'],
+                         'degrees')
+        with self.assertRaises(KeyError):
+            vdata.read(hdffile, 'Longitude')
+
+
+EXAMPLE_SOURCE = """
+def run(FILE_NAME):
+{0}
+
+
+if __name__ == "__main__":
+    hdffile = '{1}'
+    run(hdffile)
+"""
+
+
+class TestBatch(unittest.TestCase):
+    """
+    Exercise the batch runner on small fake examples.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.datadir = os.path.join(self.tmpdir, 'data')
+        self.outdir = os.path.join(self.tmpdir, 'out')
+        os.mkdir(self.datadir)
+        os.mkdir(self.outdir)
+        sys.path.insert(0, self.tmpdir)
+        self.modules = []
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        for name in self.modules:
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.tmpdir)
+
+    def example(self, name, body, datafile='test.hdf'):
+        """
+        Write and import an example whose run() is 'body'.
+        """
+        import importlib
+        name = 'zoo_batch_{0}'.format(name)
+        with open(os.path.join(self.tmpdir, name + '.py'), 'w') as f:
+            f.write(EXAMPLE_SOURCE.format(body, datafile))
+        self.modules.append(name)
+        return name, importlib.import_module(name)
+
+    def test_run_all(self):
+        """
+        Each example only loses its own result, and the summary has them all.
+        """
+        import json
+        import time
+        with open(os.path.join(self.datadir, 'test.hdf'), 'w') as f:
+            f.write('data')
+        selected = [
+            self.example('ok', "    import matplotlib.pyplot as plt\n"
+                               "    plt.plot([1, 2])\n"
+                               "    plt.savefig('ok.png')"),
+            self.example('failed', "    raise ValueError(FILE_NAME)"),
+            self.example('crashed', "    import os\n    os._exit(3)"),
+            self.example('timeout', "    import time\n    time.sleep(60)"),
+            self.example('missing', "    pass", datafile='absent.hdf'),
+        ]
+        start = time.time()
+        results = batch.run_all(selected, self.datadir, self.outdir, jobs=4,
+                                timeout=1)
+        self.assertEqual([r['status'] for r in results],
+                         ['ok', 'failed', 'crashed', 'timeout', 'missing'])
+        ok, failed, crashed, timeout, missing = results
+        self.assertEqual(ok['png'], [os.path.join(self.outdir, 'ok.png')])
+        self.assertTrue(os.path.exists(ok['png'][0]))
+        if batch.resource is not None:
+            self.assertGreaterEqual(ok['peak_rss'], 0)
+        self.assertEqual(ok['file'], os.path.join(self.datadir, 'test.hdf'))
+        self.assertIn('ValueError', failed['error'])
+        self.assertEqual(crashed['exitcode'], 3)
+        self.assertLess(timeout['wall_time'], 30)
+
+        summary = json.loads(json.dumps(batch.summarize(
+            results, start, time.time() - start, 4)))
+        self.assertEqual(summary['counts'], {'ok': 1, 'failed': 1,
+                                             'crashed': 1, 'timeout': 1,
+                                             'missing': 1})
+        self.assertEqual(summary['jobs'], 4)
+        self.assertEqual([r['name'] for r in summary['examples']],
+                         [name for name, _ in selected])
+
+    def test_incremental(self):
+        """
+        An example is run again only when its data, companions, source or
+        environment change, or when its images are gone.
+        """
+        for name in ('test.hdf', 'companion.hdf'):
+            with open(os.path.join(self.datadir, name), 'w') as f:
+                f.write('data')
+        name, module = self.example(
+            'incremental', "    GEO_FILE_NAME = 'companion.hdf'\n"
+                           "    import matplotlib.pyplot as plt\n"
+                           "    plt.plot([1, 2])\n"
+                           "    plt.savefig('incremental.png')")
+        # Any literal naming a file in the data directory is an input.
+        self.assertEqual(batch.input_files(module, self.datadir),
+                         [os.path.join(self.datadir, 'companion.hdf'),
+                          os.path.join(self.datadir, 'test.hdf')])
+
+        state = {}
+
+        def status():
+            result, = batch.run_all([(name, module)], self.datadir,
+                                    self.outdir, jobs=1, state=state)
+            return result['status']
+        self.assertEqual(status(), 'ok')
+        self.assertEqual(status(), 'unchanged')
+        for changed in ('test.hdf', 'companion.hdf'):
+            with open(os.path.join(self.datadir, changed), 'a') as f:
+                f.write(' changed')
+            self.assertEqual(status(), 'ok')
+            self.assertEqual(status(), 'unchanged')
+        os.remove(os.path.join(self.outdir, 'incremental.png'))
+        self.assertEqual(status(), 'ok')
+        self.assertEqual(status(), 'unchanged')
+
+        # The source, zoo.lib and the library versions are in the key too.
+        lib = [('grid.py', 'a')]
+        versions = [('numpy', '2.0')]
+        environment = (lib, versions)
+        key = batch.fingerprint(module, self.datadir, {}, environment)
+        for other in (([('grid.py', 'b')], versions),
+                      (lib, [('numpy', '2.1')])):
+            self.assertNotEqual(key, batch.fingerprint(
+                module, self.datadir, {}, other))
+        with open(module.__file__, 'a') as f:
+            f.write('# changed\n')
+        self.assertNotEqual(key, batch.fingerprint(module, self.datadir, {},
+                                                   environment))
+
+
+@unittest.skipUnless(basemap, 'Basemap is not installed')
+class TestMaps(unittest.TestCase):
+    """
+    Exercise the reuse of Basemap instances.
+    """
+    KWARGS = dict(projection='cyl', resolution='c', llcrnrlat=-90,
+                  urcrnrlat=90, llcrnrlon=-180, urcrnrlon=180)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.environ = os.environ.get('HDFEOS_ZOO_CACHE')
+        os.environ['HDFEOS_ZOO_CACHE'] = self.tmpdir
+        maps.clear()
+
+    def tearDown(self):
+        import matplotlib.pyplot as plt
+        plt.close('all')
+        maps.clear()
+        if self.environ is None:
+            del os.environ['HDFEOS_ZOO_CACHE']
+        else:
+            os.environ['HDFEOS_ZOO_CACHE'] = self.environ
+        shutil.rmtree(self.tmpdir)
+
+    def test_copies(self):
+        """
+        Drawing with one map returned leaves the next one untouched.
+        """
+        import matplotlib.pyplot as plt
+        first = maps.basemap(**self.KWARGS)
+        ax1 = plt.figure().add_subplot(111)
+        first.ax = ax1
+        first.drawcoastlines()
+        first.drawmapboundary(fill_color='aqua')
+        drawn = len(ax1.collections) + len(ax1.patches)
+
+        second = maps.basemap(**self.KWARGS)
+        self.assertIsNot(second, first)
+        self.assertIsNone(second.ax)
+        self.assertEqual(second._initialized_axes, set())
+        self.assertIsNot(second._initialized_axes, first._initialized_axes)
+        ax2 = plt.figure().add_subplot(111)
+        second.ax = ax2
+        second.drawcoastlines()
+        self.assertEqual(len(ax2.collections) + len(ax2.patches), 1)
+        self.assertEqual(len(ax1.collections) + len(ax1.patches), drawn)
+        self.assertNotIn(ax2, first._initialized_axes)
+
+    def test_persisted(self):
+        """
+        A pickled map is saved once and reloaded with the same geometry.
+        """
+        saved = maps.basemap(persist=True, **self.KWARGS)
+        pickles = os.listdir(os.path.join(self.tmpdir, 'basemap'))
+        self.assertEqual(len(pickles), 1)
+        maps.clear()
+        key = maps._key(self.KWARGS)
+        self.assertIsNotNone(maps._load(key))
+        reloaded = maps.basemap(persist=True, **self.KWARGS)
+        self.assertIsNot(reloaded, saved)
+        self.assertEqual(os.listdir(os.path.join(self.tmpdir, 'basemap')),
+                         pickles)
+        self.assertEqual(len(reloaded.coastsegs), len(saved.coastsegs))
+        np.testing.assert_allclose(reloaded(30.0, 60.0), saved(30.0, 60.0))
+
+
+class TestGeocache(unittest.TestCase):
+    """
+    Exercise the binary cache for HDF-EOS2 dumper output.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.environ = os.environ.get('HDFEOS_ZOO_CACHE')
+        os.environ['HDFEOS_ZOO_CACHE'] = os.path.join(self.tmpdir, 'cache')
+
+    def tearDown(self):
+        if self.environ is None:
+            del os.environ['HDFEOS_ZOO_CACHE']
+        else:
+            os.environ['HDFEOS_ZOO_CACHE'] = self.environ
+        shutil.rmtree(self.tmpdir)
+
+    def test_matches_genfromtxt(self):
+        """
+        The cached values are the same as np.genfromtxt gives.
+        """
+        dumpfile = os.path.join(self.tmpdir, 'lat_test.output')
+        with open(dumpfile, 'w') as f:
+            for i, value in enumerate(np.linspace(-90, 90, 12)):
+                f.write('{0!r},{1},{2}\n'.format(float(value), i // 4, i % 4))
+        expected = np.genfromtxt(dumpfile, delimiter=',', usecols=[0])
+
+        lat = geocache.load(dumpfile, (3, 4))
+        np.testing.assert_array_equal(lat.ravel(), expected)
+
+        # Second time around comes straight from the cache.
+        lat = geocache.load(dumpfile, (3, 4))
+        self.assertIsInstance(lat, np.memmap)
+        self.assertFalse(lat.flags.writeable)
+        np.testing.assert_array_equal(lat.ravel(), expected)
@@ -30,9 +30,10 @@ import os
 import h5py
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import maps, raster
+
 def run(FILE_NAME):
     
     with h5py.File(FILE_NAME, mode='r') as f:
@@ -55,14 +56,13 @@ def run(FILE_NAME):
         longitude = f['Sigma0_Data/cell_lon'][:]
 
         
-    m = Basemap(projection='cyl', resolution='l',
-                llcrnrlat=-90, urcrnrlat=90,
-                llcrnrlon=-180, urcrnrlon=180)
+    m = maps.basemap(projection='cyl', resolution='l',
+                     llcrnrlat=-90, urcrnrlat=90,
+                     llcrnrlon=-180, urcrnrlon=180)
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-90, 91, 45))
     m.drawmeridians(np.arange(-180, 180, 45), labels=[True,False,False,True])
-    m.scatter(longitude, latitude, c=data, s=1, cmap=plt.cm.jet,
-            edgecolors=None, linewidth=0)
+    raster.draw(longitude, latitude, data, m=m, cmap=plt.cm.jet)
     cb = m.colorbar(location="bottom", pad='10%')    
     cb.set_label(units)
 
@@ -0,0 +1,476 @@
+"""
+Run the zoo examples in parallel and summarize each run.
+
+Every example module is found the same way testing/test_examples.py walks
+them for TestDocstrings (center, instrument, example), and its run() is
+called on the data file named in its __main__ block, looked up in
+HDFEOS_ZOO_DIR.  Each example runs in its own process with the Agg backend,
+several at a time, so an example that fails, crashes or hangs past the
+timeout only loses its own result.  Wall time, peak resident memory and the
+PNG files written are recorded for every example in a JSON summary.  The
+peak resident memory ('peak_rss', in bytes) is how far the child's peak
+rose above what it held when it started, so it leaves out the pages of the
+runner that a forked child inherits and counts only what the example
+itself needed.
+
+Usage:
+
+    python -m zoo.batch [-j JOBS] [--timeout SECONDS] [--outdir DIR]
+                        [--summary FILE] [--profile [{time,memory}]]
+                        [--incremental] [PATTERN ...]
+
+PNG files are written to --outdir (the current directory by default), and
+only the examples whose dotted names match one of the shell-style PATTERNs,
+e.g. 'zoo.laads.*', are run if any are given.  With --profile, each run is
+also broken down into phases (reading, decoding, geolocation, Basemap,
+coastlines, plotting, savefig, ...) by zoo.lib.profiling, and the phase
+times are summed per instrument so the dominant phase of each product family
+shows.
+
+With --incremental, an example is only run again if its images are missing
+or something they depend on has changed since it last succeeded: the
+contents of the data files it names (companions such as MOD03 geolocation
+or MISR AGP files included), its own source, the zoo.lib sources or the
+versions of the libraries used.  Skipped examples are reported as
+'unchanged'.  The fingerprints are kept in .zoo_batch_state.json in the
+output directory, along with the contents digest of every data file, so a
+file is only read again when its size or modification time changes.
+"""
+import argparse
+import ast
+import fnmatch
+import glob
+import inspect
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import traceback
+
+import matplotlib
+matplotlib.use('Agg')
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+from zoo.lib import cache
+
+# Where --incremental keeps its state, in the output directory.
+STATE_FILE = '.zoo_batch_state.json'
+
+# Libraries whose versions can change the output.
+LIBRARIES = ('numpy', 'matplotlib', 'mpl_toolkits.basemap', 'pyproj',
+             'pyhdf', 'netCDF4', 'h5py', 'osgeo.gdal')
+
+
+def examples():
+    """
+    (dotted name, module) of every example, walking the zoo as TestDocstrings
+    does.
+    """
+    import zoo
+    found = []
+    for center_name, center in inspect.getmembers(zoo, inspect.ismodule):
+        if center_name in ('lib', 'batch'):
+            # Shared support code, not examples.
+            continue
+        for _, instrument in inspect.getmembers(center, inspect.ismodule):
+            for _, example in inspect.getmembers(instrument, inspect.ismodule):
+                if callable(getattr(example, 'run', None)):
+                    found.append((example.__name__, example))
+    return found
+
+
+def input_file(module):
+    """
+    The data file an example runs on, as named in its __main__ block.
+    """
+    tree = ast.parse(inspect.getsource(module))
+    for node in tree.body:
+        if isinstance(node, ast.If) and '__main__' in ast.dump(node.test):
+            for stmt in ast.walk(node):
+                if (isinstance(stmt, ast.Assign) and
+                        isinstance(stmt.value, ast.Constant) and
+                        isinstance(stmt.value.value, str)):
+                    return stmt.value.value
+    return None
+
+
+def input_files(module, datadir):
+    """
+    Every file in 'datadir' an example names anywhere in its source: its
+    data file and companions such as MOD03 or MISR AGP files.  Any string
+    literal that names a file there counts, which at worst runs an example
+    again when a file it does not read changes.
+    """
+    found = set()
+    for node in ast.walk(ast.parse(inspect.getsource(module))):
+        if (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                and node.value and '\n' not in node.value):
+            path = os.path.join(datadir, node.value)
+            if os.path.isfile(path):
+                found.add(path)
+    return sorted(found)
+
+
+def library_versions():
+    """
+    Versions of the LIBRARIES that can be imported, by name.
+    """
+    import importlib
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            module = importlib.import_module(name)
+        except Exception:
+            versions[name] = None
+            continue
+        versions[name] = str(getattr(module, '__version__', None))
+    return versions
+
+
+def lib_digests():
+    """
+    Contents digest of every zoo.lib source file, by file name.
+    """
+    libdir = os.path.dirname(cache.__file__)
+    return [(os.path.basename(path), cache.content_digest(path))
+            for path in sorted(glob.glob(os.path.join(libdir, '*.py')))]
+
+
+def file_digest(path, hashes):
+    """
+    Contents digest of a file, taken from 'hashes' (path: [size, mtime,
+    digest]) unless the file's size or modification time has changed, in
+    which case it is read again and 'hashes' updated.
+    """
+    _, size, mtime = cache.file_state(path)
+    known = hashes.get(path)
+    if known is None or known[:2] != [size, mtime]:
+        known = [size, mtime, cache.content_digest(path)]
+        hashes[path] = known
+    return known[2]
+
+
+def fingerprint(module, datadir, hashes, environment):
+    """
+    Digest of everything an example's output depends on.
+
+    'environment' stands for what all examples share, the zoo.lib sources
+    and the library versions.
+    """
+    files = [(os.path.basename(path), file_digest(path, hashes))
+             for path in input_files(module, datadir)]
+    source = cache.content_digest(inspect.getsourcefile(module))
+    return cache.digest(files, source, environment)
+
+
+def peak_rss():
+    """
+    Peak resident memory of this process in bytes, or None if unknown.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def reset_peak_rss():
+    """
+    Set the peak resident memory of this process back to what it holds now,
+    where the system allows it (Linux), so that a forked child does not
+    start with its parent's peak.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except (IOError, OSError):
+        pass
+
+
+def _worker(name, filename, outdir, conn, profile=None):
+    """
+    Run one example in a child process and send back its result.
+
+    With 'profile' set to 'time' or 'memory' the run is broken down into
+    phases by zoo.lib.profiling, with or without tracking memory.
+    """
+    import matplotlib.figure
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+    # Keep track of the images the example saves.
+    pngs = []
+    savefig = matplotlib.figure.Figure.savefig
+
+    def recording_savefig(self, fname, *args, **kwargs):
+        if isinstance(fname, str):
+            pngs.append(os.path.abspath(fname))
+        return savefig(self, fname, *args, **kwargs)
+    matplotlib.figure.Figure.savefig = recording_savefig
+
+    # Measure memory from what the child holds now, the runner's pages
+    # inherited by fork included.
+    reset_peak_rss()
+    baseline = peak_rss()
+
+    result = {'status': 'ok'}
+    start = time.time()
+    prof = None
+    try:
+        os.chdir(outdir)
+        if profile is None:
+            sys.modules[name].run(filename)
+        else:
+            from zoo.lib import profiling
+            prof = profiling.Profile(memory=(profile == 'memory'))
+            with prof:
+                sys.modules[name].run(filename)
+    except Exception:
+        result['status'] = 'failed'
+        result['error'] = traceback.format_exc()
+    finally:
+        plt.close('all')
+    if prof is not None:
+        result['profile'] = prof.report()
+    result['wall_time'] = time.time() - start
+    peak = peak_rss()
+    result['peak_rss'] = None if peak is None else peak - baseline
+    result['png'] = pngs
+    conn.send(result)
+    conn.close()
+
+
+def run_all(selected, datadir, outdir, jobs=None, timeout=600, log=None,
+            profile=None, state=None):
+    """
+    Run the (name, module) examples, 'jobs' at a time.
+
+    With a 'state' dictionary (as kept by --incremental), examples whose
+    fingerprint and output are the same as when they last succeeded are
+    not run again but reported as 'unchanged', and 'state' is updated with
+    the examples that succeed.
+
+    Returns a list of per-example result dictionaries in the order given.
+    """
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    # Fork where possible so the children start with the zoo imported.
+    if 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+    else:
+        ctx = multiprocessing.get_context()
+
+    results = {}
+    fingerprints = {}
+    if state is not None:
+        environment = (lib_digests(), sorted(library_versions().items()))
+        hashes = state.setdefault('files', {})
+        done = state.setdefault('examples', {})
+
+    def finish(name, result):
+        results[name] = result
+        if name in fingerprints:
+            if result['status'] == 'ok':
+                done[name] = {'fingerprint': fingerprints[name],
+                              'png': result['png']}
+            else:
+                done.pop(name, None)
+        if log is not None:
+            log('[{0:4d}/{1}] {2:8s} {3:8.1f} s  {4}'.format(
+                len(results), len(selected), result['status'],
+                result['wall_time'], name))
+
+    pending = []
+    for name, module in selected:
+        filename = input_file(module)
+        if filename is not None:
+            filename = os.path.join(datadir, filename)
+        if filename is None or not os.path.exists(filename):
+            finish(name, {'name': name, 'file': filename,
+                          'status': 'missing', 'wall_time': 0.0,
+                          'peak_rss': None, 'png': []})
+            continue
+        if state is not None:
+            key = fingerprint(module, datadir, hashes, environment)
+            last = done.get(name)
+            if (last is not None and last['fingerprint'] == key and
+                    last['png'] and all(os.path.exists(png)
+                                        for png in last['png'])):
+                finish(name, {'name': name, 'file': filename,
+                              'status': 'unchanged', 'wall_time': 0.0,
+                              'peak_rss': None, 'png': last['png']})
+                continue
+            fingerprints[name] = key
+        pending.append((name, filename))
+    pending.reverse()
+
+    running = {}
+    while pending or running:
+        while pending and len(running) < jobs:
+            name, filename = pending.pop()
+            receiver, sender = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_worker,
+                               args=(name, filename, outdir, sender,
+                                     profile))
+            proc.start()
+            sender.close()
+            running[receiver] = (name, filename, proc, time.time())
+
+        ready = multiprocessing.connection.wait(list(running), timeout=1.0)
+        now = time.time()
+        for receiver in list(running):
+            name, filename, proc, start = running[receiver]
+            if receiver in ready:
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    # The child died without reporting, e.g. a segfault.
+                    result = {'status': 'crashed', 'peak_rss': None,
+                              'png': [], 'wall_time': now - start}
+                proc.join()
+            elif now - start > timeout:
+                proc.terminate()
+                proc.join()
+                result = {'status': 'timeout', 'peak_rss': None, 'png': [],
+                          'wall_time': now - start}
+            else:
+                continue
+            receiver.close()
+            del running[receiver]
+            result['name'] = name
+            result['file'] = filename
+            result['exitcode'] = proc.exitcode
+            finish(name, result)
+
+    return [results[name] for name, _ in selected]
+
+
+def families(results):
+    """
+    Phase times of the profiled examples summed per product family, that is
+    per instrument package, and the phase that dominates each family.
+    """
+    found = {}
+    for result in results:
+        report = result.get('profile')
+        if report is None or result['status'] != 'ok':
+            continue
+        family = result['name'].rsplit('.', 1)[0]
+        totals = found.setdefault(family, {'examples': 0, 'total': 0.0,
+                                           'phases': {}})
+        totals['examples'] += 1
+        totals['total'] += report['total']
+        phases = dict((name, stats['time'])
+                      for name, stats in report['phases'].items())
+        phases['other'] = report['other']
+        for name, seconds in phases.items():
+            totals['phases'][name] = totals['phases'].get(name, 0.0) + seconds
+    for totals in found.values():
+        totals['dominant'] = max(totals['phases'],
+                                 key=totals['phases'].get)
+    return found
+
+
+def summarize(results, start, elapsed, jobs, profile=None):
+    """
+    The JSON summary of a batch run: when it started, how long it took, the
+    number of examples by status and the results of each, with the family
+    totals if the runs were profiled.
+    """
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    summary = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S',
+                                 time.localtime(start)),
+        'wall_time': elapsed,
+        'jobs': jobs,
+        'counts': counts,
+        'examples': results,
+    }
+    if profile:
+        summary['families'] = families(results)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m zoo.batch',
+        description='Run the zoo examples in parallel.')
+    parser.add_argument('patterns', nargs='*', metavar='PATTERN',
+                        help="only run examples matching, e.g. 'zoo.laads.*'")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='examples run at a time (default: CPU count)')
+    parser.add_argument('--timeout', type=float, default=600,
+                        help='seconds allowed per example (default: 600)')
+    parser.add_argument('--datadir', default=os.environ.get('HDFEOS_ZOO_DIR',
+                                                            '.'),
+                        help='data files (default: $HDFEOS_ZOO_DIR)')
+    parser.add_argument('--outdir', default='.',
+                        help='where PNG files are written')
+    parser.add_argument('--summary', default='batch.json',
+                        help='JSON summary file (default: batch.json)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only run examples whose inputs, source or '
+                             'libraries changed since they last succeeded')
+    parser.add_argument('--profile', nargs='?', const='time',
+                        choices=('time', 'memory'),
+                        help='break each run down into phases, timing them '
+                             "and, with 'memory', tracking allocations")
+    args = parser.parse_args(argv)
+
+    selected = examples()
+    if args.patterns:
+        selected = [(name, module) for name, module in selected
+                    if any(fnmatch.fnmatch(name, p) for p in args.patterns)]
+    outdir = os.path.abspath(args.outdir)
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+
+    def log(line):
+        print(line)
+        sys.stdout.flush()
+
+    state = None
+    statefile = os.path.join(outdir, STATE_FILE)
+    if args.incremental:
+        state = {}
+        if os.path.exists(statefile):
+            with open(statefile) as f:
+                state = json.load(f)
+
+    start = time.time()
+    results = run_all(selected, os.path.abspath(args.datadir), outdir,
+                      jobs=args.jobs, timeout=args.timeout, log=log,
+                      profile=args.profile, state=state)
+    elapsed = time.time() - start
+
+    if state is not None:
+        tmpfile = '{0}.{1}.tmp'.format(statefile, os.getpid())
+        with open(tmpfile, 'w') as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmpfile, statefile)
+
+    summary = summarize(results, start, elapsed,
+                        args.jobs or multiprocessing.cpu_count(),
+                        profile=args.profile)
+    with open(args.summary, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print('{0} examples in {1:.1f} s: {2}'.format(
+        len(results), elapsed,
+        ', '.join('{0} {1}'.format(n, s)
+                  for s, n in sorted(summary['counts'].items()))))
+    bad = [r for r in results if r['status'] in ('failed', 'crashed',
+                                                   'timeout')]
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,6 +28,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid
+
 USE_NETCDF4 = True
 
 def run(FILE_NAME):
@@ -64,10 +66,9 @@ def run(FILE_NAME):
             data = np.ma.masked_array(data, np.isnan(data))
 
     # The projection is GEO, so we can construct the lat/lon arrays ourselves.
-    scaleX = 360.0 / data.shape[1]
-    scaleY = 180.0 / data.shape[0]
-    longitude = np.arange(data.shape[1]) * scaleX - 180 + scaleX/2
-    latitude = np.arange(data.shape[0]) * scaleY - 90 + scaleY/2
+    # It is global and equal-angle, from -90 to 90.
+    latitude, longitude = grid.equal_angle(*data.shape,
+                                           origin='HDFE_GD_LL').axes()
 
     # Draw an equidistant cylindrical projection using the low resolution
     # coastline database.
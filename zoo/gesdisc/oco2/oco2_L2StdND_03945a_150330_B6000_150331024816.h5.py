@@ -28,6 +28,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import raster
+
 def run(FILE_NAME):
     
     with h5py.File(FILE_NAME, mode='r') as f:
@@ -47,8 +49,7 @@ def run(FILE_NAME):
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-90, 91, 45))
     m.drawmeridians(np.arange(-180, 180, 45), labels=[True,False,False,True])
-    m.scatter(longitude, latitude, c=data, s=1, cmap=plt.cm.jet,
-            edgecolors=None, linewidth=0)
+    raster.draw(longitude, latitude, data, m=m, cmap=plt.cm.jet)
     # cb = m.colorbar(orientation='horizontal', format='%.1e')
     cb = m.colorbar(location="bottom", format='%.1e', pad='10%')
     cb.set_label(units)
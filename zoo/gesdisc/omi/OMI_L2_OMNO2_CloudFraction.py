@@ -24,9 +24,10 @@ import os
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import decode, maps
+
 USE_NETCDF4 = True
 
 def run(FILE_NAME):
@@ -46,7 +47,7 @@ def run(FILE_NAME):
         # to a masked array ourselves.
         var.set_auto_maskandscale(False)
 
-        data = var[:].astype(np.float64)
+        data = var[:]
     
         # Retrieve any attributes that may be needed later.
         scale = var.ScaleFactor
@@ -68,7 +69,7 @@ def run(FILE_NAME):
         DATAFIELD_NAME = path + 'CloudFraction'
         with h5py.File(FILE_NAME, mode='r') as f:
             dset = f[DATAFIELD_NAME]
-            data =dset[:].astype(np.float64)
+            data = dset[:]
 
             # Retrieve any attributes that may be needed later.
             # String attributes actually come in as the bytes type and should
@@ -85,16 +86,14 @@ def run(FILE_NAME):
             latitude = f[path + 'Latitude'][:]
             longitude = f[path + 'Longitude'][:]
 
-    data[data == missing_value] = np.nan
-    data[data == fill_value] = np.nan
-    data = scale * (data - offset)
-    datam = np.ma.masked_where(np.isnan(data), data)
+    datam = decode.decode(data, convention='omi', scale=scale, offset=offset,
+                          fill=[missing_value, fill_value])
 
     # Draw an equidistant cylindrical projection using the low resolution
     # coastline database.
-    m = Basemap(projection='cyl', resolution='l',
-                llcrnrlat=-90, urcrnrlat = 90,
-                llcrnrlon=-180, urcrnrlon = 180)
+    m = maps.basemap(projection='cyl', resolution='l',
+                     llcrnrlat=-90, urcrnrlat = 90,
+                     llcrnrlon=-180, urcrnrlon = 180)
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-90., 120., 30.), labels=[1, 0, 0, 0])
     m.drawmeridians(np.arange(-180, 180., 45.), labels=[0, 0, 0, 1])
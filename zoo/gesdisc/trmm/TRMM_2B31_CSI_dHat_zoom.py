@@ -26,9 +26,10 @@ import os
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import maps
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -74,9 +75,9 @@ def run(FILE_NAME):
     
     # Draw an equidistant cylindrical projection using the high resolution
     # coastline database.
-    m = Basemap(projection='cyl', resolution='h',
-                llcrnrlat=30, urcrnrlat = 36,
-                llcrnrlon=121, urcrnrlon = 133)
+    m = maps.basemap(projection='cyl', resolution='h',
+                     llcrnrlat=30, urcrnrlat = 36,
+                     llcrnrlon=121, urcrnrlon = 133)
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(30, 37), labels=[1, 0, 0, 0])
     m.drawmeridians(np.arange(121, 133, 2), labels=[0, 0, 0, 1])
@@ -29,6 +29,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -56,8 +58,7 @@ def run(FILE_NAME):
     # The lat and lon should be calculated manually.
     # More information can be found at:
     # http://disc.sci.gsfc.nasa.gov/additional/faq/precipitation_faq.shtml#lat_lon
-    latitude = np.arange(-49.875, 49.875, 0.249375)
-    longitude = np.arange(-179.875, 179.876, 0.25)
+    latitude, longitude = grid.standard('trmm_0.25').axes()
     
     # Draw an equidistant cylindrical projection using the low resolution
     # coastline database.
@@ -29,6 +29,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -55,9 +57,7 @@ def run(FILE_NAME):
     # The lat and lon should be calculated manually.
     # More information can be found at:
     # http://disc.sci.gsfc.nasa.gov/additional/faq/precipitation_faq.shtml#lat_lon
-    lat1d = np.arange(-49.875, 49.875, 0.249375)
-    lon1d = np.arange(-179.875, 179.876, 0.25)
-    longitude, latitude = np.meshgrid(lon1d, lat1d)
+    latitude, longitude = grid.standard('trmm_0.25').latlon()
     
     # Draw an equidistant cylindrical projection using the low resolution
     # coastline database.
@@ -25,39 +25,35 @@ import os
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
-import h5py
+
+from zoo.lib import mabel, reader
 
 def run(FILE_NAME):
-    with h5py.File(FILE_NAME, mode='r') as f:
-    
-        latvar = f['/photon/channel001/latitude']
-        latitude = latvar[:]
-        
-        lonvar = f['/photon/channel001/longitude']
-        longitude = lonvar[:]
-    
-        elevvar = f['/photon/channel001/elev']
-        elev = elevvar[:]
-        units = elevvar.attrs['units']
-    
-        timevar = f['/photon/channel001/delta_time']
-        time = timevar[:]
-            
-    # Just use a small subset.
-    n = time.size
-    step = np.ceil(n / 100)
-    idx = slice(0, n, step+1)
-
-    # Make a split window plot.  First plot is time vs. elevation
+    CHANNEL = 'channel001'
+
+    # Summarize the photons along track in 1 second segments, reading them
+    # a chunk at a time, so the channel is never held in memory whole.
+    f = reader.open_file(FILE_NAME)
+    segments = mabel.segments(f, CHANNEL, seconds=1.0)
+    units = mabel.field(f, CHANNEL, 'elev').attrs['units']
+    latitude = segments['latitude']
+    longitude = segments['longitude']
+    elev = segments['elev']
+
+    # Make a split window plot.  First plot is time vs. elevation, the
+    # median of each segment within the 10th to 90th percentiles.
     fig = plt.figure(figsize = (10, 15))
     ax1 = plt.subplot(3, 1, 1)
-    elapsed_time = (time - time[0])
-    ax1.plot(elapsed_time[idx], elev[idx], 'b-*')
+    elapsed_time = segments['delta_time'] - segments['delta_time'][0]
+    low, median, high = [mabel.PERCENTILES.index(p) for p in (10, 50, 90)]
+    ax1.fill_between(elapsed_time, elev[:, low], elev[:, high],
+                     color='lightblue')
+    ax1.plot(elapsed_time, elev[:, median], 'b-')
     ax1.set_xlabel('Elapsed Time (seconds)')
     ax1.set_ylabel(units)
 
     basename = os.path.basename(FILE_NAME)
-    longname = '100 sample points of channel001'
+    longname = 'Elevation of {0} in 1 s segments'.format(CHANNEL)
     
     ax1.set_title('{0}\n{1}'.format(basename, longname))
 
@@ -86,7 +82,7 @@ def run(FILE_NAME):
                     labels=[True,False,False,True])
     m.drawmeridians(np.arange(lonmin, lonmax, (lonmax-lonmin)/3),
                     labels=[True,False,False,True])    
-    m.plot(longitude[idx], latitude[idx], linestyle='None', marker='.',
+    m.plot(longitude, latitude, linestyle='None', marker='.',
             color='blue', latlon=True)
     plt.text(longitude[0], latitude[0], '+', color='red')
     plt.title('Trajectory of Flight Path')
@@ -29,11 +29,11 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import decode, swath
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
-    GEO_FILE_NAME = 'MOD03.A2010001.0000.005.2010003235220.hdf'
-    GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], GEO_FILE_NAME)
     DATAFIELD_NAME = 'Cloud_Optical_Thickness'
     if USE_NETCDF4:    
         from netCDF4 import Dataset
@@ -47,9 +47,12 @@ def run(FILE_NAME):
         # We'll turn autoscaling off in order to correctly scale the data.
         # Also need to subset the data to match the lat/lon dimensions.
         var.set_auto_maskandscale(False)
-        data = var.astype(np.double)
+        data = var[:]
 
         # Retrieve the geolocation data from MOD03 product.
+        GEO_FILE_NAME = 'MOD03.A2010001.0000.005.2010003235220.hdf'
+        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'],
+                                     GEO_FILE_NAME)
         nc_geo = Dataset(GEO_FILE_NAME)
         longitude = nc_geo.variables['Longitude'][:]
         latitude = nc_geo.variables['Latitude'][:]
@@ -70,15 +73,13 @@ def run(FILE_NAME):
 
         # Read dataset.
         data2D = hdf.select(DATAFIELD_NAME)
-        data = data2D[:,:].astype(np.double)
-
-        hdf_geo = SD(GEO_FILE_NAME, SDC.READ)
+        data = data2D[:,:]
 
-        # Read geolocation dataset from MOD03 product.
-        lat = hdf_geo.select('Latitude')
-        latitude = lat[:,:]
-        lon = hdf_geo.select('Longitude')
-        longitude = lon[:,:]
+        # Interpolate the 5-km geolocation stored in the file to the 1-km
+        # data, using the dimension maps in StructMetadata.  There are 10
+        # lines of 1-km data per scan.
+        geo = swath.from_file(FILE_NAME, DATAFIELD_NAME, scan_lines=10)
+        latitude, longitude = geo.latlon()
         
         # Retrieve attributes.
         attrs = data2D.attributes(full=1)
@@ -96,12 +97,11 @@ def run(FILE_NAME):
         ua=attrs["units"]
         units = ua[0]
 
-    invalid = np.logical_or(data > valid_max,
-                            data < valid_min)
-    invalid = np.logical_or(invalid, data == _FillValue)
-    data[invalid] = np.nan
-    data = (data - add_offset) * scale_factor 
-    data = np.ma.masked_array(data, np.isnan(data))
+    # Mask fill values and values out of range, and apply the MODIS scaling
+    # equation, (data - add_offset) * scale_factor.
+    data = decode.decode(data, convention='modis', scale=scale_factor,
+                         offset=add_offset, fill=_FillValue,
+                         valid_range=(valid_min, valid_max))
     
     
     # Render the plot in a south plar stereographic projection.
@@ -28,11 +28,11 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import swath
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
-    GEO_FILE_NAME = 'MOD03.A2000055.0000.005.2010029175839.hdf'
-    GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], GEO_FILE_NAME)
     DATAFIELD_NAME = 'EV_Band26'
 
     if USE_NETCDF4:    
@@ -47,6 +47,9 @@ def run(FILE_NAME):
         data = var[:,:].astype(np.double)
 
         # Retrieve the geolocation data from MOD03 product.
+        GEO_FILE_NAME = 'MOD03.A2000055.0000.005.2010029175839.hdf'
+        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'],
+                                     GEO_FILE_NAME)
         nc_geo = Dataset(GEO_FILE_NAME)
         longitude = nc_geo.variables['Longitude'][:]
         latitude = nc_geo.variables['Latitude'][:]
@@ -68,13 +71,11 @@ def run(FILE_NAME):
         data2D = hdf.select(DATAFIELD_NAME)
         data = data2D[:,:].astype(np.double)
 
-        hdf_geo = SD(GEO_FILE_NAME, SDC.READ)
-
-        # Read geolocation dataset from MOD03 product.
-        lat = hdf_geo.select('Latitude')
-        latitude = lat[:,:]
-        lon = hdf_geo.select('Longitude')
-        longitude = lon[:,:]
+        # Interpolate the 5-km geolocation stored in the file to the 1-km
+        # data, using the dimension maps in StructMetadata.  There are 10
+        # lines of 1-km data per scan.
+        geo = swath.from_file(FILE_NAME, DATAFIELD_NAME, scan_lines=10)
+        latitude, longitude = geo.latlon()
         
         # Retrieve attributes.
         attrs = data2D.attributes(full=1)
@@ -30,6 +30,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import decode, lod, reader, swath
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -41,31 +43,7 @@ def run(FILE_NAME):
         from netCDF4 import Dataset    
         nc = Dataset(FILE_NAME)
 
-        # The following method doesn't rely on HDF-EOS2 dumper outputs and
-        # plots at the half resolution form the original.
-        #
-        # Just read the first level, and subset the data to match the lat/lon
-        # resolution.
-        # data = nc.variables[DATAFIELD_NAME][0,::2,::2].astype(np.float64)
-        # Retrieve geo-location datasets.
-        # latitude = nc.variables['Latitude'][:]
-        # longitude = nc.variables['Longitude'][:]
-
-
-        data = nc.variables[DATAFIELD_NAME][0,:,:].astype(np.float64)
-
-        # Read geolocation dataset from HDF-EOS2 dumper output.
-        GEO_FILE_NAME = 'lat_MYD02HKM.A2010031.0035.005.2010031183706.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                     GEO_FILE_NAME)
-        latitude = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        latitude = latitude.reshape(data.shape)
-
-        GEO_FILE_NAME = 'lon_MYD02HKM.A2010031.0035.005.2010031183706.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                     GEO_FILE_NAME)
-        longitude = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        longitude = longitude.reshape(data.shape)
+        field = nc.variables[DATAFIELD_NAME]
 
         units = nc.variables[DATAFIELD_NAME].reflectance_units
         long_name = nc.variables[DATAFIELD_NAME].long_name
@@ -88,34 +66,7 @@ def run(FILE_NAME):
 
         # Read dataset.
         data3D = hdf.select(DATAFIELD_NAME)
-
-        # The following method doesn't rely on HDF-EOS2 dumper outputs and
-        # plots at the half resolution form the original.
-        #
-        # Just read the first level, and subset the data to match the lat/lon
-        # resolution.
-        # data = data3D[0,::2,::2].astype(np.double)
-        # lat = hdf.select('Latitude')
-        # latitude = lat[:,:]
-        # lon = hdf.select('Longitude')
-        # longitude = lon[:,:]
-
-
-        data = data3D[0,:,:].astype(np.double)
-
-        # Read geolocation dataset from HDF-EOS2 dumper output.
-        GEO_FILE_NAME = 'lat_MYD02HKM.A2010031.0035.005.2010031183706.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                     GEO_FILE_NAME)
-        latitude = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        latitude = latitude.reshape(data.shape)
-
-        GEO_FILE_NAME = 'lon_MYD02HKM.A2010031.0035.005.2010031183706.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                      GEO_FILE_NAME)
-        longitude = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        longitude = longitude.reshape(data.shape)
-
+        field = reader.open_file(FILE_NAME)[DATAFIELD_NAME]
 
         # Retrieve attributes.
         attrs = data3D.attributes(full=1)
@@ -138,19 +89,22 @@ def run(FILE_NAME):
         dimname = dim.info()[0]
 
 
-    invalid = np.logical_or(data > valid_max,
-                            data < valid_min)
-    invalid = np.logical_or(invalid, data == _FillValue)
-    data[invalid] = np.nan
-    data = scale_factor * (data - add_offset)
-    data = np.ma.masked_array(data, np.isnan(data))
+    attrs = {'scale_factor': scale_factor, 'add_offset': add_offset,
+             '_FillValue': _FillValue, 'valid_range': [valid_min, valid_max]}
+    def apply_attrs(raw):
+        return decode.decode(raw, attrs, 'modis')
+
+    # Read the first band at the resolution of the figure, averaging blocks
+    # of pixels, rather than plotting every pixel.  Otherwise, you will notice
+    # that some regions are not plotted on Mac OS X.
+    data, rows, cols = lod.read(field, method='mean', decode=apply_attrs,
+                                plane=(0, slice(None), slice(None)))
 
-    # Subsample data. Otherwise, you will notice that some regions are not
-    # plotted on Mac OS X. I suspect that it is a Python's map plot
-    # or system's limilt.
-    data = data[::2, ::2]
-    latitude = latitude[::2, ::2]
-    longitude = longitude[::2, ::2]
+    # Interpolate the 1-km geolocation stored in the file to the 500-m data,
+    # using the dimension maps in StructMetadata, but only at the block
+    # centers.  There are 20 lines of 500-m data per scan.
+    geo = swath.from_file(FILE_NAME, DATAFIELD_NAME, scan_lines=20)
+    latitude, longitude = geo.latlon(rows, cols)
     
     # Use a hemispherical projection for the southern hemisphere since the
     # swath is over Antarctica.
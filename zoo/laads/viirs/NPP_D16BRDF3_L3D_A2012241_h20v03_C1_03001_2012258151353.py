@@ -21,15 +21,15 @@ specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import re
 
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid, proj
+
 USE_GDAL = False
 
 def run(FILE_NAME):
@@ -56,13 +56,11 @@ def run(FILE_NAME):
         # Construct the grid.
         x = np.linspace(x0, x0 + xinc*nx, nx)
         y = np.linspace(y0, y0 + yinc*ny, ny)
-        xv, yv = np.meshgrid(x, y)
 
         # In basemap, the sinusoidal projection is global, so we won't use it.
         # Instead we'll convert the grid back to lat/lons.
-        sinu = pyproj.Proj("+proj=sinu +R=6371007.181 +nadgrids=@null +wktext")
-        wgs84 = pyproj.Proj("+init=EPSG:4326") 
-        lon, lat= pyproj.transform(sinu, wgs84, xv, yv)
+        lon, lat = proj.transform(proj.SINUSOIDAL,
+                                  x[np.newaxis, :], y[:, np.newaxis])
 
         # Read fill value, valid range, scale factor, add_offset attributes.
         meta = gdset.GetMetadata()
@@ -86,18 +84,9 @@ def run(FILE_NAME):
         data = data2D[:,:].astype(np.double)
 
 
-        # Read geolocation dataset from HDF-EOS2 dumper output.
-        GEO_FILE_NAME = 'lat_NPP_D16BRDF3_L3D.A2012241.h20v03.C1_03001.2012258151353.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                     GEO_FILE_NAME)
-        lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lat = lat.reshape(data.shape)
-
-        GEO_FILE_NAME = 'lon_NPP_D16BRDF3_L3D.A2012241.h20v03.C1_03001.2012258151353.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                      GEO_FILE_NAME)
-        lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lon = lon.reshape(data.shape)
+        # Construct the grid.  The needed information is in a global attribute
+        # called 'StructMetadata.0'.
+        lat, lon = grid.from_file(FILE_NAME, 'NPP_Grid_BRDF').latlon()
 
         # Read attributes
         attrs = data2D.attributes(full=1)
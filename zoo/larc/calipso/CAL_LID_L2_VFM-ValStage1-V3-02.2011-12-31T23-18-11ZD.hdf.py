@@ -21,11 +21,11 @@ or in a directory specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
 from mpl_toolkits.basemap import Basemap
-from matplotlib import colors
+
+from zoo.lib import reader, track
 
 USE_NETCDF4 = False
 
@@ -34,44 +34,21 @@ def run(FILE_NAME):
     # Identify the data field.
     DATAFIELD_NAME = 'Feature_Classification_Flags'
 
-    if USE_NETCDF4:
-        from netCDF4 import Dataset
-        nc = Dataset(FILE_NAME)
-    
-        # Subset the data to match the size of the swath geolocation fields.
-        # Turn off autoscaling, we'll handle that ourselves due to presence of
-        # a valid range.
-        var = nc.variables[DATAFIELD_NAME]
-        data = var[:,1256]
-
-        # Read geolocation datasets.
-        lat = nc.variables['Latitude'][:]
-        lon = nc.variables['Longitude'][:]
-    else:
-        from pyhdf.SD import SD, SDC
-        hdf = SD(FILE_NAME, SDC.READ)
-        
-        # Read dataset.
-        data2D = hdf.select(DATAFIELD_NAME)
-        data = data2D[:,1256]
-
-        # Read geolocation datasets.
-        latitude = hdf.select('Latitude')
-        lat = latitude[:]
-        longitude = hdf.select('Longitude')
-        lon = longitude[:]
-
-
-    # Subset data. Otherwise, all points look black.
-    lat = lat[::10]
-    lon = lon[::10]
-    data = data[::10]
+    # Open the file with pyhdf, or netCDF4 if asked to.
+    f = reader.open_file(FILE_NAME, 'netcdf4' if USE_NETCDF4 else None)
+
+    # Read the 2500m altitude bin of every profile, and the matching
+    # geolocation.
+    data = f[DATAFIELD_NAME][:, 1256]
+    lat = f['Latitude'][:]
+    lon = f['Longitude'][:]
 
     # Extract Feature Type only through bitmask.
     data = data & 7
 
-    # Make a color map of fixed colors.
-    cmap = colors.ListedColormap(['black', 'blue', 'yellow', 'green', 'red', 'purple', 'gray', 'white']) 
+    # One fixed color per feature type.
+    feature_colors = ['black', 'blue', 'yellow', 'green', 'red', 'purple',
+                      'gray', 'white']
     # The data is global, so render in a global projection.
     m = Basemap(projection='cyl', resolution='l',
                 llcrnrlat=-90, urcrnrlat=90,
@@ -80,10 +57,9 @@ def run(FILE_NAME):
     m.drawparallels(np.arange(-90.,90,45))
     m.drawmeridians(np.arange(-180.,180,45), labels=[True,False,False,True])
     x,y = m(lon, lat)
-    i = 0
-    for feature in data:
-        m.plot(x[i], y[i], 'o', color=cmap(feature),  markersize=3)
-        i = i+1
+
+    # Draw all profiles at once; pass e.g. stride=10 to thin them out.
+    pts = track.draw(x, y, data, feature_colors, ax=plt.gca(), markersize=3)
 
 
     long_name = 'Feature Type at Altitude = 2500m'
@@ -92,15 +68,10 @@ def run(FILE_NAME):
 
     fig = plt.gcf()
 
-    # define the bins and normalize
-    bounds = np.linspace(0,8,9)
-    norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
-
     # create a second axes for the colorbar
     ax2 = fig.add_axes([0.93, 0.2, 0.01, 0.6])
-    cb = mpl.colorbar.ColorbarBase(ax2, cmap=cmap, norm=norm, spacing='proportional', ticks=bounds, boundaries=bounds, format='%1i')
-
-    cb.ax.set_yticklabels(['invalid', 'clear', 'cloud', 'aerosol', 'strato', 'surface', 'subsurf', 'no signal'], fontsize=5)
+    track.colorbar(pts, ['invalid', 'clear', 'cloud', 'aerosol', 'strato',
+                         'surface', 'subsurf', 'no signal'], cax=ax2)
 
     # plt.show()
     pngfile = "{0}.py.png".format(basename)
@@ -21,102 +21,45 @@ or in a directory specified by the environment variable HDFEOS_ZOO_DIR.
 """
 import os
 
-import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
-from mpl_toolkits.basemap import Basemap
 from matplotlib import colors
 
+from zoo.lib import reader, vfm
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
-    # Identify the data field.
-    DATAFIELD_NAME = 'Feature_Classification_Flags'
-
-    if USE_NETCDF4:
-        from netCDF4 import Dataset
-        nc = Dataset(FILE_NAME)
-
-    
-        # Subset the data to match the size of the swath geolocation fields.
-        # Turn off autoscaling, we'll handle that ourselves due to presence of
-        # a valid range.
-        var = nc.variables[DATAFIELD_NAME]
-        data = var[:,:]
-        print data.shape
-
-        # Read geolocation datasets.
-        lat = nc.variables['Latitude'][:]
-
-        lat = np.squeeze(lat)
-        print lat.shape
-    else:
-        from pyhdf.SD import SD, SDC
-        hdf = SD(FILE_NAME, SDC.READ)
-        
-        # Read dataset.
-        data2D = hdf.select(DATAFIELD_NAME)
-        data = data2D[:,:]
-
-        # Read geolocation datasets.
-        latitude = hdf.select('Latitude')
-        lat = latitude[:]
-        
-
-    # Extract Feature Type only (1-3 bits) through bitmask.
-    data = data & 7
-
-    # Subset latitude values for the region of interest (40N to 62N).
-    # See the output of CAL_LID_L2_VFM-ValStage1-V3-02.2011-12-31T23-18-11ZD.hdf.py example.
-    lat = lat[3500:4000]
-    size = lat.shape[0]
-    
-    # You can visualize other blocks by changing subset parameters.
-    #  data2d = data[3500:3999, 0:164]    # 20.2km to 30.1km
-    #  data2d = data[3500:3999, 165:1164] #  8.2km to 20.2km
-
-    # data2d = data[3500:4000, 1165:]  # -0.5km to  8.2km
-    data2d = data[3500:4000, 1165:]  # -0.5km to  8.2km
-    data3d = np.reshape(data2d, (size, 15, 290))
-    data = data3d[:,0,:]
-
-    # Focus on cloud (=2) data only.
-    data[data > 2] = 0;
-    data[data < 2] = 0;
-    data[data == 2] = 1;
-
-    # Generate altitude data according to file specification [1].
-    alt = np.zeros(290)
-
-    # You can visualize other blocks by changing subset parameters.
-    #  20.2km to 30.1km
-    # for i in range (0, 54):
-    #       alt[i] = 20.2 + i*0.18;
-
-    #  8.2km to 20.2km
-    # for i in range (0, 199):
-    #       alt[i] = 8.2 + i*0.06;
-
-    # -0.5km to 8.2km
-    for i in range (0, 289):
-          alt[i] = -0.5 + i*0.03
-
-      
-    # Contour the data on a grid of longitude vs. pressure
-    latitude, altitude = np.meshgrid(lat, alt)
-
-
-    # Make a color map of fixed colors.
-    cmap = colors.ListedColormap(['white', 'blue', 'blue'])
-
-    # Define the bins and normalize.
-    bounds = np.linspace(0,2,3)
-    norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
 
+    # Open the file with pyhdf, or netCDF4 if asked to.
+    f = reader.open_file(FILE_NAME, 'netcdf4' if USE_NETCDF4 else None)
+
+    # Subset records for the region of interest (40N to 62N).  See the output
+    # of CAL_LID_L2_VFM-ValStage1-V3-02.2011-12-31T23-18-11ZD.hdf.py example.
+    # Leave out 'stop' to decode the whole granule.
+    start, stop = 3500, 4000
+
+    # Latitude is given at the center of each record of 15 profiles; take it
+    # at the edges between the profiles so the chunks meet edge to edge.
+    lat = vfm.profile_edges(f['Latitude'][start:stop])
+
+    # Make a color map of fixed colors, focusing on cloud (=2) data only.
+    cmap = colors.ListedColormap(['white', 'blue'])
+    norm = colors.BoundaryNorm([0, 0.5, 1], cmap.N)
+
+    # Decode all three altitude regimes, 500 records at a time, into curtains
+    # of 30 m bins from 30.1 km down to -0.5 km.
+    for profiles, curtain in vfm.curtains(f, ('type',), start, stop):
+        cloud = (curtain['type'] == 2).astype(np.uint8)
+        first = profiles.start - start * vfm.PROFILES
+        last = profiles.stop - start * vfm.PROFILES
+        plt.imshow(cloud.T, cmap=cmap, norm=norm, aspect='auto',
+                   interpolation='nearest',
+                   extent=[lat[first], lat[last], -0.5, vfm.TOP])
+    plt.xlim(lat[0], lat[-1])
 
     long_name = 'Feature Type (Bits 1-3) in Feature Classification Flag'
     basename = os.path.basename(FILE_NAME)
-    plt.contourf(latitude, altitude, np.rot90(data,3), cmap=cmap)
     plt.title('{0}\n{1}'.format(basename, long_name))
     plt.xlabel('Latitude (degrees north)')
     plt.ylabel('Altitude (km)')
@@ -125,8 +68,8 @@ def run(FILE_NAME):
 
     # Create a second axes for the discrete colorbar.
     ax2 = fig.add_axes([0.93, 0.2, 0.01, 0.6])
-    cb = mpl.colorbar.ColorbarBase(ax2, cmap=cmap, boundaries=bounds)
-    cb.ax.set_yticklabels(['Others','', 'Cloud'], fontsize=8)
+    cb = plt.colorbar(cax=ax2, ticks=[0.25, 0.75])
+    cb.ax.set_yticklabels(['Others', 'Cloud'], fontsize=8)
 
     # plt.show()
     pngfile = "{0}.v.py.png".format(basename)
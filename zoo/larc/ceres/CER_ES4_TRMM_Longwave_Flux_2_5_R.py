@@ -35,6 +35,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -67,16 +69,8 @@ def run(FILE_NAME):
     # sample image by NASA [2] for details.
     # The fillvalue is 3.4028235E38. Here, we use max value from the dataset.
     units = 'Watts/Meter^2'
-    ysize, xsize = data.shape
-    xinc = 360.0 / xsize
-    yinc = 180.0 / ysize
-    x0, x1 = (-180, 180)
-    y0, y1 = (-90, 90)
-    longitude = np.linspace(x0 + xinc/2, x1 - xinc/2, xsize)
-    latitude = np.linspace(y0 + yinc/2, y1 - yinc/2, ysize)
-    
-    # Flip the latitude to run from 90 to -90
-    latitude = latitude[::-1]
+    # The grid is global and equal-angle, from 90 to -90.
+    latitude, longitude = grid.equal_angle(*data.shape).axes()
     
     # The data is global, so render in a global projection.
     m = Basemap(projection='cyl', resolution='l',
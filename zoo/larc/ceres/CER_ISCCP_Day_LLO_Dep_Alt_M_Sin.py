@@ -32,6 +32,8 @@ from mpl_toolkits.basemap import Basemap
 
 import numpy as np
 
+from zoo.lib import grid
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -70,17 +72,8 @@ def run(FILE_NAME):
 
     # The normal grid information is not present.  We have to generate the geo-
     # location data, see [1] for details.
-    ysize, xsize = data.shape
-    xinc = 360.0 / xsize
-    yinc = 180.0 / ysize
-    x0, x1 = (-180, 180)
-    y0, y1 = (-90, 90)
-    lon = np.linspace(x0 + xinc/2, x1 - xinc/2, xsize)
-    lat = np.linspace(y0 + yinc/2, y1 - yinc/2, ysize)
-
-    # Flip the latitude to run from 90 to -90.
-    lat = lat[::-1]
-    longitude, latitude = np.meshgrid(lon, lat)
+    # The grid is global and equal-angle, from 90 to -90.
+    latitude, longitude = grid.equal_angle(*data.shape).latlon()
     
     # The data is global, so render in a global projection.
     m = Basemap(projection='sinu', resolution='l', lon_0=0)
@@ -27,6 +27,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -67,16 +69,8 @@ def run(FILE_NAME):
     datam = np.ma.masked_array(data, mask=np.isnan(data))
 
     # The lat and lon should be calculated following [1].
-    ysize, xsize = data.shape
-    xinc = 360.0 / xsize
-    yinc = 180.0 / ysize
-    x0, x1 = (-180, 180)
-    y0, y1 = (-90, 90)
-    lon = np.linspace(x0 + xinc/2, x1 - xinc/2, xsize)
-    lat = np.linspace(y0 + yinc/2, y1 - yinc/2, ysize)
-    # Flip the latitude to run from 90 to -90.
-    lat = lat[::-1]
-    longitude, latitude = np.meshgrid(lon, lat)
+    # The grid is global and equal-angle, from 90 to -90.
+    latitude, longitude = grid.equal_angle(*data.shape).latlon()
     
     # The data is global, so render in a global projection.
     m = Basemap(projection='hammer', lon_0=0, resolution='l')
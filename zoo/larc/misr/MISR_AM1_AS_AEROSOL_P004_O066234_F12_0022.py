@@ -36,13 +36,14 @@ import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
 import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 from pyhdf.HDF import *
 from pyhdf.SD import *
 from pyhdf.V import *
 
+from zoo.lib import geocache, maps, misr
+
 def run(FILE_NAME):
     
     # Identify the data field.
@@ -60,14 +61,12 @@ def run(FILE_NAME):
     GEO_FILE_NAME = 'lat_MISR_AM1_AS_AEROSOL_P004_O066234_F12_0022.output'
     GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
                                  GEO_FILE_NAME)
-    lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-    lat = lat.reshape(data.shape)
+    lat = geocache.load(GEO_FILE_NAME, data.shape)
     
     GEO_FILE_NAME = 'lon_MISR_AM1_AS_AEROSOL_P004_O066234_F12_0022.output'
     GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
                                  GEO_FILE_NAME)
-    lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-    lon = lon.reshape(data.shape)
+    lon = geocache.load(GEO_FILE_NAME, data.shape)
         
     # Read attributes.
     attrs = data4D.attributes(full=1)
@@ -78,19 +77,17 @@ def run(FILE_NAME):
     data[data == _FillValue] = np.nan
     datam = np.ma.masked_array(data, mask=np.isnan(data))
 
-    nblocks = data.shape[0]
-    ydimsize = data.shape[1]
-    xdimsize = data.shape[2]
-
-    datam = datam.reshape(nblocks*ydimsize, xdimsize)
-    lat = lat.reshape(nblocks*ydimsize, xdimsize)
-    lon = lon.reshape(nblocks*ydimsize, xdimsize)
+    # Place each block at its SOM block offset in one image of the path.
+    position = misr.positions(FILE_NAME, DATAFIELD_NAME)
+    datam = misr.stitch(datam, position)
+    lat = misr.stitch(lat, position, edge=True)
+    lon = misr.stitch(lon, position, edge=True)
 
 
     # Set the limit for the plot.
-    m = Basemap(projection='cyl', resolution='h',
-                llcrnrlat=np.min(lat), urcrnrlat = np.max(lat),
-                llcrnrlon=np.min(lon), urcrnrlon = np.max(lon))
+    m = maps.basemap(projection='cyl', resolution='h',
+                     llcrnrlat=np.min(lat), urcrnrlat = np.max(lat),
+                     llcrnrlon=np.min(lon), urcrnrlon = np.max(lon))
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-90., 120., 30.), labels=[1, 0, 0, 0])
     m.drawmeridians(np.arange(-180., 181., 45.), labels=[0, 0, 0, 1])
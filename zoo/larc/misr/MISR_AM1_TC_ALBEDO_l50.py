@@ -26,11 +26,12 @@ import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
 import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 from pyhdf.SD import SD, SDC
 
+from zoo.lib import geocache, maps
+
 def run(FILE_NAME):
     
     # Identify the data field.
@@ -50,14 +51,12 @@ def run(FILE_NAME):
     GEO_FILE_NAME = 'lat_MISR_TC_ALBEDO_P223_F05_lvl50.output'
     GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
                                  GEO_FILE_NAME)
-    lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-    lat = lat.reshape(data.shape)
+    lat = geocache.load(GEO_FILE_NAME, data.shape)
     
     GEO_FILE_NAME = 'lon_MISR_TC_ALBEDO_P223_F05_lvl50.output'
     GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
                                  GEO_FILE_NAME)
-    lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-    lon = lon.reshape(data.shape)
+    lon = geocache.load(GEO_FILE_NAME, data.shape)
         
     # Read attributes.
     attrs = data4D.attributes(full=1)
@@ -70,9 +69,9 @@ def run(FILE_NAME):
 
 
     # Set the limit for the plot.
-    m = Basemap(projection='cyl', resolution='h',
-                llcrnrlat=np.min(lat), urcrnrlat = np.max(lat),
-                llcrnrlon=np.min(lon), urcrnrlon = np.max(lon))
+    m = maps.basemap(projection='cyl', resolution='h',
+                     llcrnrlat=np.min(lat), urcrnrlat = np.max(lat),
+                     llcrnrlon=np.min(lon), urcrnrlon = np.max(lon))
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(np.floor(np.min(lat)), np.ceil(np.max(lat)), 1), labels=[1, 0, 0, 0])
     m.drawmeridians(np.arange(np.floor(np.min(lon)), np.ceil(np.max(lon)), 1), labels=[0, 0, 0, 1])
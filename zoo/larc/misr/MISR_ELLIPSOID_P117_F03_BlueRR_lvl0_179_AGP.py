@@ -26,93 +26,44 @@ import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
 import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
-from pyhdf.HDF import *
-from pyhdf.SD import *
-from pyhdf.V import *
+
+from zoo.lib import maps, misr
 
 def run(FILE_NAME):
     
     # Identify the data field.
     DATAFIELD_NAME = 'Blue Radiance/RDQI'
 
-    hdf = SD(FILE_NAME, SDC.READ)
-
-    # Read dataset.
-    data3D = hdf.select(DATAFIELD_NAME)
-    data = data3D[:,:,:]
-
-    # Read attributes.
-    attrs = data3D.attributes(full=1)
-    fva=attrs["_FillValue"]
-    _FillValue = fva[0]
-
-
     # Read geolocation dataset from another file.
     GEO_FILE_NAME = 'MISR_AM1_AGP_P117_F01_24.hdf'
     GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
                                  GEO_FILE_NAME)
 
-    hdf_geo = SD(GEO_FILE_NAME, SDC.READ)
-
-    # Read geolocation dataset.
-    lat3D = hdf_geo.select('GeoLatitude')
-    lat = lat3D[:,:,:]
-
-    lon3D = hdf_geo.select('GeoLongitude')
-    lon = lon3D[:,:,:]
+    # Read the blocks of the dataset and of the geolocation, each block
+    # placed at its SOM block offset in one image of the path.
+    data, lat, lon = misr.read(FILE_NAME, DATAFIELD_NAME, agp=GEO_FILE_NAME)
         
 
-    # Read scale factor attribute.
-    f = HDF(FILE_NAME, HC.READ)
-    v = f.vgstart()
-    vg = v.attach(8)
-
-    # PyHDF cannot read attributes from Vgroup properly.
-    # sfa = vg.attr('Scale Factor')
-    # scale_factor = sfa.get()
-
-    vg.detach()
-    v.end()
-
-    # Set it manually using HDFView.
-    scale_factor = 0.047203224152326584
-
+    # Read the scale factor from the attributes of the BlueBand grid.
+    scale_factor = misr.scale_factor(FILE_NAME, 'BlueBand')
 
 
     # We need to shift bits for "RDQI" to get "Blue Band "only. 
     # See the page 84 of "MISR Data Products Specifications (rev. S)".
     # The document is available at [1].
-    datas = np.right_shift(data, 2);
-    dataf = datas.astype(np.double)
-
-    # Apply the fill value.
-    dataf[data == _FillValue] = np.nan
-
-    # Filter out values (> 16376) used for "Flag Data".
-    # See Table 1.2 in "Level 1 Radiance Scaling and Conditioning
-    # Algorithm  Theoretical Basis" document [2].
-    dataf[datas > 16376] = np.nan
-    datam = np.ma.masked_array(dataf, mask=np.isnan(dataf))
-
-    # Apply scale facotr.
-    datam = scale_factor * datam;
-
-    nblocks = data.shape[0]
-    ydimsize = data.shape[1]
-    xdimsize = data.shape[2]
-
-    datam = datam.reshape(nblocks*ydimsize, xdimsize)
-    lat = lat.reshape(nblocks*ydimsize, xdimsize)
-    lon = lon.reshape(nblocks*ydimsize, xdimsize)
+    # Values (> 16376) used for "Flag Data" are masked along with the fill
+    # value and unusable (RDQI 3) values.  See Table 1.2 in "Level 1
+    # Radiance Scaling and Conditioning Algorithm  Theoretical Basis"
+    # document [2].  Then apply scale factor.
+    datam, rdqi = misr.radiance(data, scale_factor)
 
 
     # Set the limit for the plot.
-    m = Basemap(projection='cyl', resolution='h',
-                llcrnrlat=np.min(lat), urcrnrlat = np.max(lat),
-                llcrnrlon=np.min(lon), urcrnrlon = np.max(lon))
+    m = maps.basemap(projection='cyl', resolution='h',
+                     llcrnrlat=np.min(lat), urcrnrlat = np.max(lat),
+                     llcrnrlon=np.min(lon), urcrnrlon = np.max(lon))
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-90., 120., 30.), labels=[1, 0, 0, 0])
     m.drawmeridians(np.arange(-180., 181., 45.), labels=[0, 0, 0, 1])
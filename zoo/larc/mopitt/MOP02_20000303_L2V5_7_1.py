@@ -27,40 +27,25 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
-from pyhdf import HDF, SD, VS, V
+from pyhdf import SD
+
+from zoo.lib import raster, vdata
 
 def run(FILE_NAME):
     
-    # Initialize the SD, V, and VS interfaces.
-    hdf = HDF.HDF(FILE_NAME)
-    v = hdf.vgstart()
-    vs = hdf.vstart()
     sd = SD.SD(FILE_NAME)
 
-    # Navigate the HDF-EOS2 structure and extract the geolocation data.  These
-    # are vdatas, so the SD interface cannot retrieve it.  This is also why
-    # the netcdf interface cannot retrieve it.
-    xid = vs.find('Latitude')
-    latid = vs.attach(xid)
-    latid.setfields('Latitude')
-    nrecs, _, _, _, _ = latid.inquire()
-    latitude = latid.read(nRec=nrecs)
-    latid.detach()
-
-    lonid = vs.attach(vs.find('Longitude'))
-    lonid.setfields('Longitude')
-    nrecs, _, _, _, _ = lonid.inquire()
-    longitude = lonid.read(nRec=nrecs)
-    lonid.detach()
+    # Extract the geolocation data.  These are vdatas, so the SD interface
+    # cannot retrieve it.  This is also why the netcdf interface cannot
+    # retrieve it.
+    latitude, longitude = vdata.read_fields(FILE_NAME,
+                                            ('Latitude', 'Longitude'))
 
     # Extract the data.
     name = 'Retrieval Bottom Pressure'
     sds = sd.select(name)
     data = sds[:, 0].astype(np.float64)
     sds.endaccess()
-
-    v.end()
-    vs.end()
     sd.end()
 
     m = Basemap(projection='cyl', resolution='l',
@@ -69,8 +54,7 @@ def run(FILE_NAME):
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-90, 91, 45))
     m.drawmeridians(np.arange(-180, 180, 45), labels=[True,False,False,True])
-    m.scatter(longitude, latitude, c=data, s=1, cmap=plt.cm.jet,
-            edgecolors=None, linewidth=0)
+    raster.draw(longitude, latitude, data, m=m, cmap=plt.cm.jet)
 
     cb = m.colorbar()
     cb.set_label('hPa')
@@ -21,24 +21,19 @@ specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import re
 
 import h5py
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid
+
 def run(FILE_NAME):
     
     with h5py.File(FILE_NAME, mode='r') as f:
 
-        # Need to retrieve the grid metadata.  The hdfeos5 library stores it
-        # in a string dataset.
-        METADATA_FIELD = '/HDFEOS INFORMATION/StructMetadata.0'
-        gridmeta = str(f[METADATA_FIELD][...])
-
         # Need to transpose the data
         DATA_FIELD = '/HDFEOS/GRIDS/NadirGrid/Data Fields/SurfacePressure'
         data = f[DATA_FIELD][...].astype(np.float64).T
@@ -51,30 +46,8 @@ def run(FILE_NAME):
     data[invalid] = np.nan
     data = np.ma.masked_array(data, np.isnan(data))
 
-    # Construct the grid.  Use regular expressions to tease out the
-    # extents of the grid.  
-    ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                              (?P<upper_left_x>[+-]?\d+\.\d+)
-                              ,
-                              (?P<upper_left_y>[+-]?\d+\.\d+)
-                              \)''', re.VERBOSE)
-    match = ul_regex.search(gridmeta)
-    x0 = np.float(match.group('upper_left_x')) / 1e6
-    y0 = np.float(match.group('upper_left_y')) / 1e6
-
-    lr_regex = re.compile(r'''LowerRightMtrs=\(
-                              (?P<lower_right_x>[+-]?\d+\.\d+)
-                              ,
-                              (?P<lower_right_y>[+-]?\d+\.\d+)
-                              \)''', re.VERBOSE)
-    match = lr_regex.search(gridmeta)
-    x1 = np.float(match.group('lower_right_x')) / 1e6
-    y1 = np.float(match.group('lower_right_y')) / 1e6
-        
-    ny, nx = data.shape
-    x = np.linspace(x0, x1, nx)
-    y = np.linspace(y0, y1, ny)
-    lon, lat = np.meshgrid(x, y)
+    # Construct the grid from the grid metadata.
+    lat, lon = grid.from_file(FILE_NAME, 'NadirGrid').latlon()
     
     m = Basemap(projection='cyl', resolution='l',
                 llcrnrlat=-90, urcrnrlat=90,
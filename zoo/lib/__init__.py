@@ -0,0 +1,7 @@
+"""
+Support code shared by the HDF-EOS zoo examples.
+
+The modules in this package are not examples themselves.  They collect the
+reading, geolocation and plotting steps that many of the example scripts
+would otherwise repeat, so that each step only has to be made fast once.
+"""
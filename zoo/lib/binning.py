@@ -0,0 +1,304 @@
+"""
+Bin swath pixels of many granules into level 3 grids.
+
+The swath examples plot one granule at a time.  Here the decoded pixels of
+any number of granules are accumulated into a fixed grid, keeping for every
+cell the count, sum, sum of squares, minimum and maximum of the values that
+fell into it, from which the mean and standard deviation follow
+
+    acc = zoo.lib.binning.Accumulator(
+        zoo.lib.binning.LatLonBins(zoo.lib.grid.standard('trmm_0.25')))
+    for FILE_NAME in granules:
+        f = zoo.lib.reader.open_file(FILE_NAME)
+        geo = zoo.lib.swath.from_file(FILE_NAME, DATAFIELD_NAME)
+        acc.add_swath(f[DATAFIELD_NAME], geo, convention='modis')
+    mean = acc.mean()
+
+Pixels are binned a tile of rows at a time, so memory stays in proportion
+to the grid, never to the granules.  Cells are either those of a geographic
+zoo.lib.grid Grid (LatLonBins) or the equal-area bins of the OBPG level 3
+binning scheme, rows of equal height holding a number of bins in
+proportion to the cosine of their latitude (EqualAreaBins).
+
+The statistics only ever add up, so accumulators filled by separate workers
+from separate granules, or saved to disk and loaded back, are merged into
+the same result as one accumulator filled with all of them.  Daily keeps
+one accumulator per day for daily composites.
+"""
+import collections
+import os
+
+import numpy as np
+
+from . import decode
+
+# Approximate number of points binned at a time.
+CHUNK_SIZE = 1 << 20
+
+STATISTICS = ('count', 'sum', 'sumsq', 'min', 'max')
+
+
+class LatLonBins(object):
+    """
+    The cells of a geographic (GCTP_GEO) zoo.lib.grid Grid.
+    """
+    def __init__(self, grid):
+        lat, lon = grid.axes()
+        self.grid = grid
+        self.shape = (lat.size, lon.size)
+        self.size = lat.size * lon.size
+        self.dlat = (lat[-1] - lat[0]) / max(1, lat.size - 1)
+        self.dlon = (lon[-1] - lon[0]) / max(1, lon.size - 1)
+        self.lat0 = lat[0] - self.dlat / 2
+        self.lon0 = lon[0] - self.dlon / 2
+        self.wrap = abs(abs(self.dlon) * lon.size - 360) < 1e-6
+
+    @property
+    def key(self):
+        """
+        The bins as a hashable tuple.
+        """
+        return ('latlon',) + self.grid.key
+
+    def index(self, lat, lon):
+        """
+        Flat cell index of each point, -1 outside the grid.
+        """
+        row = np.floor((lat - self.lat0) / self.dlat)
+        lon = lon - self.lon0
+        if self.wrap:
+            lon = np.mod(lon, 360.0 if self.dlon > 0 else -360.0)
+        col = np.floor(lon / self.dlon)
+        inside = ((row >= 0) & (row < self.shape[0]) &
+                  (col >= 0) & (col < self.shape[1]))
+        index = row * self.shape[1] + col
+        return np.where(inside, index, -1).astype(np.int64)
+
+    def centers(self):
+        """
+        Latitude and longitude of the cell centers.
+        """
+        return self.grid.latlon()
+
+
+class EqualAreaBins(object):
+    """
+    Equal-area bins in 'nrows' rows of latitude, as in OBPG level 3 binned
+    products (2160 rows for 9.2 km bins, 4320 for 4.6 km).
+    """
+    def __init__(self, nrows):
+        self.nrows = int(nrows)
+        self.lat = (np.arange(self.nrows) + 0.5) * (180.0 / self.nrows) - 90
+        self.nbins = np.round(2 * self.nrows *
+                              np.cos(np.radians(self.lat))).astype(np.int64)
+        np.maximum(self.nbins, 1, out=self.nbins)
+        self.basebin = np.concatenate([[0], np.cumsum(self.nbins)[:-1]])
+        self.size = int(self.nbins.sum())
+        self.shape = (self.size,)
+
+    @property
+    def key(self):
+        """
+        The bins as a hashable tuple.
+        """
+        return ('equal_area', self.nrows)
+
+    def index(self, lat, lon):
+        """
+        Bin number of each point, -1 where the point is not valid.
+        """
+        valid = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90)
+        lat = np.where(valid, lat, 0)
+        row = np.floor((lat + 90) * (self.nrows / 180.0)).astype(np.int64)
+        np.clip(row, 0, self.nrows - 1, out=row)
+        nbins = self.nbins[row]
+        col = np.floor(np.mod(np.where(valid, lon, 0) + 180, 360) *
+                       (nbins / 360.0)).astype(np.int64)
+        np.minimum(col, nbins - 1, out=col)
+        return np.where(valid, self.basebin[row] + col, -1)
+
+    def centers(self):
+        """
+        Latitude and longitude of the bin centers.
+        """
+        row = np.repeat(np.arange(self.nrows), self.nbins)
+        col = np.arange(self.size) - self.basebin[row]
+        return self.lat[row], (col + 0.5) * (360.0 / self.nbins[row]) - 180
+
+
+class Accumulator(object):
+    """
+    Count, sum, sum of squares, minimum and maximum of values by bin.
+    """
+    def __init__(self, bins):
+        self.bins = bins
+        self.count = np.zeros(bins.size, dtype=np.int64)
+        self.sum = np.zeros(bins.size)
+        self.sumsq = np.zeros(bins.size)
+        self.min = np.full(bins.size, np.inf)
+        self.max = np.full(bins.size, -np.inf)
+
+    def __repr__(self):
+        return 'Accumulator({0}, {1} values)'.format(self.bins.key,
+                                                     self.count.sum())
+
+    def add(self, lat, lon, values, chunk_size=CHUNK_SIZE):
+        """
+        Bin (masked) values at lat, lon.  Masked and NaN values are left out.
+        """
+        lat = np.ravel(lat)
+        lon = np.ravel(lon)
+        values = np.ma.ravel(values)
+        for start in range(0, lat.size, chunk_size):
+            part = slice(start, start + chunk_size)
+            v = np.ma.getdata(values[part]).astype(np.float64)
+            keep = ~np.ma.getmaskarray(values[part]) & ~np.isnan(v)
+            index = self.bins.index(lat[part], lon[part])
+            keep &= index >= 0
+            self._add(index[keep], v[keep])
+
+    def _add(self, index, values):
+        # Work on the bins hit only, not on the whole grid.
+        bins, which = np.unique(index, return_inverse=True)
+        self.count[bins] += np.bincount(which, minlength=bins.size)
+        self.sum[bins] += np.bincount(which, weights=values,
+                                      minlength=bins.size)
+        self.sumsq[bins] += np.bincount(which, weights=values * values,
+                                        minlength=bins.size)
+        np.minimum.at(self.min, index, values)
+        np.maximum.at(self.max, index, values)
+
+    def add_swath(self, field, geolocation, convention='cf', attrs=None,
+                  **kwargs):
+        """
+        Bin a 2-D swath field (see zoo.lib.reader) with its zoo.lib.swath
+        geolocation, decoding it a tile of rows at a time.  Further keyword
+        arguments go to zoo.lib.decode.decode.
+        """
+        if attrs is None:
+            attrs = getattr(field, 'attrs', {})
+        for tile, lat, lon in geolocation.tiles():
+            data = decode.decode(field[tile], attrs, convention, **kwargs)
+            self.add(lat, lon, data)
+
+    def merge(self, other):
+        """
+        Add in the values of another accumulator over the same bins.
+        """
+        if other.bins.key != self.bins.key:
+            raise ValueError('Cannot merge bins {0} into {1}'.format(
+                other.bins.key, self.bins.key))
+        self.count += other.count
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        return self
+
+    def save(self, path):
+        """
+        Save the statistics, replacing 'path' only once they are written.
+        """
+        partial = '{0}.{1}.part'.format(path, os.getpid())
+        with open(partial, 'wb') as f:
+            np.savez(f, key=np.array(repr(self.bins.key)),
+                     **dict((name, getattr(self, name))
+                            for name in STATISTICS))
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path, bins):
+        """
+        An accumulator saved over the same bins.
+        """
+        acc = cls(bins)
+        with np.load(path) as saved:
+            if str(saved['key']) != repr(bins.key):
+                raise ValueError('{0} holds bins {1}, not {2}'.format(
+                    path, saved['key'], bins.key))
+            for name in STATISTICS:
+                getattr(acc, name)[...] = saved[name]
+        return acc
+
+    def _result(self, values):
+        return np.ma.masked_array(values, self.count == 0).reshape(
+            self.bins.shape)
+
+    def mean(self):
+        """
+        Mean by bin, masked where no value fell.
+        """
+        return self._result(self.sum / np.maximum(self.count, 1))
+
+    def std(self):
+        """
+        Population standard deviation by bin.
+        """
+        n = np.maximum(self.count, 1)
+        mean = self.sum / n
+        return self._result(np.sqrt(np.maximum(self.sumsq / n - mean * mean,
+                                               0)))
+
+    def minimum(self):
+        """
+        Smallest value by bin.
+        """
+        return self._result(self.min)
+
+    def maximum(self):
+        """
+        Largest value by bin.
+        """
+        return self._result(self.max)
+
+    def counts(self):
+        """
+        Number of values by bin.
+        """
+        return self.count.reshape(self.bins.shape)
+
+
+class Daily(object):
+    """
+    One accumulator per day, for daily composites.
+    """
+    def __init__(self, bins):
+        self.bins = bins
+        self.days = collections.OrderedDict()
+
+    def __getitem__(self, day):
+        """
+        The accumulator of a day, such as '2010-01-01', made on first use.
+        """
+        if day not in self.days:
+            self.days[day] = Accumulator(self.bins)
+        return self.days[day]
+
+    def merge(self, other):
+        """
+        Add in the accumulators of another Daily, day by day.
+        """
+        for day, acc in other.days.items():
+            self[day].merge(acc)
+        return self
+
+    def save(self, directory):
+        """
+        Save each day as '<day>.npz' in 'directory'.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for day, acc in self.days.items():
+            acc.save(os.path.join(directory, day + '.npz'))
+
+    @classmethod
+    def load(cls, directory, bins):
+        """
+        The days saved in 'directory', in order.
+        """
+        daily = cls(bins)
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.npz'):
+                daily.days[name[:-4]] = Accumulator.load(
+                    os.path.join(directory, name), bins)
+        return daily
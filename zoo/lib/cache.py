@@ -0,0 +1,52 @@
+"""
+On-disk cache location and file fingerprints.
+
+Everything that zoo.lib persists between runs lives under one directory,
+given by the environment variable HDFEOS_ZOO_CACHE or, if that is not set,
+~/.cache/hdfeos_zoo.
+"""
+import hashlib
+import os
+
+
+def cache_dir(*subdirs):
+    """
+    Return (and create if necessary) a directory inside the zoo cache.
+    """
+    try:
+        root = os.environ['HDFEOS_ZOO_CACHE']
+    except KeyError:
+        root = os.path.join(os.path.expanduser('~'), '.cache', 'hdfeos_zoo')
+    path = os.path.join(root, *subdirs)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return path
+
+
+def file_state(path):
+    """
+    Identify a file by its absolute path, size and modification time.
+    """
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def content_digest(path, chunk_size=1 << 20):
+    """
+    SHA-1 hex digest of the contents of a file, read a chunk at a time.
+    """
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def digest(*parts):
+    """
+    Short, stable hex digest of the repr of the given parts.
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(repr(part).encode('utf-8'))
+    return h.hexdigest()[:16]
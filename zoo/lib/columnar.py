@@ -0,0 +1,226 @@
+"""
+Export point and profile fields to partitioned Parquet datasets.
+
+Along-track products, one record per shot, sounding or profile, are read
+back from HDF every time they are queried, although a query usually only
+wants a time range, a latitude band or the records passing a quality test.
+Here the fields of a granule are decoded once, fill values and scaling
+applied by zoo.lib.decode, and written as the columns of a Parquet dataset
+partitioned by latitude band and day
+
+    f = zoo.lib.reader.open_file(FILE_NAME)
+    zoo.lib.columnar.export(f, 'glah13', zoo.lib.columnar.PRODUCTS['glah13'])
+
+so that a reader such as pyarrow.dataset skips whole partitions, and, by the
+min/max statistics Parquet keeps per row group, row groups of the files it
+does open
+
+    d = zoo.lib.columnar.dataset('glah13')
+    t = d.to_table(filter=(pyarrow.dataset.field('latitude') > 60))
+
+Fields of one value per record become plain columns; profiles, two
+dimensional fields of a number of levels per record, become fixed-size list
+columns, one list per record.  Invalid values are written as nulls.  The
+granule is read and written a block of records at a time, so memory stays in
+proportion to the block.  Each granule writes its own files in the dataset,
+named after it, so exporting a granule again replaces its files, removing
+any it no longer writes, and leaves those of other granules alone.
+
+Times are converted to days from the product's epoch, leap seconds left out,
+so a record within a minute of midnight may fall into the next or previous
+day's partition.
+
+pyarrow is needed to write and read the datasets.
+"""
+import collections
+import itertools
+import os
+import re
+
+import numpy as np
+
+from . import decode
+
+# Records read, decoded and written at a time.
+BLOCK_SIZE = 1 << 16
+
+# Width in degrees of the latitude bands partitioning the datasets.
+BAND_WIDTH = 10
+
+# Epochs of the time fields.
+TAI93 = '1993-01-01T00:00:00'
+J2000 = '2000-01-01T12:00:00'
+
+
+def swath_fields(swath, *names):
+    """
+    Field paths of an HDF-EOS5 swath, such as the MLS, HIRDLS and TES
+    ones: its time, latitude and longitude and the given data fields.
+    """
+    path = '/HDFEOS/SWATHS/{0}/{1}/{2}'
+    fields = collections.OrderedDict([
+        ('time', path.format(swath, 'Geolocation Fields', 'Time')),
+        ('latitude', path.format(swath, 'Geolocation Fields', 'Latitude')),
+        ('longitude', path.format(swath, 'Geolocation Fields', 'Longitude')),
+    ])
+    for name in names:
+        fields[name] = path.format(swath, 'Data Fields', name)
+    return fields
+
+
+# Columns of some of the zoo's along-track products, as (epoch of 'time',
+# column name: field path).
+PRODUCTS = {
+    'glah13': (J2000, collections.OrderedDict([
+        ('time', '/Data_1HZ/Time/d_UTCTime_1'),
+        ('latitude', '/Data_1HZ/Geolocation/d_lat'),
+        ('longitude', '/Data_1HZ/Geolocation/d_lon'),
+        ('surface_temp', '/Data_1HZ/Atmosphere/d_Surface_temp'),
+    ])),
+    'acos': (TAI93, collections.OrderedDict([
+        ('time', '/SoundingHeader/sounding_time_tai93'),
+        ('latitude', '/SoundingGeometry/sounding_latitude_geoid'),
+        ('longitude', '/SoundingGeometry/sounding_longitude_geoid'),
+        ('altitude', '/SoundingGeometry/sounding_altitude'),
+        ('xco2', '/RetrievalResults/xco2'),
+    ])),
+    'hirdls': (TAI93, swath_fields('HIRDLS', 'O3')),
+    'tes_o3': (TAI93, swath_fields('O3NadirSwath', 'O3')),
+}
+
+
+def latitude_band(latitude, width=BAND_WIDTH):
+    """
+    Southern edge of the band of 'width' degrees each latitude falls in.
+    """
+    band = np.floor(np.ma.filled(latitude, np.nan) / width) * width
+    return np.where(np.isfinite(band), band, -999).astype(np.int16)
+
+
+def day(seconds, epoch):
+    """
+    Date, as 'YYYY-MM-DD', of times in seconds from 'epoch'.
+    """
+    seconds = np.ma.filled(seconds, np.nan)
+    ms = np.where(np.isfinite(seconds), seconds * 1000, 0).astype(np.int64)
+    dates = (np.datetime64(epoch, 'ms') + ms.astype('timedelta64[ms]'))
+    return dates.astype('datetime64[D]').astype(str)
+
+
+def _array(values):
+    """
+    A pyarrow array of 1-D (masked) values, or of fixed-size lists for 2-D
+    ones, with nulls where the values are masked.
+    """
+    import pyarrow as pa
+    mask = np.ma.getmaskarray(values)
+    data = np.ma.getdata(values)
+    if data.ndim == 1:
+        return pa.array(data, mask=mask)
+    flat = pa.array(data.reshape(-1), mask=mask.reshape(-1))
+    return pa.FixedSizeListArray.from_arrays(flat, data.shape[1])
+
+
+def batches(f, fields, epoch=None, convention='cf', block_size=BLOCK_SIZE,
+            band_width=BAND_WIDTH):
+    """
+    Decode fields of an open file (see zoo.lib.reader) into pyarrow record
+    batches of 'block_size' records.
+
+    'fields' maps column names to field paths.  All fields have one record
+    per row of their first dimension.  If there are 'latitude' and 'time'
+    columns, the 'band' and, given the epoch of the times, 'day' partition
+    columns are added.
+    """
+    import pyarrow as pa
+    proxies = [(name, f[path]) for name, path in fields.items()]
+    nrecords = proxies[0][1].shape[0]
+    for name, field in proxies:
+        if field.shape[0] != nrecords:
+            raise ValueError('Field {0} has {1} records, not {2}'.format(
+                name, field.shape[0], nrecords))
+
+    for start in range(0, nrecords, block_size):
+        rows = slice(start, min(start + block_size, nrecords))
+        columns = collections.OrderedDict()
+        for name, field in proxies:
+            values = field[rows]
+            if values.dtype.kind in 'iuf':
+                values = decode.decode(values, field.attrs, convention)
+            columns[name] = values
+        arrays = [_array(values) for values in columns.values()]
+        names = list(columns)
+        if 'latitude' in columns:
+            arrays.append(pa.array(latitude_band(columns['latitude'],
+                                                 band_width)))
+            names.append('band')
+        if 'time' in columns and epoch is not None:
+            arrays.append(pa.array(day(columns['time'], epoch)))
+            names.append('day')
+        yield pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def _remove_granule(root, granule):
+    """
+    Remove the files a granule wrote in the dataset at 'root'.
+    """
+    name = re.compile(re.escape(granule) + r'-\d+\.parquet$')
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if name.match(filename):
+                os.remove(os.path.join(dirpath, filename))
+
+
+def export(f, root, fields, epoch=None, convention='cf',
+           partition_by=('band', 'day'), block_size=BLOCK_SIZE,
+           compression='zstd'):
+    """
+    Write fields of an open file into the Parquet dataset at 'root'.
+
+    'fields' maps column names to field paths, or is a (epoch, fields) pair
+    such as the entries of PRODUCTS.  The dataset is partitioned, Hive
+    style, by the 'partition_by' columns that are present.  Returns the
+    number of records written.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    if isinstance(fields, tuple):
+        epoch, fields = fields
+    granule = os.path.basename(f.filename)
+    _remove_granule(root, granule)
+    source = batches(f, fields, epoch, convention, block_size)
+    first = next(source, None)
+    if first is None:
+        return 0
+    schema = first.schema
+    count = [0]
+
+    def counted():
+        for batch in itertools.chain([first], source):
+            count[0] += batch.num_rows
+            yield batch
+
+    partitions = [name for name in partition_by if name in schema.names]
+    partitioning = None
+    if partitions:
+        partitioning = ds.partitioning(
+            pa.schema([schema.field(name) for name in partitions]),
+            flavor='hive')
+    parquet = ds.ParquetFileFormat()
+    ds.write_dataset(counted(), root, schema=schema, format=parquet,
+                     file_options=parquet.make_write_options(
+                         compression=compression),
+                     partitioning=partitioning,
+                     basename_template=granule + '-{i}.parquet',
+                     max_rows_per_group=block_size,
+                     existing_data_behavior='overwrite_or_ignore')
+    return count[0]
+
+
+def dataset(root):
+    """
+    The Parquet dataset at 'root' as a pyarrow dataset, with its partition
+    columns, for filtering with pushdown.
+    """
+    import pyarrow.dataset as ds
+    return ds.dataset(root, format='parquet', partitioning='hive')
@@ -0,0 +1,172 @@
+"""
+Turn packed integer fields into physical values in a single pass.
+
+The examples decode a field with a run of whole-array operations
+
+    data = data.astype(np.double)
+    invalid = np.logical_or(data < valid_range[0], data > valid_range[1])
+    invalid = np.logical_or(invalid, data == _FillValue)
+    data[invalid] = np.nan
+    data = (data - add_offset) * scale_factor
+    data = np.ma.masked_array(data, np.isnan(data))
+
+each of which allocates another temporary as large as the field.  Here the
+same is done a block of rows at a time into one preallocated output array, so
+the only full-size allocations are the result and its mask
+
+    data = zoo.lib.decode.decode(raw, attrs, convention='modis')
+
+The scaling conventions met in the zoo are
+
+    cf       x * scale_factor + add_offset
+    modis    (x - add_offset) * scale_factor
+    lpdaac   (x - add_offset) / scale_factor
+    obpg     x * slope + intercept
+    amsre    x * 'SCALE FACTOR' + OFFSET
+    omi      (x - Offset) * ScaleFactor
+    misr     (x >> 2) * scale, the radiance part of MISR RDQI values, whose
+             values above 16376 are flags.  MISR keeps the scale factor in a
+             grid attribute, so it has to be given (see
+             zoo.lib.misr.scale_factor).
+
+Fill values and valid ranges are tested on the packed values, as the data
+producers define them.  'raw' may also be a zoo.lib.reader field, in which
+case it is read a block at a time too.
+"""
+import numpy as np
+
+# Attribute names for the scale and the offset, and how they are applied.
+CONVENTIONS = {
+    'cf': ('scale_factor', 'add_offset', 'scale_offset'),
+    'modis': ('scale_factor', 'add_offset', 'offset_scale'),
+    'lpdaac': ('scale_factor', 'add_offset', 'offset_divide'),
+    'obpg': ('slope', 'intercept', 'scale_offset'),
+    'amsre': ('SCALE FACTOR', 'OFFSET', 'scale_offset'),
+    'omi': ('ScaleFactor', 'Offset', 'offset_scale'),
+    'misr': ('Scale factor', None, 'rdqi'),
+}
+
+# Attributes holding values that mark missing data.
+FILL_ATTRS = ('_FillValue', 'MissingValue', 'missing_value')
+
+# Largest MISR RDQI radiance that is not a flag.
+RDQI_MAX = 16376
+
+# Approximate number of elements decoded at a time.
+CHUNK_SIZE = 1 << 18
+
+
+def _number(value):
+    """
+    A scalar attribute value, which may come as a 1-element list or array,
+    or as a string from GDAL.
+    """
+    value = np.ravel(value)[0]
+    if isinstance(value, (str, bytes, np.str_, np.bytes_)):
+        value = float(value)
+    return value
+
+
+def _valid_range(attrs):
+    """
+    The valid range from 'valid_range' or 'valid_min' / 'valid_max'.
+    """
+    if 'valid_range' in attrs:
+        value = attrs['valid_range']
+        if isinstance(value, (str, bytes)):
+            # Some products write the range as a string, e.g. '-2000, 10000'.
+            if isinstance(value, bytes):
+                value = value.decode('ascii')
+            value = [float(v) for v in value.replace(',', ' ').split()]
+        lo, hi = np.ravel(value)[:2]
+        return lo, hi
+    return attrs.get('valid_min'), attrs.get('valid_max')
+
+
+def decode(raw, attrs=None, convention='cf', scale=None, offset=None,
+           fill=None, valid_range=None, dtype=np.float64, out=None,
+           masked=True, chunk_size=CHUNK_SIZE):
+    """
+    Scale a packed field, masking fill values and values out of range.
+
+    Scale, offset, fill value(s) and valid range are looked up in 'attrs'
+    (raw.attrs by default) under the names of the convention, unless they
+    are given.  The result is written into 'out' if given, otherwise into a
+    new array of type 'dtype', with NaN where the data are invalid.  It is
+    returned as a masked array unless 'masked' is false.
+    """
+    try:
+        scale_attr, offset_attr, formula = CONVENTIONS[convention]
+    except KeyError:
+        raise ValueError('Unknown scaling convention {0}'.format(convention))
+    if attrs is None:
+        attrs = getattr(raw, 'attrs', {})
+
+    if scale is None and scale_attr in attrs:
+        scale = _number(attrs[scale_attr])
+    if offset is None and offset_attr in attrs:
+        offset = _number(attrs[offset_attr])
+    if fill is None:
+        fill = [_number(attrs[name]) for name in FILL_ATTRS if name in attrs]
+    fill = np.ravel(fill)
+    if valid_range is None:
+        valid_range = _valid_range(attrs)
+    lo, hi = valid_range
+    if formula == 'rdqi':
+        hi = RDQI_MAX if hi is None else min(hi, RDQI_MAX)
+        offset = None
+
+    shape = tuple(raw.shape)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError('Output shape {0} does not match {1}'.format(
+            out.shape, shape))
+    mask = np.zeros(shape, dtype=bool)
+    if out.ndim == 0:
+        blocks = [Ellipsis]
+    else:
+        rows = max(1, chunk_size // max(1, int(np.prod(shape[1:]))))
+        blocks = [slice(i, min(i + rows, shape[0]))
+                  for i in range(0, shape[0], rows)]
+
+    # Scratch space for the tests, reused for every block.
+    scratch = np.empty(mask[blocks[0]].size, dtype=bool)
+    for block in blocks:
+        packed = np.ma.getdata(raw[block])
+        bad = mask[block]
+        test = scratch[:bad.size].reshape(bad.shape)
+        for value in fill:
+            bad |= np.equal(packed, value, out=test)
+        if packed.dtype.kind == 'f':
+            bad |= np.isnan(packed, out=test)
+        if formula == 'rdqi':
+            packed = np.right_shift(packed, 2)
+        if lo is not None:
+            bad |= np.less(packed, lo, out=test)
+        if hi is not None:
+            bad |= np.greater(packed, hi, out=test)
+
+        # The first operation also converts to the output type.
+        o = out[block]
+        if formula == 'scale_offset' or offset is None:
+            if scale is None:
+                o[...] = packed
+            elif formula == 'offset_divide':
+                np.divide(packed, scale, out=o, dtype=o.dtype)
+            else:
+                np.multiply(packed, scale, out=o, dtype=o.dtype)
+            if offset is not None:
+                o += offset
+        else:
+            np.subtract(packed, offset, out=o, dtype=o.dtype)
+            if scale is not None:
+                if formula == 'offset_divide':
+                    o /= scale
+                else:
+                    o *= scale
+        np.copyto(o, np.nan, where=bad)
+
+    if masked:
+        return np.ma.masked_array(out, mask)
+    return out
@@ -0,0 +1,125 @@
+"""
+Binary cache for HDF-EOS2 dumper (eos2dump) geolocation output.
+
+Several examples read latitude and longitude from the text files written by
+the HDF-EOS2 dumper, e.g. 'lat_MOD09GA.A2007268.h10v08.005.2007272184810_MODIS_Grid_1km_2D.output',
+with
+
+    lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
+
+which is very slow and needs several times the memory of the result for
+1-km and 500-m grids.  Here the text is parsed once and stored as a .npy file
+in the zoo cache (see zoo.lib.cache).  Later runs memory-map that file, so
+loading costs next to nothing and the values stay in the page cache instead
+of the process heap.
+
+The cache entry is keyed by the dump's absolute path, size and modification
+time, so a regenerated dump is parsed again automatically.
+"""
+import glob
+import os
+
+import numpy as np
+
+from . import cache
+
+# Lines parsed per chunk while converting a dump.
+CHUNK_LINES = 1 << 16
+
+
+def _first_column(path):
+    """
+    Yield the first comma separated column of a dump in float64 chunks.
+
+    Blank lines and '#' comments are skipped, as np.genfromtxt does.
+    """
+    values = []
+    with open(path, 'rb') as f:
+        for line in f:
+            field = line.split(b',', 1)[0].strip()
+            if not field or field.startswith(b'#'):
+                continue
+            values.append(float(field))
+            if len(values) == CHUNK_LINES:
+                yield np.array(values, dtype=np.float64)
+                values = []
+    if values:
+        yield np.array(values, dtype=np.float64)
+
+
+def convert(path, npyfile, dtype=np.float64):
+    """
+    Convert the first column of an eos2dump text file into a .npy file.
+
+    The values are streamed chunk by chunk into a raw scratch file and then
+    copied into a memory-mapped .npy file, so the whole dump never has to be
+    held in memory as Python floats.
+    """
+    rawfile = '{0}.{1}.raw'.format(npyfile, os.getpid())
+    tmpfile = '{0}.{1}.tmp'.format(npyfile, os.getpid())
+    try:
+        count = 0
+        with open(rawfile, 'wb') as f:
+            for chunk in _first_column(path):
+                chunk.astype(dtype).tofile(f)
+                count += len(chunk)
+
+        out = np.lib.format.open_memmap(tmpfile, mode='w+', dtype=dtype,
+                                        shape=(count,))
+        if count > 0:
+            out[:] = np.memmap(rawfile, dtype=dtype, mode='r', shape=(count,))
+        out.flush()
+        del out
+        os.replace(tmpfile, npyfile)
+    finally:
+        for scratch in (rawfile, tmpfile):
+            if os.path.exists(scratch):
+                os.remove(scratch)
+
+
+def cache_file(path, dtype=np.float64):
+    """
+    Name of the cache entry for the current state of a dump file.
+    """
+    fullpath, size, mtime = cache.file_state(path)
+    stem = '{0}.{1}'.format(os.path.basename(fullpath), cache.digest(fullpath))
+    state = cache.digest(size, mtime, np.dtype(dtype).str)
+    return os.path.join(cache.cache_dir('geolocation'),
+                        '{0}.{1}.npy'.format(stem, state))
+
+
+def load(path, shape=None, dtype=np.float64, mode='r'):
+    """
+    Load eos2dump geolocation output through the binary cache.
+
+    Parameters
+    ----------
+    path : str
+        Path to the 'lat_*.output' or 'lon_*.output' dump.
+    shape : tuple, optional
+        Shape to give the result, usually the shape of the data field.
+    dtype : dtype, optional
+        Type to store the values as.  Defaults to float64, the same as
+        np.genfromtxt.
+    mode : str, optional
+        Memory-map mode.  The default 'r' is read-only; use 'c' if the
+        caller needs to modify the values (copy-on-write, the cache file is
+        never changed).
+
+    Returns
+    -------
+    numpy.memmap
+        The first column of the dump.
+    """
+    npyfile = cache_file(path, dtype)
+    if not os.path.exists(npyfile):
+        # Drop entries made from older versions of the same dump.
+        stem = npyfile.rsplit('.', 2)[0]
+        for stale in glob.glob(glob.escape(stem) + '.*.npy'):
+            os.remove(stale)
+        convert(path, npyfile, dtype)
+
+    values = np.load(npyfile, mmap_mode=mode)
+    if shape is not None:
+        values = values.reshape(shape)
+    return values
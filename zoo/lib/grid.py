@@ -0,0 +1,416 @@
+"""
+Geolocation of HDF-EOS grids straight from 'StructMetadata.0'.
+
+An HDF-EOS grid is fully described by its StructMetadata entry (see
+zoo.lib.structmeta): the projection and its GCTP parameters, the projected
+coordinates of the upper left and lower right corners, the grid size, the
+grid origin and the pixel registration.  That is enough to compute the
+latitude and longitude of any pixel, so the examples need neither HDF-EOS2
+dumper output nor a full double-precision meshgrid of projected coordinates.
+
+    grid = zoo.lib.grid.from_file(FILE_NAME, 'MODIS_Grid_500m_2D')
+    lat, lon = grid.latlon()
+
+Coordinates are transformed a block of rows at a time through a cached
+pyproj Transformer (see zoo.lib.proj), so the only full-size arrays ever
+allocated are the latitude and longitude themselves.  A window or a strided
+subset can be requested instead of the full grid, and the results for the
+last few grid definitions are memoized, so the many files that share, say,
+the AMSR-E 12.5 km polar stereographic grid are only geolocated once per
+process.  The latitude and longitude of projected grids are also saved in
+the zoo cache (see zoo.lib.cache), keyed by the grid definition, and
+memory-mapped from there in later runs; set HDFEOS_ZOO_PERSIST_LATLON=0 to
+turn that off.
+
+Latitude/longitude (GCTP_GEO) grids are never meshed: their latitude and
+longitude are read-only 1-D vectors, broadcast to 2-D views.  Products on
+fixed global equal-angle grids that carry no grid metadata, such as the
+TRMM 0.25 degree or the MODIS 0.05 degree CMG, get theirs by name or size
+
+    lat, lon = zoo.lib.grid.standard('trmm_0.25').axes()
+    lat, lon = zoo.lib.grid.equal_angle(*data.shape).latlon()
+
+Supported projections are GCTP_GEO, GCTP_SNSOID, GCTP_PS, GCTP_LAMAZ,
+GCTP_BCEA, GCTP_CEA, GCTP_ALBERS and GCTP_UTM.  MISR's block-based GCTP_SOM
+grids are not handled here.
+"""
+import collections
+import math
+import os
+
+import numpy as np
+
+from . import cache, proj, structmeta
+
+# GCTP sphere codes as PROJ ellipsoid parameters.
+SPHERES = {
+    0: '+ellps=clrk66',
+    1: '+ellps=clrk80',
+    2: '+ellps=bessel',
+    3: '+ellps=new_intl',
+    4: '+ellps=intl',
+    5: '+ellps=WGS72',
+    6: '+ellps=evrst30',
+    7: '+ellps=WGS66',
+    8: '+ellps=GRS80',
+    9: '+ellps=airy',
+    10: '+ellps=evrst48',
+    11: '+ellps=mod_airy',
+    12: '+ellps=WGS84',
+    13: '+ellps=SEasia',
+    14: '+ellps=aust_SA',
+    15: '+ellps=krass',
+    16: '+ellps=hough',
+    17: '+ellps=fschr60',
+    18: '+ellps=fschr68',
+    19: '+R=6370997',
+    20: '+R=6371228',
+    21: '+R=6371007.181',
+}
+
+# Rows of the grid geolocated at a time.
+TILE_ROWS = 256
+
+# Number of latitude/longitude results kept by Grid.latlon.
+CACHE_SIZE = 8
+_latlon_cache = collections.OrderedDict()
+
+# Whether Grid.latlon saves projected grids' coordinates between runs.
+PERSIST = os.environ.get('HDFEOS_ZOO_PERSIST_LATLON', '1') != '0'
+
+# Fixed global equal-angle grids by name, as (rows, columns, southern edge,
+# northern edge, origin).  All run from 180W to 180E, registered at cell
+# centers.
+GLOBAL_GRIDS = {
+    'trmm_0.25': (400, 1440, -50, 50, 'HDFE_GD_LL'),
+    'cmg_0.05': (3600, 7200, -90, 90, 'HDFE_GD_UL'),
+    'aquarius_1.0': (180, 360, -90, 90, 'HDFE_GD_UL'),
+    'npp_5min': (2160, 4320, -90, 90, 'HDFE_GD_UL'),
+    'obpg_4km': (4320, 8640, -90, 90, 'HDFE_GD_UL'),
+    'obpg_9km': (2160, 4320, -90, 90, 'HDFE_GD_UL'),
+}
+_equal_angle = {}
+
+
+def dms2deg(value):
+    """
+    Convert a GCTP packed DMS angle (DDDMMMSSS.SS) into decimal degrees.
+    """
+    sign = -1.0 if value < 0 else 1.0
+    value = abs(value)
+    degrees = value // 1000000
+    minutes = (value - degrees * 1000000) // 1000
+    seconds = value - degrees * 1000000 - minutes * 1000
+    return sign * (degrees + minutes / 60.0 + seconds / 3600.0)
+
+
+def deg2dms(value):
+    """
+    Convert decimal degrees into a GCTP packed DMS angle (DDDMMMSSS.SS).
+    """
+    sign = -1.0 if value < 0 else 1.0
+    value = abs(value)
+    degrees = math.floor(value)
+    minutes = math.floor((value - degrees) * 60)
+    seconds = (value - degrees - minutes / 60.0) * 3600
+    return sign * (degrees * 1000000 + minutes * 1000 + seconds)
+
+
+def equal_angle(nrows, ncols, south=-90, north=90, origin='HDFE_GD_UL'):
+    """
+    A global equal-angle grid of nrows x ncols cells from 'south' to
+    'north', registered at cell centers.
+
+    The first row is the northernmost unless 'origin' is HDFE_GD_LL.  Grids
+    are constructed once, so their coordinates are only computed once per
+    process too.
+    """
+    key = (int(nrows), int(ncols), float(south), float(north), origin)
+    try:
+        return _equal_angle[key]
+    except KeyError:
+        name = 'equal_angle_{0}x{1}'.format(key[0], key[1])
+        result = Grid(name, key[1], key[0],
+                      (deg2dms(-180.0), deg2dms(key[3])),
+                      (deg2dms(180.0), deg2dms(key[2])), 'GCTP_GEO',
+                      origin=origin)
+        _equal_angle[key] = result
+        return result
+
+
+def standard(name):
+    """
+    One of the fixed global grids of GLOBAL_GRIDS by name.
+    """
+    try:
+        nrows, ncols, south, north, origin = GLOBAL_GRIDS[name]
+    except KeyError:
+        raise ValueError('Unknown global grid {0}'.format(name))
+    return equal_angle(nrows, ncols, south, north, origin)
+
+
+def from_structure(structure):
+    """
+    Build a Grid from a parsed zoo.lib.structmeta grid structure.
+    """
+    return Grid(structure.name, structure.xdim, structure.ydim,
+                structure.upleft, structure.lowright, structure.projection,
+                projparams=structure.projparams,
+                spherecode=structure.spherecode,
+                zonecode=structure.zonecode, origin=structure.origin,
+                registration=structure.registration)
+
+
+def from_metadata(metadata, gridname=None):
+    """
+    Build a Grid from StructMetadata text.
+
+    If no grid name is given, the first grid in the metadata is used.
+    """
+    return from_structure(structmeta.parse(metadata).grid(gridname))
+
+
+def from_file(filename, gridname=None):
+    """
+    Build a Grid from the StructMetadata of an HDF-EOS file.
+    """
+    return from_structure(structmeta.from_file(filename).grid(gridname))
+
+
+class Grid(object):
+    """
+    An HDF-EOS grid definition that can geolocate its own pixels.
+    """
+    def __init__(self, name, xdim, ydim, upleft, lowright, projection,
+                 projparams=(), spherecode=None, zonecode=None,
+                 origin='HDFE_GD_UL', registration='HDFE_CENTER'):
+        self.name = name
+        self.xdim = int(xdim)
+        self.ydim = int(ydim)
+        self.upleft = tuple(float(v) for v in upleft)
+        self.lowright = tuple(float(v) for v in lowright)
+        self.projection = projection
+        self.projparams = tuple(float(v) for v in projparams)
+        self.spherecode = spherecode
+        self.zonecode = zonecode
+        self.origin = origin
+        self.registration = registration
+
+    def __repr__(self):
+        return 'Grid({0!r}, {1}x{2}, {3})'.format(self.name, self.ydim,
+                                                   self.xdim, self.projection)
+
+    @property
+    def shape(self):
+        """
+        Shape of the grid's 2-D fields, (YDim, XDim).
+        """
+        return (self.ydim, self.xdim)
+
+    @property
+    def key(self):
+        """
+        Everything that determines the pixel locations, as a hashable tuple.
+        """
+        return (self.xdim, self.ydim, self.upleft, self.lowright,
+                self.projection, self.projparams, self.spherecode,
+                self.zonecode, self.origin, self.registration)
+
+    def _ellipsoid(self):
+        p = self.projparams
+        if p and p[0] > 0:
+            if p[1] > 0:
+                return '+a={0!r} +b={1!r}'.format(p[0], p[1])
+            if p[1] < 0:
+                return '+a={0!r} +es={1!r}'.format(p[0], -p[1])
+            return '+R={0!r}'.format(p[0])
+        try:
+            return SPHERES[self.spherecode]
+        except KeyError:
+            msg = 'Unsupported GCTP sphere code {0}'.format(self.spherecode)
+            raise ValueError(msg)
+
+    @property
+    def proj4(self):
+        """
+        PROJ definition of the grid's projection, None for GCTP_GEO.
+        """
+        if self.projection == 'GCTP_GEO':
+            return None
+
+        p = self.projparams + (0.0,) * (13 - len(self.projparams))
+        false_en = '+x_0={0!r} +y_0={1!r}'.format(p[6], p[7])
+        if self.projection == 'GCTP_SNSOID':
+            args = ['+proj=sinu', '+lon_0={0!r}'.format(dms2deg(p[4])),
+                    false_en]
+        elif self.projection == 'GCTP_PS':
+            lat_ts = dms2deg(p[5])
+            args = ['+proj=stere',
+                    '+lat_0={0}'.format(-90 if lat_ts < 0 else 90),
+                    '+lat_ts={0!r}'.format(lat_ts),
+                    '+lon_0={0!r}'.format(dms2deg(p[4])), false_en]
+        elif self.projection == 'GCTP_LAMAZ':
+            args = ['+proj=laea', '+lon_0={0!r}'.format(dms2deg(p[4])),
+                    '+lat_0={0!r}'.format(dms2deg(p[5])), false_en]
+        elif self.projection in ('GCTP_BCEA', 'GCTP_CEA'):
+            args = ['+proj=cea', '+lon_0={0!r}'.format(dms2deg(p[4])),
+                    '+lat_ts={0!r}'.format(dms2deg(p[5])), false_en]
+        elif self.projection == 'GCTP_ALBERS':
+            args = ['+proj=aea', '+lat_1={0!r}'.format(dms2deg(p[2])),
+                    '+lat_2={0!r}'.format(dms2deg(p[3])),
+                    '+lon_0={0!r}'.format(dms2deg(p[4])),
+                    '+lat_0={0!r}'.format(dms2deg(p[5])), false_en]
+        elif self.projection == 'GCTP_UTM':
+            args = ['+proj=utm', '+zone={0}'.format(abs(self.zonecode))]
+            if self.zonecode < 0:
+                args.append('+south')
+        else:
+            msg = 'Unsupported grid projection {0}'.format(self.projection)
+            raise NotImplementedError(msg)
+        args.append(self._ellipsoid())
+        return ' '.join(args)
+
+    def _axis(self, index, n, start, stop, reverse):
+        """
+        Projected (or GCTP_GEO degree) coordinate of pixel indices on one axis.
+        """
+        if self.projection == 'GCTP_GEO':
+            start, stop = dms2deg(start), dms2deg(stop)
+        if self.registration == 'HDFE_CORNER':
+            offset = 0.0
+        else:
+            offset = 0.5
+        if reverse:
+            start, stop = stop, start
+        return start + (index + offset) * ((stop - start) / n)
+
+    def x(self, cols=slice(None)):
+        """
+        X coordinates of the given pixel columns.
+        """
+        index = np.arange(self.xdim)[cols]
+        reverse = self.origin in ('HDFE_GD_UR', 'HDFE_GD_LR')
+        return self._axis(index, self.xdim, self.upleft[0], self.lowright[0],
+                          reverse)
+
+    def y(self, rows=slice(None)):
+        """
+        Y coordinates of the given pixel rows.
+        """
+        index = np.arange(self.ydim)[rows]
+        reverse = self.origin in ('HDFE_GD_LL', 'HDFE_GD_LR')
+        return self._axis(index, self.ydim, self.upleft[1], self.lowright[1],
+                          reverse)
+
+    def tiles(self, rows=slice(None), cols=slice(None), tile_rows=TILE_ROWS,
+              dtype=np.float64):
+        """
+        Geolocate a window of the grid a tile of rows at a time.
+
+        Yields (tile, lat, lon) where 'tile' is the slice of output rows that
+        the latitude and longitude arrays cover.
+        """
+        x = self.x(cols)
+        y = self.y(rows)
+        for start in range(0, len(y), tile_rows):
+            tile = slice(start, min(start + tile_rows, len(y)))
+            if self.projection == 'GCTP_GEO':
+                lon = np.broadcast_to(x, (tile.stop - start, len(x)))
+                lat = np.broadcast_to(y[tile, np.newaxis], lon.shape)
+            else:
+                lon, lat = proj.transform(self.proj4, x[np.newaxis, :],
+                                          y[tile, np.newaxis], dtype=dtype)
+            yield tile, lat.astype(dtype), lon.astype(dtype)
+
+    def _compute(self, lat, lon, rows, cols):
+        """
+        Fill preallocated latitude and longitude arrays for a window.
+        """
+        x = self.x(cols)
+        y = self.y(rows)
+        proj.transform(self.proj4, x[np.newaxis, :], y[:, np.newaxis],
+                       out=(lon, lat))
+
+    def _broadcast(self, shape, dtype, rows, cols):
+        """
+        Latitude and longitude of a window of a GCTP_GEO grid, as 2-D views
+        of read-only 1-D vectors.
+        """
+        lat = self.y(rows).astype(dtype)
+        lon = self.x(cols).astype(dtype)
+        lat.flags.writeable = False
+        lon.flags.writeable = False
+        return (np.broadcast_to(lat[:, np.newaxis], shape),
+                np.broadcast_to(lon, shape))
+
+    def _persisted(self, key, shape, dtype, rows, cols):
+        """
+        Latitude and longitude of a window from the zoo cache, computed and
+        saved there first if need be.
+        """
+        path = os.path.join(cache.cache_dir('latlon'),
+                            '{0}.npy'.format(cache.digest(*key)))
+        if not os.path.exists(path):
+            tmpfile = '{0}.{1}.tmp'.format(path, os.getpid())
+            try:
+                out = np.lib.format.open_memmap(tmpfile, mode='w+',
+                                                dtype=dtype,
+                                                shape=(2,) + shape)
+                self._compute(out[0], out[1], rows, cols)
+                out.flush()
+                del out
+                os.replace(tmpfile, path)
+            finally:
+                if os.path.exists(tmpfile):
+                    os.remove(tmpfile)
+        latlon = np.load(path, mmap_mode='r')
+        return latlon[0], latlon[1]
+
+    def latlon(self, rows=slice(None), cols=slice(None), dtype=np.float64,
+               persist=None):
+        """
+        Latitude and longitude of a window of the grid.
+
+        'rows' and 'cols' are slices (strides allowed) into the grid.  The
+        result is memoized and returned read-only; copy it before changing
+        it in place.  Unless 'persist' (PERSIST by default) is false, the
+        coordinates of projected grids are kept in the zoo cache between
+        runs.  Those of GCTP_GEO grids are broadcast from 1-D vectors, so
+        they take no more memory than the vectors do.
+        """
+        if persist is None:
+            persist = PERSIST
+        rows = slice(*rows.indices(self.ydim))
+        cols = slice(*cols.indices(self.xdim))
+        key = (self.key, (rows.start, rows.stop, rows.step),
+               (cols.start, cols.stop, cols.step), np.dtype(dtype).str)
+        try:
+            result = _latlon_cache.pop(key)
+        except KeyError:
+            shape = (len(range(self.ydim)[rows]), len(range(self.xdim)[cols]))
+            if self.projection == 'GCTP_GEO':
+                result = self._broadcast(shape, dtype, rows, cols)
+            elif persist:
+                result = self._persisted(key, shape, dtype, rows, cols)
+            else:
+                lat = np.empty(shape, dtype=dtype)
+                lon = np.empty(shape, dtype=dtype)
+                self._compute(lat, lon, rows, cols)
+                lat.flags.writeable = False
+                lon.flags.writeable = False
+                result = (lat, lon)
+            while len(_latlon_cache) >= CACHE_SIZE:
+                _latlon_cache.popitem(last=False)
+        _latlon_cache[key] = result
+        return result
+
+    def axes(self, rows=slice(None), cols=slice(None), dtype=np.float64):
+        """
+        Latitude and longitude vectors of a window of a GCTP_GEO grid,
+        read-only.
+        """
+        if self.projection != 'GCTP_GEO':
+            raise ValueError('Only GCTP_GEO grids have latitude and '
+                             'longitude axes')
+        lat, lon = self.latlon(rows, cols, dtype)
+        return lat[:, 0], lon[0]
@@ -0,0 +1,154 @@
+"""
+Read oversized fields at the level of detail the figure can show.
+
+A 2400 x 2400 MODIS tile or a 3600 x 7200 CMG has many more cells than a
+figure has pixels, so the examples thin them out with fixed strides such as
+'data[::2, ::2]' or '[::10, ::10]', picked by hand for each product.  Here
+the factor is worked out from the size of the figure and its resolution,
+as the largest one that still leaves at least one cell per pixel
+
+    f = zoo.lib.reader.open_file(FILE_NAME)
+    data, rows, cols = zoo.lib.lod.read(f[DATAFIELD_NAME], method='mean')
+    lat, lon = grid.latlon(rows, cols)
+
+and each block of factor x factor cells is reduced to one by
+
+    mean    the mean of the valid values, for continuous fields
+    mode    the most frequent valid value, for categorical fields such as
+            land cover or snow flags, where a mean makes no sense
+    stride  the center cell only, which reads the fewest values
+
+'rows' and 'cols' are the slices of the block centers, to geolocate the
+result with.  With 'stride' the stride is handed down to zoo.lib.reader, so
+only the rows needed are read from disk; 'mean' and 'mode' read a band of
+whole blocks at a time, so memory stays in proportion to the result.  Cells
+past the last whole block are left out.
+"""
+import math
+
+import numpy as np
+
+METHODS = ('mean', 'mode', 'stride')
+
+# Approximate number of elements read at a time for 'mean' and 'mode'.
+CHUNK_SIZE = 1 << 20
+
+
+def factor_for(shape, figsize=None, dpi=None):
+    """
+    The largest reduction factor leaving at least one cell per pixel of a
+    figure of 'figsize' inches at 'dpi', matplotlib's defaults otherwise.
+    """
+    import matplotlib
+    if figsize is None:
+        figsize = matplotlib.rcParams['figure.figsize']
+    if dpi is None:
+        dpi = matplotlib.rcParams['savefig.dpi']
+        if dpi == 'figure':
+            dpi = matplotlib.rcParams['figure.dpi']
+    width, height = figsize[0] * dpi, figsize[1] * dpi
+    nrows, ncols = shape[-2:]
+    return max(1, int(math.floor(min(nrows / height, ncols / width))))
+
+
+def window(n, factor):
+    """
+    Slice of the centers of the whole blocks of 'factor' along an axis of
+    length n.
+    """
+    return slice(factor // 2, (n // factor) * factor, factor)
+
+
+def reduce(data, factor, method='mean'):
+    """
+    Reduce a 2-D (masked) array by 'factor' along both axes.
+    """
+    if method not in METHODS:
+        raise ValueError('Unknown reduction method {0}'.format(method))
+    rows = window(data.shape[0], factor)
+    cols = window(data.shape[1], factor)
+    if method == 'stride' or factor == 1:
+        return data[rows, cols]
+
+    nrows = data.shape[0] // factor
+    ncols = data.shape[1] // factor
+    whole = data[:nrows * factor, :ncols * factor]
+    values = np.ma.getdata(whole)
+    valid = ~np.ma.getmaskarray(whole)
+    if values.dtype.kind == 'f':
+        valid &= ~np.isnan(values)
+
+    if method == 'mean':
+        blocks = (nrows, factor, ncols, factor)
+        total = np.where(valid, values, 0).reshape(blocks).sum(axis=(1, 3),
+                                                               dtype=float)
+        count = valid.reshape(blocks).sum(axis=(1, 3))
+        empty = count == 0
+        total /= np.where(empty, 1, count)
+        return np.ma.masked_array(total, empty)
+
+    # Count the distinct values of each block, which are few for the
+    # categorical fields this is meant for.
+    block = (np.arange(nrows)[:, None, None, None] * ncols +
+             np.arange(ncols)[None, None, :, None])
+    block = np.broadcast_to(block, (nrows, factor, ncols, factor))
+    block = block.reshape(whole.shape)[valid]
+    distinct, which = np.unique(values[valid], return_inverse=True)
+    nblocks = nrows * ncols
+    empty = np.bincount(block, minlength=nblocks) == 0
+    if distinct.size == 0:
+        mode = np.zeros(nblocks, dtype=values.dtype)
+    else:
+        counts = np.bincount(block * distinct.size + which.ravel(),
+                             minlength=nblocks * distinct.size)
+        counts = counts.reshape(nblocks, distinct.size)
+        mode = distinct[counts.argmax(axis=1)]
+    return np.ma.masked_array(mode.reshape(nrows, ncols),
+                              empty.reshape(nrows, ncols))
+
+
+def read(field, factor=None, method='mean', decode=None, plane=None,
+         figsize=None, dpi=None):
+    """
+    Read a 2-D plane of a field reduced by 'factor'.
+
+    'field' is a zoo.lib.reader field, or any array.  'plane' indexes it
+    down to two dimensions, e.g. (0, slice(None), slice(None)) for the first
+    band of a 3-D field; the two slice(None) entries mark the rows and
+    columns.  Unless given, the factor is worked out for the figure as
+    factor_for() does.  'decode' is applied to the raw values before they
+    are reduced, e.g. to mask fill values and scale them.
+
+    Returns the reduced data and the slices of the block centers along the
+    rows and the columns.
+    """
+    if plane is None:
+        plane = (slice(None), slice(None))
+    axes = [i for i, k in enumerate(plane) if k == slice(None)]
+    if len(axes) != 2:
+        raise ValueError('The plane needs exactly two full slices')
+    nrows = field.shape[axes[0]]
+    ncols = field.shape[axes[1]]
+    if factor is None:
+        factor = factor_for((nrows, ncols), figsize, dpi)
+    rows = window(nrows, factor)
+    cols = window(ncols, factor)
+
+    def get(rows, cols):
+        key = list(plane)
+        key[axes[0]] = rows
+        key[axes[1]] = cols
+        data = field[tuple(key)]
+        return data if decode is None else decode(data)
+
+    if method == 'stride' or factor == 1:
+        return get(rows, cols), rows, cols
+
+    # Bands of whole blocks.
+    step = max(1, CHUNK_SIZE // (ncols * factor)) * factor
+    whole = slice(0, cols.stop)
+    parts = [reduce(get(slice(i, min(i + step, rows.stop)), whole), factor,
+                    method)
+             for i in range(0, rows.stop, step)]
+    return np.ma.concatenate(parts), rows, cols
+
@@ -0,0 +1,170 @@
+"""
+Stream MABEL photons a channel and a chunk at a time.
+
+A MABEL L2A granule holds the photons of every channel of the instrument in
+'/photon/channelNNN', with their latitude, longitude, elevation and time.
+Reading a channel with '[:]' takes memory in proportion to the number of
+photons, which runs to millions per channel.  Here the photons are read in
+hyperslabs of a fixed number of photons through zoo.lib.reader
+
+    f = zoo.lib.reader.open_file(FILE_NAME)
+    for channel in zoo.lib.mabel.channels(f):
+        for photons, c in zoo.lib.mabel.chunks(f, channel):
+            ...
+
+and summarized along track on the fly by segments(), which cuts each
+channel into segments of a fixed duration and gives, for every segment,
+the number of photons, their mean position and percentiles of their
+elevations
+
+    s = zoo.lib.mabel.segments(f, 'channel001', seconds=1.0)
+    ax.plot(s['delta_time'], s['elev'][:, 2])
+
+Photons come in time order, so a segment is a contiguous run of photons;
+only the photons of the one segment that straddles two chunks are carried
+over, and memory stays in proportion to the chunk size and the length of a
+segment, never to the whole channel.
+"""
+import collections
+import re
+
+import numpy as np
+
+GROUP = 'photon'
+FIELDS = ('latitude', 'longitude', 'elev', 'delta_time')
+
+# Photons read at a time.
+CHUNK_SIZE = 1 << 18
+
+# Default segment length in seconds and elevation percentiles.
+SEGMENT_SECONDS = 1.0
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def channels(f):
+    """
+    Names of the photon channels of an open MABEL file, in order.
+    """
+    pattern = re.compile(r'/?{0}/(channel\d+)/delta_time$'.format(GROUP))
+    found = set()
+    for name in f.keys():
+        match = pattern.match(name)
+        if match:
+            found.add(match.group(1))
+    return sorted(found)
+
+
+def field(f, channel, name):
+    """
+    A lazy field of a channel, such as 'elev' of 'channel001'.
+    """
+    return f['/{0}/{1}/{2}'.format(GROUP, channel, name)]
+
+
+def chunks(f, channel, fields=FIELDS, chunk_size=CHUNK_SIZE):
+    """
+    Read the given fields of a channel 'chunk_size' photons at a time.
+
+    Yields the slice of photons covered by each chunk and the values of its
+    fields by name.
+    """
+    proxies = [(name, field(f, channel, name)) for name in fields]
+    n = proxies[0][1].shape[0]
+    for start in range(0, n, chunk_size):
+        photons = slice(start, min(start + chunk_size, n))
+        yield photons, collections.OrderedDict(
+            (name, proxy[photons]) for name, proxy in proxies)
+
+
+def _summarize(segment, values, percentiles):
+    """
+    Counts, mean positions and elevation percentiles of the sorted segment
+    numbers of a run of photons.
+    """
+    ids, start, count = np.unique(segment, return_index=True,
+                                  return_counts=True)
+    out = collections.OrderedDict()
+    out['segment'] = ids
+    out['count'] = count
+    for name in ('latitude', 'longitude'):
+        total = np.add.reduceat(values[name], start, dtype=np.float64)
+        out[name] = total / count
+
+    # Percentiles with linear interpolation, as np.percentile does, of the
+    # elevations sorted within each segment.
+    elev = values['elev'][np.lexsort((values['elev'], segment))]
+    q = np.asarray(percentiles, dtype=float) / 100
+    pos = q[np.newaxis, :] * (count[:, np.newaxis] - 1)
+    lower = np.floor(pos).astype(np.intp)
+    frac = pos - lower
+    lower += start[:, np.newaxis]
+    upper = np.minimum(lower + 1, start[:, np.newaxis] +
+                       count[:, np.newaxis] - 1)
+    out['elev'] = elev[lower] * (1 - frac) + elev[upper] * frac
+    return out
+
+
+def _complete(segment, values, percentiles):
+    """
+    Summarize photons of complete segments, or return None if there are
+    none with a valid elevation.
+    """
+    keep = np.isfinite(values['elev'])
+    if not keep.all():
+        segment = segment[keep]
+        values = dict((name, v[keep]) for name, v in values.items())
+    if segment.size == 0:
+        return None
+    return _summarize(segment, values, percentiles)
+
+
+def segments(f, channel, seconds=SEGMENT_SECONDS, percentiles=PERCENTILES,
+             chunk_size=CHUNK_SIZE):
+    """
+    Along-track summary of a channel in segments of 'seconds'.
+
+    Photons with a non-finite elevation are left out.  Returns, by name,
+    arrays over the segments that have photons: the time of the start of
+    the segment ('delta_time'), the number of photons ('count'), their mean
+    latitude and longitude and the given percentiles of their elevations
+    ('elev', one column per percentile).
+    """
+    parts = []
+    carry = None
+    t0 = None
+    for _, values in chunks(f, channel, chunk_size=chunk_size):
+        time = values['delta_time']
+        if time.size == 0:
+            continue
+        if t0 is None:
+            t0 = time[0]
+        segment = np.floor((time - t0) / seconds).astype(np.int64)
+        if carry is not None:
+            segment = np.concatenate([carry[0], segment])
+            values = collections.OrderedDict(
+                (name, np.concatenate([carry[1][name], v]))
+                for name, v in values.items())
+        if np.any(np.diff(segment) < 0):
+            raise ValueError('MABEL photons of {0} are not in time '
+                             'order'.format(channel))
+        # Hold back the last segment, which may go on in the next chunk.
+        last = np.searchsorted(segment, segment[-1])
+        carry = (segment[last:], collections.OrderedDict(
+            (name, v[last:]) for name, v in values.items()))
+        parts.append(_complete(segment[:last], collections.OrderedDict(
+            (name, v[:last]) for name, v in values.items()), percentiles))
+    if carry is not None:
+        parts.append(_complete(carry[0], carry[1], percentiles))
+
+    parts = [p for p in parts if p is not None]
+    out = collections.OrderedDict()
+    if parts:
+        segment = np.concatenate([p['segment'] for p in parts])
+        out['delta_time'] = t0 + segment * seconds
+        for name in ('count', 'latitude', 'longitude', 'elev'):
+            out[name] = np.concatenate([p[name] for p in parts])
+    else:
+        for name in ('delta_time', 'count', 'latitude', 'longitude'):
+            out[name] = np.empty(0)
+        out['elev'] = np.empty((0, len(percentiles)))
+    return out
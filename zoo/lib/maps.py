@@ -0,0 +1,128 @@
+"""
+Reuse Basemap instances between plots with the same map settings.
+
+Constructing a Basemap reads and projects the coastline data for the map
+region, which takes seconds at resolution 'h' or 'f' (the MISR and TRMM zoom
+examples) and is repeated for every granule plotted on the same map (the
+global 'cyl' maps of GPM, SMAP, OMI and most others).  Here each distinct
+set of Basemap keyword arguments is only constructed once per process
+
+    m = zoo.lib.maps.basemap(projection='cyl', resolution='l',
+                             llcrnrlat=-90, urcrnrlat=90,
+                             llcrnrlon=-180, urcrnrlon=180)
+
+and every call gets a shallow copy of the cached instance, which shares the
+processed coastline geometry but keeps its own drawing state.  The artists
+(coastlines, parallels, meridians) still have to be drawn on each new figure.
+
+Optionally the instances are also pickled into the zoo cache (see
+zoo.lib.cache), so that later processes skip the construction as well.  This
+is off by default since a high resolution map can take tens of megabytes;
+pass persist=True or set the environment variable
+HDFEOS_ZOO_PERSIST_BASEMAPS to turn it on.
+"""
+import collections
+import copy
+import os
+import pickle
+
+import numpy as np
+
+from . import cache
+
+# Number of Basemap instances kept in memory.
+CACHE_SIZE = 16
+_basemaps = collections.OrderedDict()
+
+PERSIST = bool(os.environ.get('HDFEOS_ZOO_PERSIST_BASEMAPS'))
+
+
+def _normalize(value):
+    """
+    A hashable, repr-stable version of a keyword argument value.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def _key(kwargs):
+    import mpl_toolkits.basemap
+    items = tuple(sorted((name, _normalize(value))
+                         for name, value in kwargs.items()))
+    return cache.digest(items, mpl_toolkits.basemap.__version__)
+
+
+def _pickle_file(key):
+    return os.path.join(cache.cache_dir('basemap'), '{0}.pickle'.format(key))
+
+
+def _load(key):
+    """
+    A pickled Basemap from the zoo cache, or None.
+    """
+    path = _pickle_file(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        # Truncated, or written by an incompatible version.
+        os.remove(path)
+        return None
+
+
+def _save(key, m):
+    """
+    Pickle a Basemap into the zoo cache.
+    """
+    path = _pickle_file(key)
+    tmpfile = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmpfile, 'wb') as f:
+            pickle.dump(m, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpfile, path)
+    finally:
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+
+
+def basemap(persist=None, **kwargs):
+    """
+    A Basemap for the given keyword arguments, constructed only once.
+
+    Maps tied to an axes instance with 'ax' are not cached.
+    """
+    from mpl_toolkits.basemap import Basemap
+    if kwargs.get('ax') is not None:
+        return Basemap(**kwargs)
+    if persist is None:
+        persist = PERSIST
+
+    key = _key(kwargs)
+    try:
+        m = _basemaps.pop(key)
+    except KeyError:
+        m = _load(key) if persist else None
+        if m is None:
+            m = Basemap(**kwargs)
+            if persist:
+                _save(key, m)
+        while len(_basemaps) >= CACHE_SIZE:
+            _basemaps.popitem(last=False)
+    _basemaps[key] = m
+    m = copy.copy(m)
+    # A shallow copy would share the set of axes whose limits the map has
+    # set.
+    m._initialized_axes = set()
+    return m
+
+
+def clear():
+    """
+    Forget the Basemap instances cached in memory.
+    """
+    _basemaps.clear()
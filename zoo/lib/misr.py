@@ -0,0 +1,307 @@
+"""
+Stitch the blocks of MISR SOM grids into path images.
+
+A MISR field holds a path as 180 blocks of equal size along the Space
+Oblique Mercator (SOM) projection, one after the other in its first
+dimension.  The blocks are not aligned across track: each one is shifted
+from the one before by a whole number of pixels, recorded by HDF-EOS in the
+grid attribute '_BLKSOM:<grid name>' (a vdata of 179 relative offsets).
+Reshaping the field to (blocks * lines, samples), as the examples did,
+ignores the offsets, so the blocks come out staggered against each other.
+Here each block is placed at its own offset in a path image as wide as all
+the shifted blocks together, the pixels around it masked, and only the
+blocks asked for are read
+
+    data, lat, lon = zoo.lib.misr.read(FILE_NAME, 'Blue Radiance/RDQI',
+                                       blocks=slice(40, 60), agp=AGP_FILE)
+
+Each block is paired with the same block of GeoLatitude and GeoLongitude
+in the path's AGP (ancillary geographic product) file, read one block at a
+time as well and resampled to the field's resolution by nearest
+neighbour; the latitude and longitude of the masked margins repeat those of
+the block edges, so pcolormesh can draw the image as it is.  Blocks are
+counted from 0, as the SOMBlockDim dimension is, not from 1 as MISR block
+numbers are.
+
+The radiance fields of the L1B2 products pack a 14-bit radiance and a 2-bit
+radiometric data quality indicator (RDQI) into each 16-bit value, and their
+scale factor is the 'Scale factor' attribute of each band's grid, which
+pyhdf cannot read as a vgroup attribute, so the examples set it by hand
+from HDFView and then shifted, cast and masked the field in several whole
+array passes.  Here the scale factor is read from the grid's attribute
+vdata, and radiance and RDQI come out of one pass over the packed values
+
+    bands, lat, lon = zoo.lib.misr.read_bands(FILE_NAME, agp=AGP_FILE)
+    radiance, rdqi = bands['Blue']
+
+as float32 radiance, NaN and masked where flagged or of an RDQI above
+'max_rdqi' (by default only RDQI 3, unusable, is left out), and the uint8
+RDQI, each band's field read once.
+"""
+import collections
+
+import numpy as np
+
+from . import decode, reader, structmeta
+
+AGP_FIELDS = ('GeoLatitude', 'GeoLongitude')
+
+# The bands of the L1B2 radiance grids, '<band>Band' holding
+# '<band> Radiance/RDQI'.
+BANDS = ('Blue', 'Green', 'Red', 'NIR')
+
+# RDQI of radiances not to be used.
+RDQI_UNUSABLE = 3
+
+
+def _find_attribute(v, vs, gridname, name):
+    """
+    The reference of the vdata of attribute 'name' in the 'Grid Attributes'
+    vgroup of a grid, None if the grid has no vgroup.  Names are matched
+    without regard to case.
+    """
+    from pyhdf.HDF import HC
+    from pyhdf.error import HDF4Error
+    try:
+        grid = v.attach(v.find(gridname))
+    except HDF4Error:
+        return None
+    try:
+        for tag, ref in grid.tagrefs():
+            if tag != HC.DFTAG_VG:
+                continue
+            child = v.attach(ref)
+            try:
+                if child._name != 'Grid Attributes':
+                    continue
+                for child_tag, child_ref in child.tagrefs():
+                    if child_tag != HC.DFTAG_VH:
+                        continue
+                    vd = vs.attach(child_ref)
+                    try:
+                        # Products differ in the case of the names, e.g.
+                        # 'Scale factor' or 'Scale Factor'.
+                        if vd._name.lower() == name.lower():
+                            return child_ref
+                    finally:
+                        vd.detach()
+            finally:
+                child.detach()
+    finally:
+        grid.detach()
+    raise KeyError('No attribute {0} in grid {1}'.format(name, gridname))
+
+
+def grid_attribute(filename, gridname, name):
+    """
+    The values of an HDF-EOS2 grid attribute, kept as a vdata of the grid's
+    vgroup.  Without the vgroup, the vdata is looked up by name alone.
+    """
+    import pyhdf.VS  # HDF.vstart needs it imported.
+    import pyhdf.V  # And HDF.vgstart this.
+    from pyhdf.HDF import HDF, HC
+    from pyhdf.error import HDF4Error
+    hdf = HDF(filename, HC.READ)
+    vs = hdf.vstart()
+    v = hdf.vgstart()
+    try:
+        ref = _find_attribute(v, vs, gridname, name)
+        if ref is None:
+            try:
+                ref = vs.find(name)
+            except HDF4Error:
+                raise KeyError('No attribute {0} in grid {1} of {2}'.format(
+                    name, gridname, filename))
+        vd = vs.attach(ref)
+        try:
+            values = vd.read(vd.inquire()[0])
+        finally:
+            vd.detach()
+    finally:
+        v.end()
+        vs.end()
+        hdf.close()
+    return np.ravel(values)
+
+
+def block_offsets(filename, gridname):
+    """
+    The relative block offsets of a SOM grid in pixels of the grid: block
+    i + 1 lies offsets[i] pixels across track from block i.
+    """
+    return grid_attribute(filename, gridname,
+                          '_BLKSOM:' + gridname).astype(np.float64)
+
+
+def scale_factor(filename, gridname):
+    """
+    The radiance scale factor of an L1B2 band grid, e.g. 'BlueBand'.
+    """
+    return float(grid_attribute(filename, gridname, 'Scale factor')[0])
+
+
+def positions(filename, field, blocks=slice(None), gridname=None):
+    """
+    Across-track positions in pixels of blocks of a field, relative to the
+    leftmost of them.
+    """
+    if gridname is None:
+        gridname = structmeta.from_file(filename).find_field(field).name
+    offsets = block_offsets(filename, gridname)
+    position = np.concatenate([[0], np.cumsum(np.round(offsets))])
+    position = position.astype(np.intp)[blocks]
+    return position - position.min()
+
+
+def _resample(block, shape):
+    """
+    A block resampled to 'shape' by nearest neighbour.
+    """
+    rows = ((np.arange(shape[0]) + 0.5) *
+            (block.shape[0] / float(shape[0]))).astype(np.intp)
+    cols = ((np.arange(shape[1]) + 0.5) *
+            (block.shape[1] / float(shape[1]))).astype(np.intp)
+    return block[rows[:, np.newaxis], cols]
+
+
+def _place(out, mask, i, block, position, edge=False):
+    """
+    Put block 'i' into a path image at its across-track position.
+    """
+    ny, nx = block.shape[:2]
+    rows = slice(i * ny, (i + 1) * ny)
+    cols = slice(position, position + nx)
+    out[rows, cols] = np.ma.getdata(block)
+    if mask is not None:
+        mask[rows, cols] = np.ma.getmaskarray(block)
+    if edge:
+        out[rows, :position] = out[rows, position:position + 1]
+        last = position + nx - 1
+        out[rows, last + 1:] = out[rows, last:last + 1]
+
+
+def _image(nblocks, block_shape, position, dtype, fill):
+    """
+    An empty path image for blocks of 'block_shape' at 'position'.
+    """
+    ny, nx = block_shape[:2]
+    shape = ((nblocks * ny, nx + int(np.max(position))) +
+             tuple(block_shape[2:]))
+    return np.full(shape, fill, dtype=dtype)
+
+
+def stitch(blocks, position, fill=0, edge=False):
+    """
+    Stitch (blocks, lines, samples, ...) into a path image, placing each
+    block at its across-track position.
+
+    The margins are set to 'fill' and masked, or, with 'edge', set to the
+    values at the block edges, as for latitude and longitude.
+    """
+    out = _image(len(blocks), blocks.shape[1:], position, blocks.dtype, fill)
+    mask = None if edge else np.ones(out.shape, dtype=bool)
+    for i, p in enumerate(position):
+        _place(out, mask, i, blocks[i], p, edge)
+    if edge:
+        return out
+    return np.ma.masked_array(out, mask)
+
+
+def read(filename, field, blocks=slice(None), plane=(), agp=None,
+         gridname=None):
+    """
+    Read a range of blocks of a field as a stitched path image.
+
+    'plane' indexes the dimensions after the first three, e.g. (0,) for the
+    first band of a 4-D field.  The image is in the field's own type, with
+    its fill value in the masked margins, ready for zoo.lib.decode.  Returns
+    the image and, given the path's AGP file, its latitude and longitude,
+    else None for both.
+    """
+    f = reader.open_file(filename)[field]
+    index = range(f.shape[0])[blocks]
+    position = positions(filename, field, blocks, gridname)
+    fill = 0
+    for name in decode.FILL_ATTRS:
+        if name in f.attrs:
+            fill = np.ravel(f.attrs[name])[0]
+            break
+    plane = tuple(plane)
+    block_shape = f.shape[1:3]
+    out = _image(len(index), block_shape, position, f.dtype, fill)
+    mask = np.ones(out.shape, dtype=bool)
+    lat = lon = None
+    if agp is not None:
+        g = reader.open_file(agp)
+        geo = [g[name] for name in AGP_FIELDS]
+        lat, lon = [_image(len(index), block_shape, position, np.float64,
+                           np.nan) for _ in geo]
+
+    for i, b in enumerate(index):
+        key = (b, slice(None), slice(None)) + plane
+        _place(out, mask, i, f[key], position[i])
+        if agp is not None:
+            for image, proxy in zip((lat, lon), geo):
+                _place(image, None, i, _resample(proxy[b], block_shape),
+                       position[i], edge=True)
+    return np.ma.masked_array(out, mask), lat, lon
+
+
+def radiance(raw, scale, max_rdqi=RDQI_UNUSABLE - 1, masked=True,
+             chunk_size=decode.CHUNK_SIZE):
+    """
+    Split packed RDQI values into float32 radiance and uint8 RDQI.
+
+    Radiances above zoo.lib.decode.RDQI_MAX are flags, and they are NaN,
+    as are those of an RDQI above 'max_rdqi' and masked values of 'raw'.
+    Returns the radiance, masked unless 'masked' is False, and the RDQI.
+    """
+    packed = np.ma.getdata(raw).reshape(-1)
+    invalid = None
+    if np.ma.is_masked(raw):
+        invalid = np.ma.getmaskarray(raw).reshape(-1)
+    out = np.empty(packed.shape, dtype=np.float32)
+    rdqi = np.empty(packed.shape, dtype=np.uint8)
+    mask = np.empty(packed.shape, dtype=bool)
+    scale = np.float32(scale)
+    for start in range(0, packed.size, chunk_size):
+        part = slice(start, start + chunk_size)
+        p = packed[part]
+        np.bitwise_and(p, 3, out=rdqi[part], casting='unsafe')
+        dn = np.right_shift(p, 2)
+        bad = np.greater(dn, decode.RDQI_MAX, out=mask[part])
+        bad |= rdqi[part] > max_rdqi
+        if invalid is not None:
+            bad |= invalid[part]
+        o = out[part]
+        np.multiply(dn, scale, out=o, dtype=np.float32)
+        np.copyto(o, np.nan, where=bad)
+
+    shape = np.shape(raw)
+    out = out.reshape(shape)
+    if masked:
+        out = np.ma.masked_array(out, mask.reshape(shape))
+    return out, rdqi.reshape(shape)
+
+
+def read_bands(filename, bands=BANDS, blocks=slice(None), agp=None,
+               max_rdqi=RDQI_UNUSABLE - 1):
+    """
+    Read the radiance and RDQI of L1B2 bands as stitched path images.
+
+    Returns an OrderedDict of (radiance, rdqi) by band, see radiance(), and,
+    given the path's AGP file, the latitude and longitude at the resolution
+    of the first band, else None for both.
+    """
+    out = collections.OrderedDict()
+    lat = lon = None
+    for i, band in enumerate(bands):
+        gridname = '{0}Band'.format(band)
+        data, la, lo = read(filename, '{0} Radiance/RDQI'.format(band),
+                            blocks, agp=agp if i == 0 else None,
+                            gridname=gridname)
+        if i == 0:
+            lat, lon = la, lo
+        out[band] = radiance(data, scale_factor(filename, gridname),
+                             max_rdqi)
+    return out, lat, lon
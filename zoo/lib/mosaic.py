@@ -0,0 +1,239 @@
+"""
+Mosaic MODIS sinusoidal tiles over a region, reading only what it covers.
+
+The MODIS land and snow products come in tiles of 10 x 10 degrees at the
+equator, 36 across and 18 down the globe in the sinusoidal projection, each
+one file (MOD09GA h10v08, MYD29P1D h09v07, ...) that the examples read and
+plot on its own.  The tiles are cut from one global grid of pixels, so the
+pixels of any region are a window of that grid, and the part of it in a
+tile is a hyperslab of the tile's field.  Here the window of a bounding box
+is worked out from the tiling, and only the rows and columns of the tiles
+it overlaps are read, through zoo.lib.reader, straight into one array of the
+field's own packed type
+
+    m = zoo.lib.mosaic.Mosaic(zoo.lib.mosaic.find_tiles('MOD09GA.*.hdf'),
+                              'sur_refl_b01_1')
+    rows, cols = m.window(south=25, north=50, west=-125, east=-65)
+    data = m.read(rows, cols, workers=4)
+    lat, lon = m.grid(rows, cols).latlon()
+
+Tiles are opened only when a window overlaps them, and with 'workers' they
+are read by that many processes.  A stride in 'rows' and 'cols' thins the
+mosaic out, e.g. slice(r0, r1, 4), and only the rows it keeps are read.
+Pixels without a tile are set to the field's fill value and masked, so the
+mosaic can be decoded as a tile would be (see zoo.lib.decode).  reproject()
+resamples a mosaic, or any MODIS sinusoidal grid, onto latitude and
+longitude by nearest neighbour.
+"""
+import glob
+import math
+import multiprocessing
+import os
+import re
+
+import numpy as np
+
+from . import reader
+from . import grid as gridlib
+
+# The MODIS sinusoidal tiling: 36 x 18 tiles on a sphere of radius R.
+R = 6371007.181
+NH = 36
+NV = 18
+TILE_SIZE = 2 * math.pi * R / NH
+XMIN = -NH / 2 * TILE_SIZE
+YMAX = NV / 2 * TILE_SIZE
+
+TILE_NAME = re.compile(r'\.h(\d\d)v(\d\d)\.')
+
+# Output rows resampled at a time by reproject().
+TILE_ROWS = 256
+
+
+def find_tiles(pattern):
+    """
+    Tile files matching a glob pattern, by (h, v) as found in their names.
+    """
+    tiles = {}
+    for filename in sorted(glob.glob(pattern)):
+        match = TILE_NAME.search(os.path.basename(filename))
+        if match:
+            tiles[(int(match.group(1)), int(match.group(2)))] = filename
+    return tiles
+
+
+def _overlap(r, lo, hi):
+    """
+    The positions in range 'r' of its values in [lo, hi), as a slice, and
+    those values less lo, as a slice, or None if there are none.
+    """
+    first = max(0, -(-(lo - r.start) // r.step))
+    last = min(len(r), -(-(hi - r.start) // r.step))
+    if first >= last:
+        return None
+    return (slice(first, last),
+            slice(r[first] - lo, r[last - 1] - lo + 1, r.step))
+
+
+def _read(job):
+    """
+    Read a hyperslab of a field of a file.
+    """
+    filename, name, key = job
+    return np.ma.getdata(reader.open_file(filename)[name][key])
+
+
+class Mosaic(object):
+    """
+    The global grid of pixels of a field of MODIS sinusoidal tile files.
+    """
+    def __init__(self, tiles, field):
+        if not tiles:
+            raise ValueError('No tiles to mosaic')
+        self.tiles = dict(tiles)
+        self.field = field
+        first = reader.open_file(self.tiles[min(self.tiles)])[field]
+        if len(first.shape) != 2 or first.shape[0] != first.shape[1]:
+            raise ValueError('{0} is not a 2-D tile field'.format(field))
+        self.size = first.shape[0]
+        self.dtype = first.dtype
+        self.attrs = first.attrs
+        self.shape = (NV * self.size, NH * self.size)
+
+    def __repr__(self):
+        return 'Mosaic({0!r}, {1} tiles of {2})'.format(
+            self.field, len(self.tiles), self.size)
+
+    @property
+    def pixel_size(self):
+        """
+        Size of a pixel in meters.
+        """
+        return TILE_SIZE / self.size
+
+    def window(self, south, north, west, east):
+        """
+        Slices of the global rows and columns covering a bounding box.
+        """
+        lats = (south, north, min(max(0.0, south), north))
+        xs = [R * math.radians(lon) * math.cos(math.radians(lat))
+              for lon in (west, east) for lat in lats]
+        pixel = self.pixel_size
+        r0 = int(math.floor((YMAX - R * math.radians(north)) / pixel))
+        r1 = int(math.ceil((YMAX - R * math.radians(south)) / pixel))
+        c0 = int(math.floor((min(xs) - XMIN) / pixel))
+        c1 = int(math.ceil((max(xs) - XMIN) / pixel))
+        return (slice(max(0, r0), min(self.shape[0], r1)),
+                slice(max(0, c0), min(self.shape[1], c1)))
+
+    def needed(self, rows, cols):
+        """
+        The (h, v) of the tiles a window overlaps, whether there are files
+        for them or not.
+        """
+        r = range(self.shape[0])[rows]
+        c = range(self.shape[1])[cols]
+        n = self.size
+        return [(h, v) for v in range(NV) for h in range(NH)
+                if _overlap(r, v * n, (v + 1) * n) and
+                _overlap(c, h * n, (h + 1) * n)]
+
+    def read(self, rows, cols, workers=None):
+        """
+        Read a window of global rows and columns (slices, strides allowed)
+        in the field's own type, masked where there is no tile.
+        """
+        r = range(self.shape[0])[rows]
+        c = range(self.shape[1])[cols]
+        fill = 0
+        for name in ('_FillValue', 'MissingValue', 'missing_value'):
+            if name in self.attrs:
+                fill = np.ravel(self.attrs[name])[0]
+                break
+        data = np.full((len(r), len(c)), fill, dtype=self.dtype)
+        mask = np.ones(data.shape, dtype=bool)
+
+        n = self.size
+        jobs = []
+        places = []
+        for h, v in self.needed(rows, cols):
+            if (h, v) not in self.tiles:
+                continue
+            out_rows, tile_rows = _overlap(r, v * n, (v + 1) * n)
+            out_cols, tile_cols = _overlap(c, h * n, (h + 1) * n)
+            jobs.append((self.tiles[(h, v)], self.field,
+                         (tile_rows, tile_cols)))
+            places.append((out_rows, out_cols))
+
+        if workers and len(jobs) > 1:
+            if 'fork' in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context('fork')
+            else:
+                ctx = multiprocessing.get_context()
+            pool = ctx.Pool(min(workers, len(jobs)))
+            try:
+                parts = pool.imap(_read, jobs)
+                for place, part in zip(places, parts):
+                    data[place] = part
+                    mask[place] = False
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for place, job in zip(places, jobs):
+                data[place] = _read(job)
+                mask[place] = False
+        return np.ma.masked_array(data, mask)
+
+    def grid(self, rows, cols):
+        """
+        The zoo.lib.grid Grid of a window, to geolocate it with.
+        """
+        r = range(self.shape[0])[rows]
+        c = range(self.shape[1])[cols]
+        pixel = self.pixel_size
+        x0 = XMIN + (c.start + 0.5 - 0.5 * c.step) * pixel
+        y0 = YMAX - (r.start + 0.5 - 0.5 * r.step) * pixel
+        return gridlib.Grid('mosaic', len(c), len(r), (x0, y0),
+                            (x0 + len(c) * c.step * pixel,
+                             y0 - len(r) * r.step * pixel),
+                            'GCTP_SNSOID', projparams=(R,) + (0.0,) * 12)
+
+
+def reproject(data, grid, south, north, west, east, resolution):
+    """
+    Resample data on a MODIS sinusoidal zoo.lib.grid Grid with its origin
+    at the upper left, such as a mosaic window's or a tile's, onto a
+    bounding box in cells of 'resolution' degrees, by nearest neighbour.
+
+    Returns the resampled masked array, its first row the northernmost,
+    and its geographic zoo.lib.grid Grid.
+    """
+    nrows = max(1, int(round((north - south) / float(resolution))))
+    ncols = max(1, int(round((east - west) / float(resolution))))
+    out_grid = gridlib.Grid('latlon', ncols, nrows,
+                            (gridlib.deg2dms(west), gridlib.deg2dms(north)),
+                            (gridlib.deg2dms(east), gridlib.deg2dms(south)),
+                            'GCTP_GEO')
+    lat, lon = out_grid.axes()
+    x0 = grid.x(slice(0, 1))[0]
+    y0 = grid.y(slice(0, 1))[0]
+    dx = (grid.lowright[0] - grid.upleft[0]) / grid.xdim
+    dy = (grid.lowright[1] - grid.upleft[1]) / grid.ydim
+    values = np.ma.getdata(data)
+    invalid = np.ma.getmaskarray(data)
+
+    out = np.zeros((nrows, ncols), dtype=values.dtype)
+    mask = np.ones(out.shape, dtype=bool)
+    lam = np.radians(lon)[np.newaxis, :]
+    for start in range(0, nrows, TILE_ROWS):
+        tile = slice(start, min(start + TILE_ROWS, nrows))
+        phi = np.radians(lat[tile])[:, np.newaxis]
+        col = np.round((R * lam * np.cos(phi) - x0) / dx).astype(np.intp)
+        row = np.round((R * phi - y0) / dy).astype(np.intp)
+        row = np.broadcast_to(row, col.shape)
+        inside = ((row >= 0) & (row < grid.ydim) & (col >= 0) &
+                  (col < grid.xdim))
+        out[tile][inside] = values[row[inside], col[inside]]
+        mask[tile][inside] = invalid[row[inside], col[inside]]
+    return np.ma.masked_array(out, mask), out_grid
@@ -0,0 +1,104 @@
+"""
+Geolocation helpers for OBPG Level-2 swath files.
+
+OBPG Level-2 files store latitude and longitude only at a subset of the pixel
+columns, the "control points".  The global attribute 'Number of Pixel Control
+Points' gives how many there are and the 'cntl_pt_cols' dataset gives the
+(1-based) pixel column of each one.  The data fields themselves are stored at
+full swath width, e.g. sst[2724][1968] while latitude[2724][247].
+"""
+
+import numpy as np
+
+
+def expand_control_points(cp, cntl_pt_cols, ncols=None):
+    """
+    Linearly interpolate control point values out to full swath width.
+
+    Parameters
+    ----------
+    cp : array_like
+        Control point values, shape (nscans, ncontrol).
+    cntl_pt_cols : array_like
+        1-based pixel column of each control point, shape (ncontrol,).  The
+        spacing does not need to be uniform; the last step is usually shorter
+        than the others.
+    ncols : int, optional
+        Number of pixel columns in the output.  Defaults to the column of the
+        last control point.  Columns past the last control point are
+        extrapolated from the last segment.
+
+    Returns
+    -------
+    ndarray
+        Interpolated values, shape (nscans, ncols), float64.
+    """
+    cp = np.asarray(cp, dtype=np.float64)
+    cols = np.asarray(cntl_pt_cols, dtype=np.intp) - 1
+    if ncols is None:
+        ncols = cols[-1] + 1
+
+    # For every output column, find the control point segment it falls in and
+    # how far along that segment it is.
+    x = np.arange(ncols)
+    seg = np.searchsorted(cols, x, side='right') - 1
+    seg = np.clip(seg, 0, len(cols) - 2)
+    k = (x - cols[seg]).astype(np.float64)
+
+    # Same arithmetic as np.linspace(a, b, n+1)[k], i.e. a + k * ((b - a) / n).
+    step = np.diff(cp, axis=1)
+    step /= np.diff(cols)
+    out = step.take(seg, axis=1)
+    out *= k
+    out += cp.take(seg, axis=1)
+    return out
+
+
+def expand_longitude(cp, cntl_pt_cols, ncols=None):
+    """
+    Same as expand_control_points, but safe across the dateline.
+
+    The longitudes are unwrapped along each scan before interpolating and
+    wrapped back into [-180, 180) afterwards, so a segment that crosses the
+    dateline is not interpolated the long way around the globe.
+    """
+    cp = np.array(cp, dtype=np.float64)
+    wraps = np.cumsum(np.round(np.diff(cp, axis=1) / 360), axis=1)
+    cp[:, 1:] -= 360 * wraps
+    out = expand_control_points(cp, cntl_pt_cols, ncols)
+
+    # Only touch the values that left the valid range so that scans which
+    # never cross the dateline come out bit-for-bit unchanged.
+    outside = np.logical_or(out < -180, out >= 180)
+    if outside.any():
+        out[outside] = np.mod(out[outside] + 180, 360) - 180
+    return out
+
+
+def geolocation(hdf, ncols=None):
+    """
+    Read and expand the latitude/longitude of an OBPG Level-2 file.
+
+    Parameters
+    ----------
+    hdf : pyhdf.SD.SD
+        Open OBPG Level-2 file.
+    ncols : int, optional
+        Swath width of the data fields.  Defaults to the column of the last
+        control point.
+
+    Returns
+    -------
+    latitude, longitude : ndarray
+        Full resolution geolocation, shape (nscans, ncols).
+    """
+    gattrs = hdf.attributes(full=1)
+    nopcp = gattrs['Number of Pixel Control Points'][0]
+    cpc = hdf.select('cntl_pt_cols')[:][:nopcp]
+
+    lat = hdf.select('latitude')[:,:nopcp]
+    lon = hdf.select('longitude')[:,:nopcp]
+
+    latitude = expand_control_points(lat, cpc, ncols)
+    longitude = expand_longitude(lon, cpc, ncols)
+    return latitude, longitude
@@ -0,0 +1,226 @@
+"""
+Break the run time of an example down into phases.
+
+While a Profile is active the library calls the examples spend their time in
+are wrapped, and the time (and optionally the peak memory allocated) of each
+call is charged to a phase:
+
+    read         opening files and reading fields (pyhdf, h5py, GDAL,
+                 zoo.lib.reader)
+    decode       reading attributes and zoo.lib.decode
+    geolocation  dumper output (genfromtxt, zoo.lib.geocache), pyproj
+                 transforms, control point interpolation, zoo.lib.grid and
+                 zoo.lib.swath
+    basemap      constructing Basemap instances, or getting them from
+                 zoo.lib.maps
+    coastlines   coastlines, countries, map boundaries
+    graticule    parallels and meridians
+    plot         pcolormesh, scatter, plot, contourf, imshow, zoo.lib.raster
+    colorbar     colorbars
+    savefig      rendering and writing the image
+
+    with zoo.lib.profiling.Profile() as prof:
+        zoo.laads.mod.MOD06_L2_Cloud_Optical_Thickness.run(FILE_NAME)
+    prof.report()
+
+A call made from inside another wrapped call is charged to the outer one, so
+the phases never overlap, and whatever is left over (numpy arithmetic in the
+example itself, mostly) is reported as 'other'.  Memory is measured with
+tracemalloc, which sees numpy arrays but not the HDF libraries' own buffers.
+netCDF4 classes are extension types that cannot be wrapped, so netCDF4 reads
+are only seen when they go through zoo.lib.reader.
+
+'python -m zoo.batch --profile' collects these reports for every example.
+"""
+import collections
+import functools
+import importlib
+import time
+import tracemalloc
+
+# (module, attribute) of the calls charged to each phase, where the attribute
+# may be 'Class.method'.  Anything that cannot be imported is skipped.
+PHASES = collections.OrderedDict([
+    ('read', [
+        ('pyhdf.SD', 'SD.__init__'),
+        ('pyhdf.SD', 'SD.select'),
+        ('pyhdf.SD', 'SDS.__getitem__'),
+        ('pyhdf.SD', 'SDS.get'),
+        ('pyhdf.HDF', 'HDF.__init__'),
+        ('h5py', 'File.__init__'),
+        ('h5py', 'Dataset.__getitem__'),
+        ('osgeo.gdal', 'Open'),
+        ('zoo.lib.reader', 'open_file'),
+        ('zoo.lib.reader', 'Field.__getitem__'),
+    ]),
+    ('decode', [
+        ('pyhdf.SD', 'SD.attributes'),
+        ('pyhdf.SD', 'SDS.attributes'),
+        ('zoo.lib.decode', 'decode'),
+    ]),
+    ('geolocation', [
+        ('numpy', 'genfromtxt'),
+        ('zoo.lib.geocache', 'load'),
+        ('pyproj', 'transform'),
+        ('pyproj', 'Proj.__call__'),
+        ('mpl_toolkits.basemap.pyproj', 'transform'),
+        ('zoo.lib.obpg', 'geolocation'),
+        ('zoo.lib.obpg', 'expand_control_points'),
+        ('zoo.lib.obpg', 'expand_longitude'),
+        ('zoo.lib.grid', 'Grid.latlon'),
+        ('zoo.lib.proj', 'transform'),
+        ('zoo.lib.swath', 'Geolocation.latlon'),
+    ]),
+    ('basemap', [
+        ('mpl_toolkits.basemap', 'Basemap.__init__'),
+        ('zoo.lib.maps', 'basemap'),
+    ]),
+    ('coastlines', [
+        ('mpl_toolkits.basemap', 'Basemap.drawcoastlines'),
+        ('mpl_toolkits.basemap', 'Basemap.drawcountries'),
+        ('mpl_toolkits.basemap', 'Basemap.drawstates'),
+        ('mpl_toolkits.basemap', 'Basemap.drawmapboundary'),
+        ('mpl_toolkits.basemap', 'Basemap.fillcontinents'),
+    ]),
+    ('graticule', [
+        ('mpl_toolkits.basemap', 'Basemap.drawparallels'),
+        ('mpl_toolkits.basemap', 'Basemap.drawmeridians'),
+    ]),
+    ('plot', [
+        ('mpl_toolkits.basemap', 'Basemap.pcolormesh'),
+        ('mpl_toolkits.basemap', 'Basemap.scatter'),
+        ('mpl_toolkits.basemap', 'Basemap.plot'),
+        ('mpl_toolkits.basemap', 'Basemap.contourf'),
+        ('mpl_toolkits.basemap', 'Basemap.imshow'),
+        ('matplotlib.axes', 'Axes.pcolormesh'),
+        ('matplotlib.axes', 'Axes.pcolor'),
+        ('matplotlib.axes', 'Axes.scatter'),
+        ('matplotlib.axes', 'Axes.plot'),
+        ('matplotlib.axes', 'Axes.contourf'),
+        ('matplotlib.axes', 'Axes.imshow'),
+        ('zoo.lib.raster', 'draw'),
+    ]),
+    ('colorbar', [
+        ('mpl_toolkits.basemap', 'Basemap.colorbar'),
+        ('matplotlib.figure', 'Figure.colorbar'),
+    ]),
+    ('savefig', [
+        ('matplotlib.figure', 'Figure.savefig'),
+    ]),
+])
+
+_MISSING = object()
+
+
+def _resolve(modname, attr):
+    """
+    The object owning the attribute and its name, or None if not importable.
+    """
+    try:
+        owner = importlib.import_module(modname)
+    except Exception:
+        return None
+    parts = attr.split('.')
+    for part in parts[:-1]:
+        owner = getattr(owner, part, None)
+        if owner is None:
+            return None
+    if not hasattr(owner, parts[-1]):
+        return None
+    return owner, parts[-1]
+
+
+class Profile(object):
+    """
+    Time (and memory) per phase of whatever runs while it is active.
+    """
+    def __init__(self, memory=True, phases=PHASES):
+        self.memory = memory
+        self.phases = phases
+        self.stats = collections.OrderedDict(
+            (name, {'time': 0.0, 'calls': 0, 'peak': 0}) for name in phases)
+        self.total = 0.0
+        self.peak = 0
+        self._patched = []
+        self._active = None
+        self._start = None
+
+    def _wrap(self, phase, func):
+        stats = self.stats[phase]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self._active is not None:
+                return func(*args, **kwargs)
+            self._active = phase
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                self.peak = max(self.peak, peak)
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats['time'] += time.perf_counter() - start
+                stats['calls'] += 1
+                if self.memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    self.peak = max(self.peak, peak)
+                    stats['peak'] = max(stats['peak'], peak - current)
+                self._active = None
+        return wrapper
+
+    def __enter__(self):
+        for phase, targets in self.phases.items():
+            for modname, attr in targets:
+                found = _resolve(modname, attr)
+                if found is None:
+                    continue
+                owner, name = found
+                own = vars(owner).get(name, _MISSING)
+                if isinstance(own, (staticmethod, classmethod)):
+                    continue
+                try:
+                    setattr(owner, name, self._wrap(phase,
+                                                    getattr(owner, name)))
+                except (TypeError, AttributeError):
+                    # Extension types cannot be patched.
+                    continue
+                self._patched.append((owner, name, own))
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._stop_tracing = True
+        else:
+            self._stop_tracing = False
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.total += time.perf_counter() - self._start
+        if self.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if self._stop_tracing:
+                tracemalloc.stop()
+        while self._patched:
+            owner, name, own = self._patched.pop()
+            if own is _MISSING:
+                # Inherited; uncover the base class attribute again.
+                delattr(owner, name)
+            else:
+                setattr(owner, name, own)
+        return False
+
+    def report(self):
+        """
+        The phase breakdown as a dictionary, fit for JSON.
+        """
+        phases = collections.OrderedDict(
+            (name, dict(stats)) for name, stats in self.stats.items())
+        other = self.total - sum(s['time'] for s in phases.values())
+        report = collections.OrderedDict()
+        report['total'] = self.total
+        report['phases'] = phases
+        report['other'] = other
+        if self.memory:
+            report['peak'] = self.peak
+        return report
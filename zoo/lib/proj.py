@@ -0,0 +1,96 @@
+"""
+Cached pyproj transformers and chunked coordinate transforms.
+
+The examples reproject grids with a fresh pair of Proj objects and the
+deprecated pyproj.transform on a full double-precision meshgrid
+
+    xv, yv = np.meshgrid(x, y)
+    sinu = pyproj.Proj("+proj=sinu +R=6371007.181 +nadgrids=@null +wktext")
+    wgs84 = pyproj.Proj("+init=EPSG:4326")
+    lon, lat = pyproj.transform(sinu, wgs84, xv, yv)
+
+which sets up the transformation again every call and allocates several
+temporaries as large as the grid.  Here one Transformer is kept per pair of
+coordinate systems, and the coordinates, which are broadcast against each
+other instead of being meshed, are transformed a block of rows at a time in
+place in a scratch buffer, straight into preallocated outputs of the type
+asked for
+
+    lon, lat = zoo.lib.proj.transform(SINUSOIDAL, x[np.newaxis, :],
+                                      y[:, np.newaxis], dtype=np.float32)
+
+Without a target, coordinates are transformed to longitude and latitude on
+the source's own datum, as Proj(x, y, inverse=True) gives them.
+"""
+import collections
+
+import numpy as np
+
+# The MODIS sinusoidal projection.
+SINUSOIDAL = '+proj=sinu +R=6371007.181 +nadgrids=@null +wktext'
+
+# Number of transformers kept.
+CACHE_SIZE = 16
+_transformers = collections.OrderedDict()
+
+# Approximate number of points transformed at a time.
+CHUNK_SIZE = 1 << 18
+
+
+def transformer(src, dst=None):
+    """
+    A pyproj Transformer from 'src' to 'dst', or to the geographic
+    coordinates of 'src', constructed only once.  Axes are in x, y
+    (longitude, latitude) order.
+    """
+    key = (src, dst)
+    try:
+        trans = _transformers.pop(key)
+    except KeyError:
+        import pyproj
+        crs = pyproj.CRS(src)
+        target = crs.geodetic_crs if dst is None else pyproj.CRS(dst)
+        trans = pyproj.Transformer.from_crs(crs, target, always_xy=True)
+        while len(_transformers) >= CACHE_SIZE:
+            _transformers.popitem(last=False)
+    _transformers[key] = trans
+    return trans
+
+
+def transform(src, x, y, dst=None, dtype=np.float64, out=None,
+              chunk_size=CHUNK_SIZE):
+    """
+    Transform x, y from 'src' to 'dst' (longitude and latitude by default).
+
+    x and y are broadcast against each other, so a grid can be given as a
+    row of x and a column of y.  The results are written into 'out', a pair
+    of arrays of the broadcast shape, if given, otherwise into new arrays of
+    type 'dtype', and returned as (x, y), that is (lon, lat).
+    """
+    trans = transformer(src, dst)
+    shape = np.broadcast(x, y).shape
+    if out is None:
+        out = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+    x = np.broadcast_to(x, shape)
+    y = np.broadcast_to(y, shape)
+    if len(shape) == 0:
+        xs, ys = trans.transform(float(x), float(y))
+        out[0][...] = xs
+        out[1][...] = ys
+        return out
+
+    # Scratch space for a block of rows, reused and transformed in place.
+    row_size = max(1, int(np.prod(shape[1:])))
+    rows = max(1, chunk_size // row_size)
+    xs = np.empty((min(rows, shape[0]),) + shape[1:])
+    ys = np.empty_like(xs)
+    for start in range(0, shape[0], rows):
+        stop = min(start + rows, shape[0])
+        bx = xs[:stop - start]
+        by = ys[:stop - start]
+        bx[...] = x[start:stop]
+        by[...] = y[start:stop]
+        trans.transform(bx, by, inplace=True)
+        out[0][start:stop] = bx
+        out[1][start:stop] = by
+    return out
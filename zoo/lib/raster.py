@@ -0,0 +1,130 @@
+"""
+Draw scattered samples as one image binned to the output pixels.
+
+Swath and along-track products are plotted sample by sample
+
+    m.scatter(longitude, latitude, c=data, s=1, cmap=plt.cm.jet,
+              edgecolors=None, linewidth=0)
+
+which costs time and memory for every one of up to millions of points when
+drawing, and writes every one of them to vector output.  Here the points are
+binned in projected coordinates into a grid of the size of the axes in
+pixels, reducing the values falling into each pixel to one, and the grid is
+drawn as a single image
+
+    zoo.lib.raster.draw(longitude, latitude, data, m=m, cmap=plt.cm.jet)
+
+so that drawing takes time in proportion to the output pixels rather than
+the input points.  The reductions are
+
+    mean    mean of the values in a pixel
+    max     largest value
+    min     smallest value
+    count   number of valid values
+    last    the value that comes last in the input, as scatter would show
+"""
+import numpy as np
+
+REDUCTIONS = ('mean', 'max', 'min', 'count', 'last')
+
+
+def bin_points(x, y, values, extent, shape, reduction='mean'):
+    """
+    Reduce values at x, y to a grid of 'shape' (rows, columns) covering
+    'extent' (xmin, xmax, ymin, ymax), its first row at ymin.
+
+    Masked and NaN values and points outside the extent are left out.
+    Returns a masked array, masked where no value fell.  'values' may be None
+    for the 'count' reduction.
+    """
+    if reduction not in REDUCTIONS:
+        raise ValueError('Unknown reduction {0}'.format(reduction))
+    x = np.ravel(x)
+    y = np.ravel(y)
+    xmin, xmax, ymin, ymax = extent
+    nrows, ncols = shape
+    keep = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+    if values is not None:
+        values = np.ma.ravel(values)
+        keep &= ~np.ma.getmaskarray(values)
+        values = np.ma.getdata(values)
+        if values.dtype.kind == 'f':
+            keep &= ~np.isnan(values)
+        values = values[keep]
+    elif reduction != 'count':
+        raise ValueError('Reduction {0} needs values'.format(reduction))
+
+    # Pixel of each point; points on the upper edges go to the last pixel.
+    col = ((x[keep] - xmin) * (ncols / float(xmax - xmin))).astype(np.intp)
+    row = ((y[keep] - ymin) * (nrows / float(ymax - ymin))).astype(np.intp)
+    np.minimum(col, ncols - 1, out=col)
+    np.minimum(row, nrows - 1, out=row)
+    index = row * ncols + col
+    del col, row
+
+    size = nrows * ncols
+    count = np.bincount(index, minlength=size)
+    empty = count == 0
+    if reduction == 'count':
+        out = count
+    elif reduction == 'mean':
+        out = np.bincount(index, weights=values, minlength=size)
+        out /= np.where(empty, 1, count)
+    elif reduction == 'last':
+        last = np.zeros(size, dtype=np.intp)
+        np.maximum.at(last, index, np.arange(index.size))
+        out = values[last] if values.size else np.zeros(size, values.dtype)
+    else:
+        if values.dtype.kind == 'f':
+            start = -np.inf if reduction == 'max' else np.inf
+        else:
+            info = np.iinfo(values.dtype)
+            start = info.min if reduction == 'max' else info.max
+        out = np.full(size, start, dtype=values.dtype)
+        ufunc = np.maximum if reduction == 'max' else np.minimum
+        ufunc.at(out, index, values)
+    return np.ma.masked_array(out.reshape(shape), empty.reshape(shape))
+
+
+def _pixels(ax):
+    """
+    Size of an axes in pixels as (rows, columns).
+    """
+    bbox = ax.get_window_extent()
+    return max(1, int(round(bbox.height))), max(1, int(round(bbox.width)))
+
+
+def draw(lon, lat, values, m=None, ax=None, reduction='mean', shape=None,
+         extent=None, **kwargs):
+    """
+    Bin values at lon, lat to pixels and draw them as a single image.
+
+    With a Basemap 'm' the points are projected and binned over the map's
+    extent, otherwise lon and lat are used as they are and binned over their
+    own range unless an extent is given.  The grid has the size of the axes
+    in pixels unless a shape (rows, columns) is given.  Further keyword
+    arguments, like cmap, vmin and vmax, go to imshow.  The image is made
+    the current one for colorbar, and returned.
+    """
+    import matplotlib.pyplot as plt
+    if ax is None:
+        ax = plt.gca() if m is None or m.ax is None else m.ax
+    if m is not None:
+        x, y = m(np.ravel(lon), np.ravel(lat))
+        if extent is None:
+            extent = (m.llcrnrx, m.urcrnrx, m.llcrnry, m.urcrnry)
+    else:
+        x, y = np.ravel(lon), np.ravel(lat)
+        if extent is None:
+            extent = (np.nanmin(x), np.nanmax(x), np.nanmin(y), np.nanmax(y))
+    if shape is None:
+        shape = _pixels(ax)
+
+    grid = bin_points(x, y, values, extent, shape, reduction)
+    kwargs.setdefault('interpolation', 'nearest')
+    kwargs.setdefault('aspect', 'auto')
+    image = ax.imshow(grid, extent=extent, origin='lower', **kwargs)
+    if m is not None:
+        m.set_axes_limits(ax=ax)
+    plt.sci(image)
+    return image
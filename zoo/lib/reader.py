@@ -0,0 +1,530 @@
+"""
+One lazy way of reading HDF4, HDF5 and netCDF fields.
+
+The examples read their fields through pyhdf, netCDF4, h5py or GDAL, each
+behind its own USE_NETCDF4 / USE_GDAL switch, and typically pull in the whole
+field with '[:]' before subsetting it.  Here a file is opened with whichever
+of those libraries is available and fastest for its format
+
+    f = zoo.lib.reader.open_file(FILE_NAME)
+    data = f['Feature_Classification_Flags'][::10, 1256]
+
+and its fields are lazy proxies: nothing is read until they are indexed, and
+then integer indices and forward slices, strides included, are handed to the
+library as a hyperslab, so only the requested elements are read.  Values come
+back raw, in the field's own type; scaling and fill values are left to the
+caller.
+
+Open files are kept in a small pool keyed on the identity of the file, so
+asking for the same file again, say once for the data and once for the
+geolocation, reuses the one open handle.  A file pushed out of the pool is
+closed, and reopened if one of its fields is read again.
+"""
+import collections
+import io
+
+import numpy as np
+
+from . import cache
+
+# Preferred libraries for each file format, fastest first.
+BACKENDS = {
+    'hdf4': ('pyhdf', 'netcdf4', 'gdal'),
+    'hdf5': ('h5py', 'netcdf4', 'gdal'),
+    'netcdf': ('netcdf4', 'gdal'),
+    None: ('gdal', 'netcdf4'),
+}
+
+# Number of files kept open by open_file.
+MAX_OPEN = 32
+_files = collections.OrderedDict()
+
+
+def file_format(filename):
+    """
+    Sniff the format of a file from its signature: hdf4, hdf5, netcdf or None.
+    """
+    with io.open(filename, 'rb') as f:
+        head = f.read(4)
+        if head == b'\x0e\x03\x13\x01':
+            return 'hdf4'
+        if head[:3] == b'CDF':
+            return 'netcdf'
+        # The HDF5 superblock may follow a user block of 512, 1024, ... bytes.
+        offset = 0
+        while True:
+            f.seek(offset)
+            head = f.read(8)
+            if len(head) < 8:
+                return None
+            if head == b'\x89HDF\r\n\x1a\n':
+                return 'hdf5'
+            offset = 512 if offset == 0 else offset * 2
+
+
+def _hyperslab(key, shape):
+    """
+    Split an index into a strided hyperslab the libraries can read directly.
+
+    Returns (start, count, stride, post) where 'post' is the index still to
+    apply to the hyperslab read: it drops the axes that were indexed with an
+    integer and applies whatever could not be pushed down (negative steps,
+    index arrays) to the whole extent of its axis.
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    if any(k is Ellipsis for k in key):
+        i = [k is Ellipsis for k in key].index(True)
+        fill = (slice(None),) * (len(shape) - len(key) + 1)
+        key = key[:i] + fill + key[i + 1:]
+    if len(key) > len(shape):
+        raise IndexError('too many indices for field of shape {0}'.format(
+            shape))
+    key = key + (slice(None),) * (len(shape) - len(key))
+
+    start, count, stride, post = [], [], [], []
+    for k, n in zip(key, shape):
+        if isinstance(k, (int, np.integer)) and not isinstance(k, bool):
+            i = int(k) + n if k < 0 else int(k)
+            if not 0 <= i < n:
+                raise IndexError('index {0} is out of bounds for axis with '
+                                 'size {1}'.format(k, n))
+            start.append(i)
+            count.append(1)
+            stride.append(1)
+            post.append(0)
+        elif isinstance(k, slice) and (k.step is None or k.step > 0):
+            i, stop, step = k.indices(n)
+            start.append(i)
+            count.append(len(range(i, stop, step)))
+            stride.append(step)
+            post.append(slice(None))
+        else:
+            start.append(0)
+            count.append(n)
+            stride.append(1)
+            post.append(k)
+    return start, count, stride, tuple(post)
+
+
+class Field(object):
+    """
+    A lazy proxy for a field (SDS, variable, dataset or raster) of a File.
+    """
+    def __init__(self, file, name, obj, shape, dtype):
+        self.file = file
+        self.name = name
+        self.obj = obj
+        self.shape = tuple(int(n) for n in shape)
+        self.dtype = np.dtype(dtype)
+        self._attrs = None
+        self._opened = file.opened
+
+    def _object(self):
+        """
+        The library's object for the field, reopening the file if it has
+        been closed since, e.g. pushed out of the pool of open files.
+        """
+        f = self.file
+        if f.handle is None:
+            f.reopen()
+        if self._opened != f.opened:
+            self.obj = f.backend.field(f.handle, self.name)[0]
+            self._opened = f.opened
+        return self.obj
+
+    def __repr__(self):
+        return 'Field({0!r}, {1}, {2})'.format(self.name, self.shape,
+                                                self.dtype)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def attrs(self):
+        """
+        The field's attributes as a dictionary.
+        """
+        if self._attrs is None:
+            self._attrs = self.file.backend.field_attrs(self._object())
+        return self._attrs
+
+    def __getitem__(self, key):
+        start, count, stride, post = _hyperslab(key, self.shape)
+        if 0 in count:
+            data = np.empty(count, dtype=self.dtype)
+        else:
+            data = self.file.backend.read(self._object(), start, count,
+                                          stride)
+            data = np.asarray(data).reshape(count)
+        return data[post]
+
+    def __array__(self, dtype=None, copy=None):
+        # The data is read afresh, so it is always a copy.
+        if copy is False:
+            raise ValueError('A field cannot be read without a copy')
+        data = self[...]
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        return data
+
+
+class File(object):
+    """
+    An open file and the backend library reading it.
+    """
+    def __init__(self, filename, backend):
+        self.filename = filename
+        self.backend = backend
+        self.handle = backend.open(filename)
+        # Times opened, so fields know when their objects are stale.
+        self.opened = 1
+        self._fields = {}
+        self._attrs = None
+
+    def __repr__(self):
+        return 'File({0!r}, backend={1!r})'.format(self.filename,
+                                                   self.backend.name)
+
+    def keys(self):
+        """
+        Names of the fields in the file.
+        """
+        return self.backend.names(self.handle)
+
+    def __contains__(self, name):
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, name):
+        try:
+            return self._fields[name]
+        except KeyError:
+            pass
+        obj, shape, dtype = self.backend.field(self.handle, name)
+        field = Field(self, name, obj, shape, dtype)
+        self._fields[name] = field
+        return field
+
+    @property
+    def attrs(self):
+        """
+        The file's global attributes as a dictionary.
+        """
+        if self._attrs is None:
+            self._attrs = self.backend.file_attrs(self.handle)
+        return self._attrs
+
+    def reopen(self):
+        """
+        Open a closed file again, back in the pool of open files.
+        """
+        if self.handle is None:
+            self.handle = self.backend.open(self.filename)
+            self.opened += 1
+            _add((cache.file_state(self.filename), self.backend.name), self)
+
+    def close(self):
+        """
+        Close the file and drop it from the pool of open files.  Fields
+        already taken from it reopen it when read.
+        """
+        for key, f in list(_files.items()):
+            if f is self:
+                del _files[key]
+        if self.handle is not None:
+            self.backend.close(self.handle)
+            self.handle = None
+            self._fields = {}
+
+
+class _Pyhdf(object):
+    name = 'pyhdf'
+
+    def __init__(self):
+        from pyhdf.SD import SD, SDC
+        self.SD = SD
+        self.SDC = SDC
+        self.dtypes = {
+            SDC.CHAR8: 'S1', SDC.UCHAR8: np.uint8,
+            SDC.INT8: np.int8, SDC.UINT8: np.uint8,
+            SDC.INT16: np.int16, SDC.UINT16: np.uint16,
+            SDC.INT32: np.int32, SDC.UINT32: np.uint32,
+            SDC.FLOAT32: np.float32, SDC.FLOAT64: np.float64,
+        }
+
+    def open(self, filename):
+        return self.SD(filename, self.SDC.READ)
+
+    def names(self, handle):
+        return list(handle.datasets())
+
+    def field(self, handle, name):
+        from pyhdf.error import HDF4Error
+        try:
+            sds = handle.select(name)
+        except HDF4Error:
+            raise KeyError(name)
+        _, rank, dims, datatype, _ = sds.info()
+        if rank == 1:
+            dims = [dims]
+        return sds, dims, self.dtypes[datatype]
+
+    def read(self, sds, start, count, stride):
+        # The HDF4 library strides along the fastest varying axis one element
+        # at a time, which is slower than reading the whole run of it.
+        step = stride[-1]
+        if step > 1:
+            count = count[:-1] + [(count[-1] - 1) * step + 1]
+            stride = stride[:-1] + [1]
+        data = sds.get(start=start, count=count, stride=stride)
+        return data[..., ::step]
+
+    def field_attrs(self, sds):
+        return sds.attributes()
+
+    def file_attrs(self, handle):
+        return handle.attributes()
+
+    def close(self, handle):
+        handle.end()
+
+
+class _Netcdf4(object):
+    name = 'netcdf4'
+
+    def __init__(self):
+        from netCDF4 import Dataset
+        self.Dataset = Dataset
+
+    def open(self, filename):
+        return self.Dataset(filename)
+
+    def names(self, handle):
+        names = []
+        groups = [('', handle)]
+        while groups:
+            path, group = groups.pop(0)
+            names.extend(path + name for name in group.variables)
+            groups.extend((path + name + '/', child)
+                          for name, child in group.groups.items())
+        return names
+
+    def field(self, handle, name):
+        group = handle
+        parts = name.strip('/').split('/')
+        try:
+            for part in parts[:-1]:
+                group = group.groups[part]
+            var = group.variables[parts[-1]]
+        except KeyError:
+            raise KeyError(name)
+        var.set_auto_maskandscale(False)
+        return var, var.shape, var.dtype
+
+    def read(self, var, start, count, stride):
+        index = tuple(slice(i, i + (n - 1) * s + 1, s)
+                      for i, n, s in zip(start, count, stride))
+        return var[index]
+
+    def field_attrs(self, var):
+        return dict((name, var.getncattr(name)) for name in var.ncattrs())
+
+    def file_attrs(self, handle):
+        return dict((name, handle.getncattr(name))
+                    for name in handle.ncattrs())
+
+    def close(self, handle):
+        handle.close()
+
+
+class _H5py(object):
+    name = 'h5py'
+
+    def __init__(self):
+        import h5py
+        self.h5py = h5py
+
+    def open(self, filename):
+        return self.h5py.File(filename, 'r')
+
+    def names(self, handle):
+        names = []
+
+        def visit(name, obj):
+            if isinstance(obj, self.h5py.Dataset):
+                names.append(name)
+        handle.visititems(visit)
+        return names
+
+    def field(self, handle, name):
+        dset = handle.get(name)
+        if not isinstance(dset, self.h5py.Dataset):
+            raise KeyError(name)
+        return dset, dset.shape, dset.dtype
+
+    def read(self, dset, start, count, stride):
+        index = tuple(slice(i, i + (n - 1) * s + 1, s)
+                      for i, n, s in zip(start, count, stride))
+        return dset[index]
+
+    def field_attrs(self, dset):
+        return dict(dset.attrs)
+
+    def file_attrs(self, handle):
+        return dict(handle.attrs)
+
+    def close(self, handle):
+        handle.close()
+
+
+class _Gdal(object):
+    """
+    GDAL fields are rasters of shape (YSize, XSize), or (bands, YSize, XSize)
+    when there is more than one band, as ReadAsArray gives them.  GDAL only
+    reads windows, so strides are taken once the window is read, and its
+    attributes are strings.
+    """
+    name = 'gdal'
+
+    def __init__(self):
+        try:
+            from osgeo import gdal
+        except ImportError:
+            import gdal
+        from osgeo import gdal_array
+        self.gdal = gdal
+        self.gdal_array = gdal_array
+
+    def open(self, filename):
+        gdset = self.gdal.Open(filename)
+        if gdset is None:
+            raise IOError('GDAL cannot open {0}'.format(filename))
+        return gdset
+
+    def _subdatasets(self, gdset):
+        subdatasets = collections.OrderedDict()
+        for subname, description in gdset.GetSubDatasets():
+            # HDF-EOS subdatasets end with the field name, plain HDF4 and
+            # netCDF ones are described as '[dims] name (type)'.
+            subdatasets[subname.split(':')[-1].strip('"')] = subname
+            words = description.split()
+            if len(words) > 1:
+                subdatasets.setdefault(words[1], subname)
+        return subdatasets
+
+    def names(self, gdset):
+        subdatasets = self._subdatasets(gdset)
+        return list(subdatasets) if subdatasets else [gdset.GetDescription()]
+
+    def field(self, gdset, name):
+        subdatasets = self._subdatasets(gdset)
+        if subdatasets:
+            try:
+                raster = self.open(subdatasets[name])
+            except KeyError:
+                raise KeyError(name)
+        elif name == gdset.GetDescription():
+            raster = gdset
+        else:
+            raise KeyError(name)
+        shape = (raster.RasterYSize, raster.RasterXSize)
+        if raster.RasterCount > 1:
+            shape = (raster.RasterCount,) + shape
+        typecode = raster.GetRasterBand(1).DataType
+        dtype = self.gdal_array.GDALTypeCodeToNumericTypeCode(typecode)
+        return raster, shape, dtype
+
+    def read(self, raster, start, count, stride):
+        stop = [i + (n - 1) * s + 1 for i, n, s in zip(start, count, stride)]
+        window = (start[-1], start[-2], stop[-1] - start[-1],
+                  stop[-2] - start[-2])
+        if raster.RasterCount > 1:
+            bands = range(start[0], stop[0], stride[0])
+            data = np.array([raster.GetRasterBand(b + 1).ReadAsArray(*window)
+                             for b in bands])
+        else:
+            data = raster.GetRasterBand(1).ReadAsArray(*window)
+        return data[..., ::stride[-2], ::stride[-1]]
+
+    def field_attrs(self, raster):
+        return raster.GetMetadata()
+
+    def file_attrs(self, gdset):
+        return gdset.GetMetadata()
+
+    def close(self, gdset):
+        pass
+
+
+_BACKEND_CLASSES = {
+    'pyhdf': _Pyhdf,
+    'netcdf4': _Netcdf4,
+    'h5py': _H5py,
+    'gdal': _Gdal,
+}
+
+
+def open_file(filename, backend=None):
+    """
+    Open a file, or return it from the pool if it is already open.
+
+    Unless a backend ('pyhdf', 'netcdf4', 'h5py' or 'gdal') is named, the
+    fastest library installed that can open the file is used.
+    """
+    if backend is None:
+        names = BACKENDS[file_format(filename)]
+    else:
+        names = (backend,)
+    state = cache.file_state(filename)
+    for name in names:
+        try:
+            f = _files.pop((state, name))
+        except KeyError:
+            continue
+        _files[(state, name)] = f
+        return f
+
+    error = None
+    for name in names:
+        try:
+            f = File(filename, _BACKEND_CLASSES[name]())
+        except Exception as e:
+            # Not installed, or built without support for this format.
+            error = e
+            continue
+        _add((state, name), f)
+        return f
+    raise IOError('Cannot open {0} with {1}: {2}'.format(
+        filename, ', '.join(names), error))
+
+
+def _add(key, f):
+    """
+    Put an open file into the pool, closing the least recently used files
+    to make room.
+    """
+    while len(_files) >= MAX_OPEN:
+        _, oldest = _files.popitem(last=False)
+        oldest.close()
+    _files[key] = f
+
+
+def close_all():
+    """
+    Close every file in the pool.
+    """
+    while _files:
+        _, f = _files.popitem(last=False)
+        f.close()
@@ -0,0 +1,379 @@
+"""
+Repackage HDF-EOS2 grids and swaths as chunked, compressed CF datasets.
+
+An HDF4 SDS is stored in one piece, contiguous or compressed as a whole, so
+a 1 x 1 degree window of an MCD43C1 albedo (3600 x 7200 x bands), a MOD13C2
+NDVI or an OBPG 4 km map can only be had by reading and decompressing most
+of the field through pyhdf.  Here the fields of one grid or swath are copied
+once, a band of rows at a time, into a NetCDF-4 file, or a Zarr store if the
+target ends in '.zarr', cut into chunks of CHUNK x CHUNK cells that are
+compressed one by one
+
+    zoo.lib.repack.repack(FILE_NAME, 'MCD43C1.nc', ['Albedo_BSA_vis'])
+
+so that a window only reads and decompresses the chunks it overlaps
+
+    f = zoo.lib.reader.open_file('MCD43C1.nc')
+    data = f['Albedo_BSA_vis'][1000:1020, 3600:3620]
+
+The packed values are copied as they are, with their scale and offset
+rewritten in the CF convention (see zoo.lib.decode), so netCDF4, xarray and
+decode(convention='cf') all unpack them alike.  CF coordinates are derived
+from StructMetadata: latitude and longitude axes for geographic grids; x and
+y axes, a grid mapping and 2-D latitude and longitude for projected grids
+(see zoo.lib.grid); 2-D latitude and longitude interpolated to the data
+resolution for swaths (see zoo.lib.swath).  Products that are not HDF-EOS,
+such as the OBPG level 3 maps, can be given their grid instead
+
+    zoo.lib.repack.repack(FILE_NAME, 'chlor_a.nc', ['l3m_data'],
+                          grid=zoo.lib.grid.standard('obpg_4km'))
+
+netCDF4 is needed to write NetCDF-4 targets and zarr to write Zarr stores,
+which are compressed with zarr's default compressor.
+"""
+import os
+import re
+import shutil
+
+import numpy as np
+
+from . import decode, reader, structmeta
+from . import grid as gridlib
+from . import swath as swathlib
+
+# Cells along each horizontal axis of a chunk.
+CHUNK = 128
+
+# Deflate level of NetCDF-4 targets.
+COMPLEVEL = 4
+
+LATITUDE = {'standard_name': 'latitude', 'units': 'degrees_north'}
+LONGITUDE = {'standard_name': 'longitude', 'units': 'degrees_east'}
+
+
+def cf_attrs(attrs, convention='cf'):
+    """
+    Attributes of a field with its scale and offset rewritten in the CF
+    convention and its fill value taken out.
+
+    Returns the attributes and the fill value, or None.
+    """
+    try:
+        scale_attr, offset_attr, formula = decode.CONVENTIONS[convention]
+    except KeyError:
+        raise ValueError('Unknown scaling convention {0}'.format(convention))
+    if formula == 'rdqi':
+        raise ValueError('MISR RDQI values have no CF equivalent')
+    attrs = dict(attrs)
+    fill = None
+    for name in decode.FILL_ATTRS:
+        if name in attrs:
+            fill = np.ravel(attrs.pop(name))[0]
+            break
+    scale = attrs.pop(scale_attr, None)
+    offset = attrs.pop(offset_attr, None)
+    if scale is not None:
+        scale = float(np.ravel(scale)[0])
+    if offset is not None:
+        offset = float(np.ravel(offset)[0])
+
+    if formula == 'offset_divide' and scale is not None:
+        scale = 1 / scale
+    if formula != 'scale_offset' and offset is not None:
+        offset = -offset * (1 if scale is None else scale)
+    if scale is not None:
+        attrs['scale_factor'] = scale
+    if offset is not None:
+        attrs['add_offset'] = offset
+    return attrs, fill
+
+
+def _jsonable(value):
+    """
+    An attribute value as zarr can store it.
+    """
+    if isinstance(value, bytes):
+        return value.decode('latin-1')
+    if isinstance(value, (np.ndarray, list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class _Netcdf4(object):
+    def __init__(self, path, complevel):
+        from netCDF4 import Dataset
+        self.dataset = Dataset(path, 'w', format='NETCDF4')
+        self.complevel = complevel
+
+    def dimension(self, name, size):
+        self.dataset.createDimension(name, size)
+
+    def variable(self, name, dims, dtype, chunks=None, fill=None, attrs=()):
+        var = self.dataset.createVariable(
+            name, dtype, dims, zlib=bool(chunks) and self.complevel > 0,
+            complevel=self.complevel, shuffle=True, chunksizes=chunks,
+            fill_value=fill)
+        var.set_auto_maskandscale(False)
+        var.setncatts(dict(attrs))
+        return var
+
+    def attrs(self, attrs):
+        self.dataset.setncatts(attrs)
+
+    def close(self):
+        self.dataset.close()
+
+
+class _Zarr(object):
+    def __init__(self, path, complevel):
+        import zarr
+        self.group = zarr.open_group(path, mode='w')
+        self.sizes = {}
+
+    def dimension(self, name, size):
+        self.sizes[name] = size
+
+    def variable(self, name, dims, dtype, chunks=None, fill=None, attrs=()):
+        shape = tuple(self.sizes[dim] for dim in dims)
+        array = self.group.create_dataset(name, shape=shape, dtype=dtype,
+                                          chunks=chunks or shape,
+                                          fill_value=fill)
+        attrs = dict((key, _jsonable(value))
+                     for key, value in dict(attrs).items())
+        # Dimension names as xarray records them.
+        attrs['_ARRAY_DIMENSIONS'] = list(dims)
+        array.attrs.update(attrs)
+        return array
+
+    def attrs(self, attrs):
+        self.group.attrs.update(dict((key, _jsonable(value))
+                                     for key, value in attrs.items()))
+
+    def close(self):
+        pass
+
+
+class _Target(object):
+    """
+    A NetCDF-4 file or, with 'zarr', a Zarr store being written, keeping
+    track of its dimensions.
+    """
+    def __init__(self, path, complevel, zarr=False):
+        if zarr:
+            self.store = _Zarr(path, complevel)
+        else:
+            self.store = _Netcdf4(path, complevel)
+        self.sizes = {}
+
+    def dimension(self, name, size):
+        if name not in self.sizes:
+            self.store.dimension(name, size)
+            self.sizes[name] = size
+        elif self.sizes[name] != size:
+            raise ValueError('Dimension {0} has size {1}, not {2}'.format(
+                name, self.sizes[name], size))
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+def _name(name):
+    """
+    A variable or dimension name without its HDF-EOS ':grid' suffix or
+    characters other than letters, digits and underscores.
+    """
+    return re.sub(r'\W', '_', name.split(':')[0])
+
+
+def _structure(meta, name=None, fields=None):
+    """
+    The named grid or swath, or the one holding the first field, or the
+    first grid or swath.
+    """
+    if name is not None:
+        for structures in (meta.grids, meta.swaths):
+            if name in structures:
+                return structures[name]
+        raise KeyError('No grid or swath named {0} in StructMetadata'.format(
+            name))
+    if fields:
+        return meta.find_field(fields[0])
+    if meta.grids:
+        return meta.grid()
+    return meta.swath()
+
+
+def _copy(field, var, rows_axis, rows):
+    """
+    Copy a field a band of 'rows' rows at a time.
+    """
+    n = field.shape[rows_axis]
+    for start in range(0, n, rows):
+        key = [slice(None)] * len(field.shape)
+        key[rows_axis] = slice(start, min(start + rows, n))
+        key = tuple(key)
+        var[key] = np.ma.getdata(field[key])
+
+
+def _latlon(target, dims, tiles, chunks, names=('lat', 'lon')):
+    """
+    Write 2-D latitude and longitude over 'dims' from (tile, lat, lon).
+    """
+    lat = target.variable(names[0], dims, np.float32, chunks, attrs=LATITUDE)
+    lon = target.variable(names[1], dims, np.float32, chunks,
+                          attrs=LONGITUDE)
+    for tile, tlat, tlon in tiles:
+        lat[tile] = tlat
+        lon[tile] = tlon
+
+
+def _grid_coordinates(target, grid, chunk):
+    """
+    Write the coordinates of a grid.  Returns the names of its row and
+    column dimensions and the attributes linking fields to them.
+    """
+    if grid.projection == 'GCTP_GEO':
+        dims = ('lat', 'lon')
+        lat, lon = grid.axes()
+        for dim, values, attrs in zip(dims, (lat, lon), (LATITUDE, LONGITUDE)):
+            target.dimension(dim, values.size)
+            target.variable(dim, (dim,), np.float64, attrs=attrs)[:] = values
+        return dims, {}
+
+    import pyproj
+    dims = ('y', 'x')
+    for dim, values in zip(dims, (grid.y(), grid.x())):
+        target.dimension(dim, values.size)
+        attrs = {'standard_name': 'projection_{0}_coordinate'.format(dim),
+                 'units': 'm'}
+        target.variable(dim, (dim,), np.float64, attrs=attrs)[:] = values
+    target.variable('crs', (), np.int32,
+                    attrs=pyproj.CRS(grid.proj4).to_cf())
+    chunks = (min(chunk, grid.ydim), min(chunk, grid.xdim))
+    _latlon(target, dims, grid.tiles(dtype=np.float32), chunks)
+    return dims, {'grid_mapping': 'crs', 'coordinates': 'lat lon'}
+
+
+def _dims(name, shape, dimlist, horizontal):
+    """
+    Dimension names of a field and the axes of its rows and columns.
+
+    Grid fields have 'horizontal' dimensions, found by their HDF-EOS names
+    or else as the last two; swath fields are geolocated along their last
+    two dimensions.
+    """
+    if not dimlist:
+        dimlist = ['{0}_{1}'.format(name, i) for i in range(len(shape))]
+    dims = [_name(dim) for dim in dimlist]
+    axes = [len(shape) - 2, len(shape) - 1]
+    if horizontal is not None:
+        found = [i for i, dim in enumerate(dimlist)
+                 if dim.split(':')[0] in ('YDim', 'XDim')]
+        if len(found) == 2:
+            axes = found
+        dims[axes[0]], dims[axes[1]] = horizontal
+    return dims, axes
+
+
+def _write(out, filename, fields, dimlists, eos, grid, convention,
+           scan_lines, chunk):
+    """
+    Write the coordinates and fields of a grid or swath.
+    """
+    f = reader.open_file(filename)
+    horizontal = None
+    if grid is not None:
+        horizontal, links = _grid_coordinates(out, grid, chunk)
+    coordinates = {}
+    for name in fields:
+        field = f[name]
+        shape = tuple(field.shape)
+        dims, axes = _dims(name, shape, dimlists.get(name), horizontal)
+        for dim, size in zip(dims, shape):
+            out.dimension(dim, size)
+        chunks = tuple(min(chunk, size) if i in axes else 1
+                       for i, size in enumerate(shape))
+
+        if grid is None:
+            # Fields of a swath may be geolocated at different resolutions.
+            pair = tuple(dims[-2:])
+            if pair not in coordinates:
+                suffix = '_{0}'.format(len(coordinates)) if coordinates else ''
+                names = ('lat' + suffix, 'lon' + suffix)
+                geo = swathlib.from_file(filename, name, eos.name,
+                                         scan_lines=scan_lines)
+                _latlon(out, pair, geo.tiles(dtype=np.float32), chunks[-2:],
+                        names)
+                coordinates[pair] = {'coordinates': ' '.join(names)}
+            links = coordinates[pair]
+
+        attrs, fill = cf_attrs(field.attrs, convention)
+        attrs.update(links)
+        if fill is not None:
+            fill = np.asarray(fill).astype(field.dtype)
+        var = out.variable(_name(name), tuple(dims), field.dtype, chunks,
+                           fill, attrs)
+        _copy(field, var, axes[0], chunks[axes[0]])
+    out.attrs({'Conventions': 'CF-1.8', 'source': os.path.basename(filename)})
+
+
+def repack(filename, target, fields=None, structure=None, grid=None,
+           convention='cf', scan_lines=None, chunk=CHUNK,
+           complevel=COMPLEVEL):
+    """
+    Copy fields of a grid or swath of an HDF-EOS2 file into a chunked,
+    compressed NetCDF-4 file or Zarr store with CF coordinates.
+
+    By default all data fields of the grid or swath named 'structure', or of
+    the one holding the first of 'fields', or of the first grid, are copied.
+    Given a zoo.lib.grid Grid, StructMetadata is not read and the fields,
+    which must be named, have the grid's rows and columns as their last two
+    dimensions.  'convention' is the scaling convention of the fields (see
+    zoo.lib.decode) and 'scan_lines' the number of lines per scan of a MODIS
+    swath (see zoo.lib.swath).  The target is written in full before it
+    replaces any existing one.  Returns the target.
+    """
+    eos = None
+    dimlists = {}
+    if grid is None:
+        eos = _structure(structmeta.from_file(filename), structure, fields)
+        if fields is None:
+            fields = list(eos.data_fields)
+        for name in fields:
+            if name not in eos.data_fields:
+                raise ValueError('No field {0} in {1}'.format(name, eos.name))
+            dimlists[name] = tuple(eos.data_fields[name].dimlist)
+        if isinstance(eos, structmeta.Grid):
+            grid = gridlib.from_structure(eos)
+    elif fields is None:
+        raise ValueError('The fields to copy must be named with a grid')
+
+    # The backend goes by the target, as the partial store ends in '.part'.
+    partial = target.rstrip('/') + '.part'
+    _remove(partial)
+    out = _Target(partial, complevel,
+                  zarr=target.rstrip('/').endswith('.zarr'))
+    try:
+        try:
+            _write(out, filename, fields, dimlists, eos, grid, convention,
+                   scan_lines, chunk)
+        finally:
+            out.close()
+    except Exception:
+        _remove(partial)
+        raise
+    _remove(target)
+    os.replace(partial, target)
+    return target
+
+
+def _remove(path):
+    """
+    Remove a file or a Zarr store, if there is one.
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
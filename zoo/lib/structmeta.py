@@ -0,0 +1,360 @@
+"""
+Object model for the HDF-EOS 'StructMetadata' global attribute.
+
+StructMetadata is ODL text that describes every swath, grid and point
+structure in an HDF-EOS2 or HDF-EOS5 file: dimensions, dimension maps, geo and
+data fields, and for grids the projection and extents.  Rather than running
+regular expressions over the whole text for each value needed, it is parsed
+once into a tree of objects
+
+    meta = zoo.lib.structmeta.from_file(FILE_NAME)
+    meta.grids['NpPolarGrid12km'].upleft
+    meta.swaths['mod05'].dimension_maps
+    meta.find_field('Cloud_Optical_Thickness')
+
+Parsing is memoized both on the metadata text and on the identity of the
+file (path, size and modification time), so asking again for the same file
+costs a dictionary lookup.
+"""
+import collections
+import functools
+
+from . import cache
+
+
+def parse_value(text):
+    """
+    Convert an ODL value into a Python value.
+
+    Parenthesized lists become tuples, quoted strings lose their quotes and
+    numbers become int or float.  Anything else is returned as a string.
+    """
+    text = text.strip()
+    if text.startswith('(') and text.endswith(')'):
+        return tuple(parse_value(item) for item in text[1:-1].split(','))
+    if text.startswith('"') and text.endswith('"'):
+        return text[1:-1]
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class Node(object):
+    """
+    A GROUP or OBJECT in the ODL tree.
+    """
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.values = collections.OrderedDict()
+        self.children = []
+
+    def __repr__(self):
+        return 'Node({0!r}, {1!r})'.format(self.kind, self.name)
+
+    def child(self, name):
+        """
+        The child group or object with the given name, or None.
+        """
+        for node in self.children:
+            if node.name == name:
+                return node
+        return None
+
+    def objects(self, name):
+        """
+        The objects inside the child group of the given name.
+        """
+        node = self.child(name)
+        if node is None:
+            return []
+        return node.children
+
+
+def parse_odl(text):
+    """
+    Parse ODL text into a tree of Nodes and return the root.
+    """
+    root = Node('GROUP', None)
+    stack = [root]
+    lines = iter(text.splitlines())
+    for line in lines:
+        key, sep, value = line.partition('=')
+        if not sep:
+            continue
+        key = key.strip()
+        value = value.strip()
+        if key in ('GROUP', 'OBJECT'):
+            node = Node(key, value)
+            stack[-1].children.append(node)
+            stack.append(node)
+        elif key in ('END_GROUP', 'END_OBJECT'):
+            if len(stack) > 1:
+                stack.pop()
+        else:
+            # Long lists may be continued over several lines.
+            while value.count('(') > value.count(')'):
+                try:
+                    value += next(lines).strip()
+                except StopIteration:
+                    break
+            stack[-1].values[key] = parse_value(value)
+    return root
+
+
+def _normalize(value):
+    """
+    Drop the HE5_ prefix HDF-EOS5 puts on projection and origin codes.
+    """
+    if isinstance(value, str) and value.startswith('HE5_'):
+        return value[4:]
+    return value
+
+
+class DataField(object):
+    """
+    A geo or data field of a swath or grid.
+    """
+    def __init__(self, name, datatype, dimlist, values):
+        self.name = name
+        self.datatype = datatype
+        self.dimlist = dimlist
+        self.values = values
+
+    def __repr__(self):
+        return 'DataField({0!r}, {1}, {2})'.format(self.name, self.datatype,
+                                                   self.dimlist)
+
+
+class DimensionMap(object):
+    """
+    Relation between a geolocation dimension and a data dimension.
+
+    Data index = offset + increment * geolocation index.  For index
+    dimension maps offset and increment are None.
+    """
+    def __init__(self, geo_dimension, data_dimension, offset=None,
+                 increment=None):
+        self.geo_dimension = geo_dimension
+        self.data_dimension = data_dimension
+        self.offset = offset
+        self.increment = increment
+
+    def __repr__(self):
+        return 'DimensionMap({0!r}, {1!r}, {2}, {3})'.format(
+            self.geo_dimension, self.data_dimension, self.offset,
+            self.increment)
+
+
+def _fields(node, group, key):
+    fields = collections.OrderedDict()
+    for obj in node.objects(group):
+        name = obj.values.get(key)
+        dimlist = obj.values.get('DimList', ())
+        if not isinstance(dimlist, tuple):
+            dimlist = (dimlist,)
+        fields[name] = DataField(name, obj.values.get('DataType'), dimlist,
+                                 obj.values)
+    return fields
+
+
+class Structure(object):
+    """
+    Base for the swath, grid and point structures.
+    """
+    def __init__(self, node, namekey):
+        self.node = node
+        self.values = node.values
+        self.name = node.values.get(namekey)
+        self.dimensions = collections.OrderedDict(
+            (obj.values.get('DimensionName'), obj.values.get('Size'))
+            for obj in node.objects('Dimension'))
+        self.data_fields = _fields(node, 'DataField', 'DataFieldName')
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, self.name)
+
+
+class Swath(Structure):
+    """
+    An HDF-EOS swath.
+    """
+    def __init__(self, node):
+        Structure.__init__(self, node, 'SwathName')
+        self.geo_fields = _fields(node, 'GeoField', 'GeoFieldName')
+        self.dimension_maps = [
+            DimensionMap(obj.values.get('GeoDimension'),
+                         obj.values.get('DataDimension'),
+                         obj.values.get('Offset'),
+                         obj.values.get('Increment'))
+            for obj in node.objects('DimensionMap')]
+        self.index_dimension_maps = [
+            DimensionMap(obj.values.get('GeoDimension'),
+                         obj.values.get('DataDimension'))
+            for obj in node.objects('IndexDimensionMap')]
+
+    def dimension_map(self, geo_dimension, data_dimension=None):
+        """
+        The dimension map for a geolocation dimension, or None.
+        """
+        for dimmap in self.dimension_maps:
+            if dimmap.geo_dimension == geo_dimension and (
+                    data_dimension is None or
+                    dimmap.data_dimension == data_dimension):
+                return dimmap
+        return None
+
+
+class Grid(Structure):
+    """
+    An HDF-EOS grid.
+    """
+    def __init__(self, node):
+        Structure.__init__(self, node, 'GridName')
+        values = node.values
+        self.xdim = values.get('XDim')
+        self.ydim = values.get('YDim')
+        self.upleft = values.get('UpperLeftPointMtrs')
+        self.lowright = values.get('LowerRightMtrs')
+        self.projection = _normalize(values.get('Projection'))
+        projparams = values.get('ProjParams', ())
+        if not isinstance(projparams, tuple):
+            projparams = (projparams,)
+        self.projparams = projparams
+        self.spherecode = values.get('SphereCode')
+        self.zonecode = values.get('ZoneCode')
+        self.origin = _normalize(values.get('GridOrigin', 'HDFE_GD_UL'))
+        self.registration = _normalize(values.get('PixelRegistration',
+                                                  'HDFE_CENTER'))
+
+
+class Point(Structure):
+    """
+    An HDF-EOS point.
+    """
+    def __init__(self, node):
+        Structure.__init__(self, node, 'PointName')
+
+
+class StructMetadata(object):
+    """
+    All swath, grid and point structures described by StructMetadata.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.swaths = collections.OrderedDict()
+        self.grids = collections.OrderedDict()
+        self.points = collections.OrderedDict()
+        for group, cls, structures in (('SwathStructure', Swath, self.swaths),
+                                       ('GridStructure', Grid, self.grids),
+                                       ('PointStructure', Point, self.points)):
+            node = root.child(group)
+            if node is None:
+                continue
+            for child in node.children:
+                structure = cls(child)
+                structures[structure.name] = structure
+
+    def __repr__(self):
+        return 'StructMetadata(swaths={0}, grids={1}, points={2})'.format(
+            list(self.swaths), list(self.grids), list(self.points))
+
+    @staticmethod
+    def _lookup(structures, name, kind):
+        if name is None and structures:
+            return next(iter(structures.values()))
+        try:
+            return structures[name]
+        except KeyError:
+            raise KeyError('No {0} named {1} in StructMetadata'.format(kind,
+                                                                       name))
+
+    def grid(self, name=None):
+        """
+        The named grid, or the first one if no name is given.
+        """
+        return self._lookup(self.grids, name, 'grid')
+
+    def swath(self, name=None):
+        """
+        The named swath, or the first one if no name is given.
+        """
+        return self._lookup(self.swaths, name, 'swath')
+
+    def find_field(self, name):
+        """
+        The swath or grid that holds the named data or geo field.
+        """
+        for structures in (self.swaths, self.grids, self.points):
+            for structure in structures.values():
+                if name in structure.data_fields:
+                    return structure
+                if name in getattr(structure, 'geo_fields', ()):
+                    return structure
+        raise KeyError('No field named {0} in StructMetadata'.format(name))
+
+
+@functools.lru_cache(maxsize=64)
+def parse(text):
+    """
+    Parse StructMetadata text.  Memoized on the text.
+    """
+    return StructMetadata(parse_odl(text))
+
+
+def read(filename):
+    """
+    Read the complete StructMetadata text of an HDF-EOS2 or HDF-EOS5 file.
+
+    Long metadata is split over StructMetadata.0, StructMetadata.1, ...;
+    the pieces are joined back together.
+    """
+    try:
+        from pyhdf.SD import SD, SDC
+        from pyhdf.error import HDF4Error
+        try:
+            hdf = SD(filename, SDC.READ)
+        except HDF4Error:
+            pass
+        else:
+            try:
+                attrs = hdf.attributes()
+            finally:
+                hdf.end()
+            names = sorted((name for name in attrs
+                            if name.startswith('StructMetadata.')),
+                           key=lambda name: int(name.split('.')[1]))
+            return ''.join(attrs[name] for name in names).rstrip('\x00')
+    except ImportError:
+        pass
+
+    import h5py
+    with h5py.File(filename, 'r') as f:
+        group = f['HDFEOS INFORMATION']
+        names = sorted((name for name in group
+                        if name.startswith('StructMetadata.')),
+                       key=lambda name: int(name.split('.')[1]))
+        pieces = []
+        for name in names:
+            piece = group[name][()]
+            if isinstance(piece, bytes):
+                piece = piece.decode('ascii')
+            pieces.append(piece)
+    return ''.join(pieces).rstrip('\x00')
+
+
+@functools.lru_cache(maxsize=64)
+def _from_file(state):
+    return parse(read(state[0]))
+
+
+def from_file(filename):
+    """
+    Parsed StructMetadata of a file.  Memoized on the file's identity.
+    """
+    return _from_file(cache.file_state(filename))
@@ -0,0 +1,190 @@
+"""
+Full resolution geolocation of HDF-EOS swaths from dimension maps.
+
+Many MODIS swath products store latitude and longitude at a coarser
+resolution than their data fields: the 1-km MOD05/MOD06 fields come with 5-km
+geolocation, the 500-m MYD02HKM bands with 1-km geolocation.  The relation
+between the two is recorded in StructMetadata as a dimension map
+
+    data index = offset + increment * geolocation index
+
+for each of the along-track and across-track dimensions.  Here the coarse
+latitude and longitude are interpolated bilinearly to the data resolution,
+so the examples need neither a separate MOD03 file, nor dumper output, nor
+to subsample the data down to the geolocation.
+
+    geo = zoo.lib.swath.from_file(FILE_NAME, 'Cloud_Optical_Thickness',
+                                  scan_lines=10)
+    lat, lon = geo.latlon()
+
+The interpolation is done on unit vectors rather than on the angles, so it is
+not upset by the dateline or by swaths that cross a pole.  MODIS scans a
+swath a few lines at a time and neighbouring scans overlap (the bow-tie
+effect), so when 'scan_lines', the number of data lines per scan, is given,
+every output line is interpolated (or extrapolated at the scan edges) from
+the geolocation of its own scan only.  The output is computed a block of
+whole scans at a time, and a window or strided subset can be asked for, so
+nothing but the result itself is ever allocated at full resolution.
+"""
+import numpy as np
+
+from . import structmeta
+
+# Approximate number of output lines interpolated at a time.
+TILE_ROWS = 256
+
+
+def _pairs(index, offset, increment, ngeo, period=None):
+    """
+    Geolocation index pairs and weights for data indices on one axis.
+
+    'period' is the number of data lines per scan; the geolocation used for a
+    data line never comes from another scan.
+    """
+    if period is None:
+        scan = np.zeros_like(index)
+        local = index
+        nlocal = ngeo
+    else:
+        scan = index // period
+        local = index - scan * period
+        nlocal = period // increment
+    g = (local - offset) / float(increment)
+    if nlocal < 2:
+        i0 = np.zeros(index.shape, dtype=np.intp)
+        i1 = i0
+        weight = np.zeros(index.shape)
+    else:
+        i0 = np.clip(np.floor(g).astype(np.intp), 0, nlocal - 2)
+        i1 = i0 + 1
+        weight = g - i0
+    base = scan * nlocal
+    return i0 + base, i1 + base, weight
+
+
+def _unit_vectors(lat, lon):
+    """
+    Unit vectors (3, ...) for latitudes and longitudes in degrees.
+
+    Invalid latitudes (e.g. the -999 fill value) give NaN vectors.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    rlat = np.radians(np.where(np.abs(lat) <= 90, lat, np.nan))
+    rlon = np.radians(lon)
+    coslat = np.cos(rlat)
+    return np.array([coslat * np.cos(rlon), coslat * np.sin(rlon),
+                     np.sin(rlat)])
+
+
+def from_file(filename, field, swathname=None, scan_lines=None,
+              geofields=('Latitude', 'Longitude')):
+    """
+    Geolocation for a data field of an HDF-EOS2 swath.
+
+    The coarse latitude and longitude are read from the swath's geolocation
+    fields and the dimension maps between them and the field's last two
+    dimensions are taken from StructMetadata.
+    """
+    from pyhdf.SD import SD, SDC
+
+    meta = structmeta.from_file(filename)
+    if swathname is None:
+        swath = meta.find_field(field)
+    else:
+        swath = meta.swath(swathname)
+    geodims = swath.geo_fields[geofields[0]].dimlist[-2:]
+    datadims = swath.data_fields[field].dimlist[-2:]
+
+    maps = []
+    for geodim, datadim in zip(geodims, datadims):
+        if geodim == datadim:
+            maps.append((0, 1))
+            continue
+        dimmap = swath.dimension_map(geodim, datadim)
+        if dimmap is None:
+            msg = 'No dimension map from {0} to {1} in swath {2}'
+            raise ValueError(msg.format(geodim, datadim, swath.name))
+        maps.append((dimmap.offset, dimmap.increment))
+
+    hdf = SD(filename, SDC.READ)
+    try:
+        shape = tuple(hdf.select(field).info()[2][-2:])
+        lat = hdf.select(geofields[0])[:]
+        lon = hdf.select(geofields[1])[:]
+    finally:
+        hdf.end()
+    return Geolocation(lat, lon, maps[0], maps[1], shape,
+                       scan_lines=scan_lines)
+
+
+class Geolocation(object):
+    """
+    Coarse swath geolocation and the dimension maps to a data field.
+    """
+    def __init__(self, lat, lon, along, across, shape, scan_lines=None):
+        self.lat = np.asarray(lat)
+        self.lon = np.asarray(lon)
+        self.along = tuple(along)
+        self.across = tuple(across)
+        self.shape = tuple(shape)
+        self.scan_lines = scan_lines
+
+    def __repr__(self):
+        return 'Geolocation({0} -> {1}, along={2}, across={3})'.format(
+            self.lat.shape, self.shape, self.along, self.across)
+
+    def tiles(self, rows=slice(None), cols=slice(None), dtype=np.float64):
+        """
+        Interpolate a window of the swath a block of scans at a time.
+
+        Yields (tile, lat, lon) where 'tile' is the slice of output rows that
+        the latitude and longitude arrays cover.
+        """
+        rowindex = np.arange(self.shape[0])[rows]
+        colindex = np.arange(self.shape[1])[cols]
+        c0, c1, wc = _pairs(colindex, self.across[0], self.across[1],
+                            self.lat.shape[1])
+        r0, r1, wr = _pairs(rowindex, self.along[0], self.along[1],
+                            self.lat.shape[0], self.scan_lines)
+
+        # Break the output rows on scan boundaries.
+        block = TILE_ROWS
+        if self.scan_lines:
+            block = self.scan_lines * max(1, TILE_ROWS // self.scan_lines)
+        edges = np.searchsorted(rowindex, np.arange(0, self.shape[0], block))
+        edges = np.unique(np.append(edges, len(rowindex)))
+
+        columns = np.union1d(c0, c1)
+        c0 = np.searchsorted(columns, c0)
+        c1 = np.searchsorted(columns, c1)
+        for start, stop in zip(edges[:-1], edges[1:]):
+            tile = slice(int(start), int(stop))
+            lo = min(r0[tile].min(), r1[tile].min())
+            hi = max(r0[tile].max(), r1[tile].max()) + 1
+            xyz = _unit_vectors(self.lat[lo:hi, columns],
+                                self.lon[lo:hi, columns])
+            top = xyz[:, r0[tile] - lo]
+            bottom = xyz[:, r1[tile] - lo]
+            top = top[:, :, c0] + (top[:, :, c1] - top[:, :, c0]) * wc
+            bottom = (bottom[:, :, c0] +
+                      (bottom[:, :, c1] - bottom[:, :, c0]) * wc)
+            x, y, z = top + (bottom - top) * wr[tile, np.newaxis]
+            lat = np.degrees(np.arctan2(z, np.hypot(x, y)))
+            lon = np.degrees(np.arctan2(y, x))
+            yield tile, lat.astype(dtype), lon.astype(dtype)
+
+    def latlon(self, rows=slice(None), cols=slice(None), dtype=np.float64):
+        """
+        Latitude and longitude of a window of the swath at data resolution.
+
+        'rows' and 'cols' are slices (strides allowed) into the data field.
+        """
+        shape = (len(range(self.shape[0])[rows]),
+                 len(range(self.shape[1])[cols]))
+        lat = np.empty(shape, dtype=dtype)
+        lon = np.empty(shape, dtype=dtype)
+        for tile, tlat, tlon in self.tiles(rows, cols, dtype):
+            lat[tile] = tlat
+            lon[tile] = tlon
+        return lat, lon
@@ -0,0 +1,69 @@
+"""
+Draw categorical values along a ground track in one collection.
+
+Plotting a track of classified profiles point by point
+
+    for i, feature in enumerate(data):
+        m.plot(x[i], y[i], 'o', color=cmap(feature), markersize=3)
+
+creates a Line2D artist per profile, so the thousands of profiles of a
+CALIPSO granule are slow to draw and had to be thinned out first.
+Here all points go into a single collection colored through a BoundaryNorm,
+one color per category, and the collection is rasterized so the cost of
+saving the figure does not grow with the number of points either
+
+    pts = zoo.lib.track.draw(x, y, data, colors, ax=plt.gca())
+    zoo.lib.track.colorbar(pts, labels, cax=fig.add_axes(...))
+
+Thinning the track is still possible with 'stride'.
+"""
+import numpy as np
+
+
+def norm(ncategories):
+    """
+    A BoundaryNorm mapping the integers 0 .. ncategories-1 onto one color
+    each.
+    """
+    from matplotlib import colors
+    bounds = np.arange(ncategories + 1)
+    return colors.BoundaryNorm(bounds, ncategories)
+
+
+def draw(x, y, values, colors, ax=None, stride=1, markersize=3,
+         rasterized=True, **kwargs):
+    """
+    Draw integer category values at x, y as points of the given colors.
+
+    'colors' lists the color of each category, starting from 0.  The points
+    are drawn in a single PathCollection on 'ax' (the current axes by
+    default), which is returned.  Further keyword arguments go to scatter.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+    if ax is None:
+        ax = plt.gca()
+    cmap = colors if isinstance(colors, ListedColormap) else \
+        ListedColormap(list(colors))
+    x = np.ravel(x)[::stride]
+    y = np.ravel(y)[::stride]
+    values = np.ravel(values)[::stride]
+    # Markers are sized by area in scatter, by diameter in plot.
+    kwargs.setdefault('s', markersize ** 2)
+    kwargs.setdefault('marker', 'o')
+    kwargs.setdefault('edgecolors', 'none')
+    return ax.scatter(x, y, c=values, cmap=cmap, norm=norm(cmap.N),
+                      rasterized=rasterized, **kwargs)
+
+
+def colorbar(mappable, labels, cax=None, ax=None, fontsize=5):
+    """
+    A colorbar with one labeled box per category.
+    """
+    import matplotlib.pyplot as plt
+    ncategories = mappable.norm.Ncmap
+    ticks = np.arange(ncategories) + 0.5
+    cb = plt.colorbar(mappable, cax=cax, ax=ax, ticks=ticks,
+                      spacing='proportional')
+    cb.ax.set_yticklabels(labels, fontsize=fontsize)
+    return cb
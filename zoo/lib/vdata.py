@@ -0,0 +1,225 @@
+"""
+Read HDF4 vdata fields straight into NumPy arrays.
+
+Some products keep their geolocation and time in vdatas, not in SDS arrays:
+the CloudSat and MOPITT examples read Latitude, Longitude and Profile_time
+with
+
+    latid = vs.attach(vs.find('Latitude'))
+    latid.setfields('Latitude')
+    nrecs, _, _, _, _ = latid.inquire()
+    latitude = latid.read(nRec=nrecs)
+
+once for each vdata.  pyhdf's read unpacks every value of every record into
+a Python list of lists, which then has to be turned back into an array, and
+each vs.find scans the vdatas of the file.  Here the records are read with
+one VSread into a buffer that is copied as a whole into an array of the
+vdata's own types, several vdatas from one open file
+
+    lat, lon, time = zoo.lib.vdata.read_fields(
+        FILE_NAME, ('Latitude', 'Longitude', 'Profile_time'))
+
+or a whole vdata as a structured array, one field per vdata field
+
+    records = zoo.lib.vdata.read(FILE_NAME, 'Geolocation', start=1000,
+                                 stop=2000)
+
+Only the records in [start, stop) are read.  The vdata names of a file are
+indexed once and kept for as long as the file is unchanged.
+"""
+import collections
+import ctypes
+
+import numpy as np
+
+from . import cache
+
+# Number of files whose vdata index is kept.
+MAX_INDEXES = 32
+_indexes = collections.OrderedDict()
+
+
+def _types():
+    from pyhdf.HDF import HC
+    return {
+        HC.CHAR8: 'S1',
+        HC.UCHAR8: 'u1',
+        HC.UINT8: 'u1',
+        HC.INT8: 'i1',
+        HC.INT16: 'i2',
+        HC.UINT16: 'u2',
+        HC.INT32: 'i4',
+        HC.UINT32: 'u4',
+        HC.FLOAT32: 'f4',
+        HC.FLOAT64: 'f8',
+    }
+
+
+def _open(filename):
+    import pyhdf.VS  # HDF.vstart needs it imported.
+    from pyhdf.HDF import HDF, HC
+    hdf = HDF(filename, HC.READ)
+    return hdf, hdf.vstart()
+
+
+def _close(hdf, vs):
+    vs.end()
+    hdf.close()
+
+
+def _build_index(vs):
+    """
+    The references of the vdatas of a file by name, the first of each name,
+    leaving out vdatas holding attributes.
+    """
+    from pyhdf.error import HDF4Error
+    index = {}
+    ref = -1
+    while True:
+        try:
+            ref = vs.next(ref)
+        except HDF4Error:
+            return index
+        vd = vs.attach(ref)
+        try:
+            if not vd._isattr and vd._name not in index:
+                index[vd._name] = ref
+        finally:
+            vd.detach()
+
+
+def _index(filename, vs):
+    key = cache.file_state(filename)
+    try:
+        index = _indexes.pop(key)
+    except KeyError:
+        index = _build_index(vs)
+        while len(_indexes) >= MAX_INDEXES:
+            _indexes.popitem(last=False)
+    _indexes[key] = index
+    return index
+
+
+def names(filename):
+    """
+    The names of the vdatas of a file, attributes left out.
+    """
+    hdf, vs = _open(filename)
+    try:
+        return sorted(_index(filename, vs))
+    finally:
+        _close(hdf, vs)
+
+
+def _attach(filename, vs, name):
+    try:
+        ref = _index(filename, vs)[name]
+    except KeyError:
+        raise KeyError('No vdata {0} in {1}'.format(name, filename))
+    return vs.attach(ref)
+
+
+def _dtype(vd, fields):
+    """
+    The packed record type of some fields of a vdata.
+    """
+    types = _types()
+    info = dict((f[0], f) for f in vd.fieldinfo())
+    items = []
+    for name in fields:
+        try:
+            _, data_type, order = info[name][:3]
+        except KeyError:
+            raise KeyError('No field {0} in vdata {1}'.format(name,
+                                                             vd._name))
+        base = types[data_type]
+        if base == 'S1':
+            items.append((name, 'S{0}'.format(order)))
+        elif order == 1:
+            items.append((name, base))
+        else:
+            items.append((name, base, (order,)))
+    return np.dtype(items)
+
+
+def _read(vd, fields, start, stop):
+    """
+    Read records [start, stop) of some fields of an attached vdata.
+    """
+    from pyhdf import hdfext
+    from pyhdf.HDF import HC
+    from pyhdf.error import HDF4Error
+    if fields is None:
+        fields = [f[0] for f in vd.fieldinfo()]
+    dtype = _dtype(vd, fields)
+    nrecs = vd.inquire()[0]
+    start, stop, _ = slice(start, stop).indices(nrecs)
+    count = max(0, stop - start)
+    out = np.empty(count, dtype=dtype)
+    if count == 0:
+        return out
+    vd.setfields(','.join(fields))
+    vd.seek(start)
+    buf = hdfext.array_byte(count * dtype.itemsize)
+    n = hdfext.VSread(vd._id, buf, count, HC.FULL_INTERLACE)
+    if n != count:
+        raise HDF4Error('Cannot read records {0} to {1} of vdata {2}'.format(
+            start, stop, vd._name))
+    # The SWIG pointer converts to the address of the buffer, which holds
+    # the records packed in the machine's byte order.
+    address = int(buf.cast())
+    out.view(np.uint8)[...] = np.frombuffer(
+        (ctypes.c_char * out.nbytes).from_address(address), dtype=np.uint8)
+    return out
+
+
+def read(filename, name, fields=None, start=0, stop=None):
+    """
+    Read records [start, stop) of a vdata as a structured array, with one
+    field for each of 'fields', all the vdata's fields by default.
+    """
+    hdf, vs = _open(filename)
+    try:
+        vd = _attach(filename, vs, name)
+        try:
+            return _read(vd, fields, start, stop)
+        finally:
+            vd.detach()
+    finally:
+        _close(hdf, vs)
+
+
+def read_fields(filename, names, start=0, stop=None):
+    """
+    Read records [start, stop) of vdatas named after the field they hold,
+    as Latitude, Longitude and Profile_time are, as one array each:
+    (records,) for fields of order 1, else (records, order).
+    """
+    hdf, vs = _open(filename)
+    try:
+        arrays = []
+        for name in names:
+            vd = _attach(filename, vs, name)
+            try:
+                arrays.append(_read(vd, [name], start, stop)[name])
+            finally:
+                vd.detach()
+        return arrays
+    finally:
+        _close(hdf, vs)
+
+
+def attrs(filename, name):
+    """
+    The attributes of a vdata, such as 'units', by name.
+    """
+    hdf, vs = _open(filename)
+    try:
+        vd = _attach(filename, vs, name)
+        try:
+            return dict((key, value[2])
+                        for key, value in vd.attrinfo().items())
+        finally:
+            vd.detach()
+    finally:
+        _close(hdf, vs)
@@ -0,0 +1,183 @@
+"""
+Decode CALIPSO Vertical Feature Mask records into uniform curtains.
+
+Each row of the VFM 'Feature_Classification_Flags' field is a 5515-word
+record covering 5 km along track, in which the atmosphere is sampled at
+three resolutions, highest altitudes first:
+
+    words        altitude           profiles x bins   vertical   horizontal
+    0 - 164      20.2 - 30.1 km      3 x  55           180 m      1665 m
+    165 - 1164    8.2 - 20.2 km      5 x 200            60 m      1000 m
+    1165 - 5514  -0.5 -  8.2 km     15 x 290            30 m       333 m
+
+Here every regime is expanded to the finest resolution, giving 15 profiles
+of 1020 30 m bins per record, top down, so the curtain can be shown with a
+single imshow.  The 16-bit words hold several bit fields
+
+    type        bits  1-3   feature type (0 invalid, 1 clear air, 2 cloud,
+                            3 aerosol, 4 stratospheric feature, 5 surface,
+                            6 subsurface, 7 no signal)
+    type_qa     bits  4-5   feature type QA
+    phase       bits  6-7   ice/water phase (0 unknown, 1 randomly oriented
+                            ice, 2 water, 3 horizontally oriented ice)
+    phase_qa    bits  8-9   ice/water phase QA
+    subtype     bits 10-12  cloud, aerosol or PSC subtype
+    subtype_qa  bit  13     subtype QA
+    averaging   bits 14-16  horizontal averaging
+
+which are unpacked on the packed records, before the expansion, so only the
+requested fields are ever expanded
+
+    f = zoo.lib.reader.open_file(FILE_NAME)
+    for profiles, c in zoo.lib.vfm.curtains(f, fields=('type', 'phase')):
+        ax.imshow(c['type'].T, ...)
+
+The records are read a chunk at a time, so a whole granule can be decoded
+without holding all of it in memory.
+"""
+import collections
+
+import numpy as np
+
+DATAFIELD_NAME = 'Feature_Classification_Flags'
+
+# Words per record and profiles per record at the finest resolution.
+RECORD_WORDS = 5515
+PROFILES = 15
+
+# (first word, profiles, bins, top km, bottom km) of each altitude regime.
+REGIMES = (
+    (0, 3, 55, 30.1, 20.2),
+    (165, 5, 200, 20.2, 8.2),
+    (1165, 15, 290, 8.2, -0.5),
+)
+
+# Height of a curtain bin in km, and the number of bins.
+BIN_HEIGHT = 0.03
+BINS = 1020
+TOP = 30.1
+
+# (lowest bit, number of bits) of each field in a word.
+FIELDS = collections.OrderedDict([
+    ('type', (0, 3)),
+    ('type_qa', (3, 2)),
+    ('phase', (5, 2)),
+    ('phase_qa', (7, 2)),
+    ('subtype', (9, 3)),
+    ('subtype_qa', (12, 1)),
+    ('averaging', (13, 3)),
+])
+
+FEATURE_TYPES = ('invalid', 'clear air', 'cloud', 'aerosol',
+                 'stratospheric feature', 'surface', 'subsurface',
+                 'no signal')
+
+# Records decoded at a time by curtains.
+CHUNK_RECORDS = 500
+
+
+def altitudes():
+    """
+    Altitudes in km of the centers of the curtain bins, top down.
+    """
+    return TOP - BIN_HEIGHT * (np.arange(BINS) + 0.5)
+
+
+def unpack(words, field):
+    """
+    One bit field of VFM words, as unsigned bytes.
+    """
+    try:
+        shift, nbits = FIELDS[field]
+    except KeyError:
+        raise ValueError('Unknown VFM field {0}'.format(field))
+    words = np.asarray(words).astype(np.uint16, copy=False)
+    out = np.right_shift(words, shift)
+    out &= (1 << nbits) - 1
+    return out.astype(np.uint8)
+
+
+def expand(records):
+    """
+    Expand records of per-word values into a (profiles, bins) curtain.
+
+    'records' is an array of shape (nrecords, 5515), either the packed words
+    or a field unpacked from them; the curtain has 15 profiles per record
+    and 1020 bins per profile.
+    """
+    records = np.asarray(records)
+    if records.ndim != 2 or records.shape[1] != RECORD_WORDS:
+        raise ValueError('Expected VFM records of {0} words, got shape '
+                         '{1}'.format(RECORD_WORDS, records.shape))
+    nrecords = records.shape[0]
+    out = np.empty((nrecords, PROFILES, BINS), dtype=records.dtype)
+    for first, nprofiles, nbins, top, bottom in REGIMES:
+        # How often each sample repeats across and along the curtain.
+        hrep = PROFILES // nprofiles
+        vrep = int(round((top - bottom) / nbins / BIN_HEIGHT))
+        row = int(round((TOP - top) / BIN_HEIGHT))
+        block = records[:, first:first + nprofiles * nbins]
+        block = block.reshape(nrecords, nprofiles, 1, nbins, 1)
+        # A view of the regime's part of the curtain, so the broadcast
+        # assignment writes straight into it.
+        view = out[:, :, row:row + nbins * vrep]
+        view = view.reshape(nrecords, nprofiles, hrep, nbins, vrep)
+        view[...] = block
+    return out.reshape(nrecords * PROFILES, BINS)
+
+
+def decode(records, fields=('type',)):
+    """
+    Curtains of the given bit fields of packed VFM records, by field name.
+    """
+    return collections.OrderedDict(
+        (name, expand(unpack(records, name))) for name in fields)
+
+
+def profile_values(values):
+    """
+    Interpolate per-record values such as 'Latitude' to the 15 profiles of
+    each record, records being centered on their 8th profile.  Values are
+    held constant beyond the first and last record centers.
+    """
+    values = np.ravel(values)
+    nrecords = values.shape[0]
+    profile = (np.arange(nrecords * PROFILES) + 0.5) / PROFILES - 0.5
+    return np.interp(profile, np.arange(nrecords), values)
+
+
+def profile_edges(values):
+    """
+    Interpolate per-record values such as 'Latitude' to the edges between
+    the 15 profiles of each record, extrapolating to the outer edges of the
+    first and last profiles: nrecords * 15 + 1 values, so that curtains drawn
+    between them meet edge to edge.
+    """
+    values = np.ravel(values).astype(np.float64)
+    nrecords = values.shape[0]
+    edge = np.arange(nrecords * PROFILES + 1) / float(PROFILES) - 0.5
+    out = np.interp(edge, np.arange(nrecords), values)
+    if nrecords > 1:
+        below = edge < 0
+        out[below] = values[0] + edge[below] * (values[1] - values[0])
+        above = edge > nrecords - 1
+        out[above] = values[-1] + ((edge[above] - (nrecords - 1)) *
+                                   (values[-1] - values[-2]))
+    return out
+
+
+def curtains(f, fields=('type',), start=0, stop=None,
+             chunk_records=CHUNK_RECORDS, name=DATAFIELD_NAME):
+    """
+    Decode the records start:stop of a VFM file a chunk at a time.
+
+    'f' is a file opened with zoo.lib.reader.  Yields the slice of profiles
+    covered by each chunk and the curtains of its fields, as decode does.
+    """
+    field = f[name]
+    if stop is None or stop > field.shape[0]:
+        stop = field.shape[0]
+    for first in range(start, stop, chunk_records):
+        last = min(first + chunk_records, stop)
+        profiles = slice(first * PROFILES, last * PROFILES)
+        yield profiles, decode(field[first:last], fields)
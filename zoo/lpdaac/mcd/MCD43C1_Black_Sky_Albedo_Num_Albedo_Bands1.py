@@ -29,6 +29,9 @@ from mpl_toolkits.basemap import Basemap
 import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import decode, lod, reader
+from zoo.lib import grid
+
 USE_GDAL = False
 
 def run(FILE_NAME):
@@ -47,39 +50,31 @@ def run(FILE_NAME):
         # Just retrieve the 2nd band.
         gdset = gdal.Open(gname)
         band = gdset.GetRasterBand(2)
-        data = band.ReadAsArray().astype(np.float64)
+        data = band.ReadAsArray()
 
-        # Read attributes.
+        # Read attributes.  GDAL gives them as strings.
         meta = gdset.GetMetadata()
         long_name = meta['long_name']        
         units = meta['units']
-        _FillValue = np.float(meta['_FillValue'])
-        scale_factor = np.float(meta['scale_factor'])
-        add_offset = np.float(meta['add_offset'])
-        valid_range = [np.float(x) for x in meta['valid_range'].split(', ')] 
         dimname = "Num_Albedo_Bands"
         del gdset
+
+        # Apply the attributes while reducing the data to the resolution of
+        # the figure, averaging blocks of cells.
+        def apply_attrs(raw):
+            return decode.decode(raw, meta, 'modis')
+        data, rows, cols = lod.read(data, method='mean', decode=apply_attrs)
     else:
         from pyhdf.SD import SD, SDC
         hdf = SD(FILE_NAME, SDC.READ)
 
         # Read dataset.
         data3D = hdf.select(DATAFIELD_NAME)
-        data = data3D[:,:,1].astype(np.double)
 
-        
         # Read attributes.
         attrs = data3D.attributes(full=1)
         lna=attrs["long_name"]
         long_name = lna[0]
-        vra=attrs["valid_range"]
-        valid_range = vra[0]
-        aoa=attrs["add_offset"]
-        add_offset = aoa[0]
-        fva=attrs["_FillValue"]
-        _FillValue = fva[0]
-        sfa=attrs["scale_factor"]
-        scale_factor = sfa[0]        
         ua=attrs["units"]
         units = ua[0]
 
@@ -87,23 +82,21 @@ def run(FILE_NAME):
         dim = data3D.dim(2)
         dimname = dim.info()[0]
 
-
-    invalid = data == _FillValue
-    invalid = np.logical_or(invalid, data < valid_range[0])
-    invalid = np.logical_or(invalid, data > valid_range[1])
-    data[invalid] = np.nan
-    data = scale_factor * (data - add_offset)
-    data = np.ma.masked_array(data, np.isnan(data))
-        
+        # Read the 2nd band at the resolution of the figure, averaging
+        # blocks of cells, and apply the attributes to each block of rows
+        # as it is read.
+        field = reader.open_file(FILE_NAME)[DATAFIELD_NAME]
+        def apply_attrs(raw):
+            return decode.decode(raw, field.attrs, 'modis')
+        data, rows, cols = lod.read(field, method='mean', decode=apply_attrs,
+                                    plane=(slice(None), slice(None), 1))
 
     # Normally we would use the following code to reconstruct the grid, but
     # the grid metadata is incorrect in this case, specifically the upper left
-    # and lower right coordinates of the grid.  We'll construct the grid
-    # manually, taking into account the fact that we're going to subset the
-    # data by a factor of 10 (the grid size is 3600 x 7200).
-    x = np.linspace(-180, 180, 720)
-    y = np.linspace(90, -90, 360)
-    lon, lat = np.meshgrid(x, y)
+    # and lower right coordinates of the grid.  We'll use the standard 3600 x
+    # 7200 grid of 0.05 degree cells instead, at the centers of the blocks
+    # read.
+    lat, lon = grid.standard('cmg_0.05').latlon(rows, cols)
 
     m = Basemap(projection='cyl', resolution='l',
                 llcrnrlat=-90, urcrnrlat=90,
@@ -111,7 +104,7 @@ def run(FILE_NAME):
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-90, 90, 45), labels=[1, 0, 0, 0])
     m.drawmeridians(np.arange(-180, 181, 45), labels=[0, 0, 0, 1])
-    m.pcolormesh(lon, lat, data[::10,::10])
+    m.pcolormesh(lon, lat, data)
     cb = m.colorbar()
     cb.set_label(units)
 
@@ -24,15 +24,15 @@ code to work.  Please see the README for details.
 """
 
 import os
-import re
 
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import decode, grid, proj
+
 USE_GDAL = True
 
 def run(FILE_NAME):
@@ -47,7 +47,7 @@ def run(FILE_NAME):
                                                          GRID_NAME,
                                                          DATAFIELD_NAME)
         gdset = gdal.Open(gname)
-        data = gdset.ReadAsArray().astype(np.float64)
+        data = gdset.ReadAsArray()
 
 
         # Construct the grid.
@@ -55,13 +55,11 @@ def run(FILE_NAME):
         nx, ny = (gdset.RasterXSize, gdset.RasterYSize)
         x = np.linspace(x0, x0 + xinc*nx, nx)
         y = np.linspace(y0, y0 + yinc*ny, ny)
-        xv, yv = np.meshgrid(x, y)
 
         # In basemap, the sinusoidal projection is global, so we won't use it.
         # Instead we'll convert the grid back to lat/lons.
-        sinu = pyproj.Proj("+proj=sinu +R=6371007.181 +nadgrids=@null +wktext")
-        wgs84 = pyproj.Proj("+init=EPSG:4326") 
-        lon, lat= pyproj.transform(sinu, wgs84, xv, yv)
+        lon, lat = proj.transform(proj.SINUSOIDAL,
+                                  x[np.newaxis, :], y[:, np.newaxis])
 
         # Read the attributes.
         meta = gdset.GetMetadata()
@@ -79,20 +77,11 @@ def run(FILE_NAME):
 
         # Read dataset.
         data2D = hdf.select(DATAFIELD_NAME)
-        data = data2D[:,:].astype(np.double)
-
-        # Read geolocation dataset from HDF-EOS2 dumper output.
-        GEO_FILE_NAME = 'lat_MOD09GA.A2007268.h10v08.005.2007272184810_MODIS_Grid_500m_2D.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                     GEO_FILE_NAME)
-        lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lat = lat.reshape(data.shape)
-
-        GEO_FILE_NAME = 'lon_MOD09GA.A2007268.h10v08.005.2007272184810_MODIS_Grid_1km_2D.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                      GEO_FILE_NAME)
-        lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lon = lon.reshape(data.shape)
+        data = data2D[:,:]
+
+        # Construct the grid.  The needed information is in a global attribute
+        # called 'StructMetadata.0'.
+        lat, lon = grid.from_file(FILE_NAME, 'MODIS_Grid_500m_2D').latlon()
         
         # Read attributes.
         attrs = data2D.attributes(full=1)
@@ -107,12 +96,10 @@ def run(FILE_NAME):
         ua=attrs["units"]
         units = ua[0]
         
-    invalid = np.logical_or(data > valid_range[1],
-                            data < valid_range[0])
-    invalid = np.logical_or(invalid, data == _FillValue)
-    data[invalid] = np.nan
-    data = data / scale_factor 
-    data = np.ma.masked_array(data, np.isnan(data))
+    # Mask fill values and values out of range, and apply the LP DAAC scaling
+    # equation, data / scale_factor.
+    data = decode.decode(data, convention='lpdaac', scale=scale_factor,
+                         fill=_FillValue, valid_range=valid_range)
 
 
     m = Basemap(projection='cyl', resolution='h',
@@ -29,6 +29,8 @@ from mpl_toolkits.basemap import Basemap
 import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid
+
 USE_GDAL = False
 
 def run(FILE_NAME):
@@ -91,11 +93,9 @@ def run(FILE_NAME):
 
     # Normally we would use the HDF-EOS metadata to reconstruct the grid, but
     # the grid metadata is incorrect in this case, specifically the upper left
-    # and lower right coordinates of the grid.  We'll construct the grid
-    # manually.
-    x = np.linspace(-180, 180, data.shape[1])
-    y = np.linspace(90, -90, data.shape[0])
-    lon, lat = np.meshgrid(x, y)
+    # and lower right coordinates of the grid.  We'll use the standard 3600 x
+    # 7200 grid of 0.05 degree cells instead.
+    lat, lon = grid.standard('cmg_0.05').latlon()
 
     m = Basemap(projection='cyl', resolution='l',
                 llcrnrlat=-90, urcrnrlat=90,
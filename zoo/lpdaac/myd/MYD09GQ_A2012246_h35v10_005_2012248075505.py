@@ -24,15 +24,15 @@ with HDF4 support.  Please see the README for details.
 """
 
 import os
-import re
 
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import decode, grid, lod, proj, reader
+
 USE_NETCDF = False
 USE_GDAL = False
 def run(FILE_NAME):
@@ -47,48 +47,24 @@ def run(FILE_NAME):
         nc = Dataset(FILE_NAME)
         ncvar = nc.variables[DATAFIELD_NAME]
         ncvar.set_auto_maskandscale(False)
-        data = ncvar[:].astype(np.float64)
 
         # Get any needed attributes.
-        scale_factor = ncvar.scale_factor
-        add_offset = ncvar.add_offset
-        _FillValue = ncvar._FillValue
-        valid_range = ncvar.valid_range
+        attrs = dict((name, ncvar.getncattr(name)) for name in ncvar.ncattrs())
         units = ncvar.units
         long_name = ncvar.long_name
 
-        # Construct the grid.  The needed information is in a global attribute
-        # called 'StructMetadata.0'.  Use regular expressions to tease out the
-        # extents of the grid.
-        gridmeta = getattr(nc, 'StructMetadata.0')
-        ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                                  (?P<upper_left_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<upper_left_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = ul_regex.search(gridmeta)
-        x0 = np.float(match.group('upper_left_x'))
-        y0 = np.float(match.group('upper_left_y'))
-
-        lr_regex = re.compile(r'''LowerRightMtrs=\(
-                                  (?P<lower_right_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<lower_right_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = lr_regex.search(gridmeta)
-        x1 = np.float(match.group('lower_right_x'))
-        y1 = np.float(match.group('lower_right_y'))
-        
-        nx, ny = data.shape
-        x = np.linspace(x0, x1, nx)
-        y = np.linspace(y0, y1, ny)
-        xv, yv = np.meshgrid(x, y)
+        # Read the field at the resolution of the figure, averaging blocks of
+        # cells, and apply the attributes to each block of rows as it is
+        # read.
+        def apply_attrs(raw):
+            return decode.decode(raw, attrs, 'lpdaac')
+        data, rows, cols = lod.read(ncvar, method='mean', decode=apply_attrs)
 
-        # In basemap, the sinusoidal projection is global, so we won't use it.
-        # Instead we'll convert the grid back to lat/lons.
-        sinu = pyproj.Proj("+proj=sinu +R=6371007.181 +nadgrids=@null +wktext")
-        wgs84 = pyproj.Proj("+init=EPSG:4326") 
-        lon, lat= pyproj.transform(sinu, wgs84, xv, yv)
+        # Construct the grid at the block centers.  The needed information is
+        # in a global attribute called 'StructMetadata.0'.
+        gridmeta = getattr(nc, 'StructMetadata.0')
+        lat, lon = grid.from_metadata(gridmeta, 'MODIS_Grid_2D').latlon(rows,
+                                                                        cols)
     
     elif USE_GDAL:
         # GDAL
@@ -99,30 +75,30 @@ def run(FILE_NAME):
                                                          GRID_NAME,
                                                          DATAFIELD_NAME)
         gdset = gdal.Open(gname)
-        data = gdset.ReadAsArray().astype(np.float64)
+        data = gdset.ReadAsArray()
     
-        # Get any needed attributes.
+        # Get any needed attributes.  GDAL gives them as strings.
         meta = gdset.GetMetadata()
-        scale_factor = np.float(meta['scale_factor'])
-        add_offset = np.float(meta['add_offset'])
-        _FillValue = np.float(meta['_FillValue'])
-        valid_range = [np.float(x) for x in meta['valid_range'].split(', ')]
         units = meta['units']
         long_name = meta['long_name']
+
+        # Reduce the data to the resolution of the figure, averaging blocks
+        # of cells.
+        def apply_attrs(raw):
+            return decode.decode(raw, meta, 'lpdaac')
+        data, rows, cols = lod.read(data, method='mean', decode=apply_attrs)
     
-        # Construct the grid.
+        # Construct the grid at the block centers.
         x0, xinc, _, y0, _, yinc = gdset.GetGeoTransform()
         nx, ny = (gdset.RasterXSize, gdset.RasterYSize)
         x = np.linspace(x0, x0 + xinc*nx, nx)
         y = np.linspace(y0, y0 + yinc*ny, ny)
-        xv, yv = np.meshgrid(x, y)
 
 
         # In basemap, the sinusoidal projection is global, so we won't use it.
         # Instead we'll convert the grid back to lat/lons.
-        sinu = pyproj.Proj("+proj=sinu +R=6371007.181 +nadgrids=@null +wktext")
-        wgs84 = pyproj.Proj("+init=EPSG:4326") 
-        lon, lat= pyproj.transform(sinu, wgs84, xv, yv)
+        lon, lat = proj.transform(proj.SINUSOIDAL,
+                                  x[np.newaxis, cols], y[rows, np.newaxis])
 
         del gdset
     else:
@@ -132,47 +108,31 @@ def run(FILE_NAME):
 
         # Read dataset.
         data2D = hdf.select(DATAFIELD_NAME)
-        data = data2D[:,:].astype(np.double)
-
-        # Read geolocation dataset from HDF-EOS2 dumper output.
-        GEO_FILE_NAME = 'lat_MYD09GQ.A2012246.h35v10.005.2012248075505.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                     GEO_FILE_NAME)
-        lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lat = lat.reshape(data.shape)
-
-        GEO_FILE_NAME = 'lon_MYD09GQ.A2012246.h35v10.005.2012248075505.output'
-        GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                      GEO_FILE_NAME)
-        lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lon = lon.reshape(data.shape)
-        
+
         # Read attributes.
         attrs = data2D.attributes(full=1)
         lna=attrs["long_name"]
         long_name = lna[0]
-        vra=attrs["valid_range"]
-        valid_range = vra[0]
-        fva=attrs["_FillValue"]
-        _FillValue = fva[0]
-        sfa=attrs["scale_factor"]
-        scale_factor = sfa[0]        
         ua=attrs["units"]
         units = ua[0]
-        aoa=attrs["add_offset"]
-        add_offset = aoa[0]
-
-    # Apply the attributes to the data.
-    invalid = np.logical_or(data < valid_range[0], data > valid_range[1])
-    invalid = np.logical_or(invalid, data == _FillValue)
-    data[invalid] = np.nan
-    data = (data - add_offset) / scale_factor
-    data = np.ma.masked_array(data, np.isnan(data))
+
+        # Read the field at the resolution of the figure, averaging blocks of
+        # cells, and apply the attributes to each block of rows as it is
+        # read.
+        field = reader.open_file(FILE_NAME)[DATAFIELD_NAME]
+        def apply_attrs(raw):
+            return decode.decode(raw, field.attrs, 'lpdaac')
+        data, rows, cols = lod.read(field, method='mean', decode=apply_attrs)
+
+        # Construct the grid at the block centers.  The needed information is
+        # in a global attribute called 'StructMetadata.0'.
+        lat, lon = grid.from_file(FILE_NAME, 'MODIS_Grid_2D').latlon(rows,
+                                                                     cols)
     
     # There is a wrap-around issue to deal with, as some of the grid extends
     # eastward over the international dateline.  Adjust the longitude to avoid
     # a smearing effect.
-    lon[lon < 0] += 360
+    lon = np.where(lon < 0, lon + 360, lon)
 
     m = Basemap(projection='cyl', resolution='l',
                 llcrnrlat=-22.5, urcrnrlat=-7.5,
@@ -180,9 +140,7 @@ def run(FILE_NAME):
     m.drawcoastlines(linewidth=0.5)
     m.drawparallels(np.arange(-20, -5, 5), labels=[1, 0, 0, 0])
     m.drawmeridians(np.arange(170, 200, 10), labels=[0, 0, 0, 1])
-#   Data too big for plotting? Nothing will show.
-#   m.pcolormesh(lon, lat, data, latlon=True)
-    m.pcolormesh(lon[::2,::2], lat[::2,::2], data[::2,::2], latlon=True)
+    m.pcolormesh(lon, lat, data, latlon=True)
 
     cb = m.colorbar()
     cb.set_label(units)
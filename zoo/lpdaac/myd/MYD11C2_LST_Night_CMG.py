@@ -24,14 +24,14 @@ with HDF4 support.  Please see the README for details.
 """
 
 import os
-import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid
+
 USE_GDAL = False
 USE_NETCDF = False
 
@@ -81,7 +81,8 @@ def run(FILE_NAME):
             nc = Dataset(FILE_NAME)
             ncvar = nc.variables[DATAFIELD_NAME]
             ncvar.set_auto_maskandscale(False)
-            data = ncvar[::4, ::4].astype(np.float64)
+            step = 4
+            data = ncvar[::step, ::step].astype(np.float64)
 
             # Get any needed attributes.
             scale_factor = ncvar.scale_factor
@@ -99,6 +100,7 @@ def run(FILE_NAME):
 
             # Read dataset.
             data2D = hdf.select(DATAFIELD_NAME)
+            step = 1
             data = data2D[:,:].astype(np.double)
 
         
@@ -121,31 +123,10 @@ def run(FILE_NAME):
             gridmeta = ga[0]
 
         # Construct the grid.  The needed information is in a global attribute
-        # called 'StructMetadata.0'.  Use regular expressions to tease out the
-        # extents of the grid.  In addition, the grid is in packed decimal
-        # degrees, so we need to normalize to degrees.
-        ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                                  (?P<upper_left_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<upper_left_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = ul_regex.search(gridmeta)
-        x0 = np.float(match.group('upper_left_x')) / 1e6
-        y0 = np.float(match.group('upper_left_y')) / 1e6
-
-        lr_regex = re.compile(r'''LowerRightMtrs=\(
-                                  (?P<lower_right_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<lower_right_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = lr_regex.search(gridmeta)
-        x1 = np.float(match.group('lower_right_x')) / 1e6
-        y1 = np.float(match.group('lower_right_y')) / 1e6
-        
-        ny, nx = data.shape
-        x = np.linspace(x0, x1, nx)
-        y = np.linspace(y0, y1, ny)
-        lon, lat = np.meshgrid(x, y)
+        # called 'StructMetadata.0'.  Subset it the same way as the data.
+        cmg = grid.from_metadata(gridmeta, 'MODIS_8DAY_0.05DEG_CMG_LST')
+        lat, lon = cmg.latlon(slice(None, None, step),
+                              slice(None, None, step))
 
 
     # Apply the attributes to the data.
@@ -24,15 +24,15 @@ with HDF4 support.  Please see the README for details.
 """
 
 import os
-import re
 
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid
+
 USE_GDAL = False
 USE_NETCDF = False
 
@@ -51,7 +51,8 @@ def run(FILE_NAME):
         # Subset the data by a factor of 4 so that low-memory machines can 
         # render it more easily.
         gdset = gdal.Open(gname)
-        data = gdset.ReadAsArray().astype(np.float64)[::4, ::4]
+        step = 4
+        data = gdset.ReadAsArray().astype(np.float64)[::step, ::step]
     
         # Get any needed attributes.
         meta = gdset.GetMetadata()
@@ -62,13 +63,6 @@ def run(FILE_NAME):
         units = meta['units']
         long_name = meta['long_name']
     
-        # Construct the grid, remembering to subset by a factor of 4.
-        x0, xinc, _, y0, _, yinc = gdset.GetGeoTransform()
-        nx, ny = (gdset.RasterXSize, gdset.RasterYSize)
-        x = np.linspace(x0, x0 + xinc*nx, nx)
-        y = np.linspace(y0, y0 + yinc*ny, ny)
-        xv, yv = np.meshgrid(x[::4], y[::4])
-
         del gdset
 
     else:
@@ -80,6 +74,7 @@ def run(FILE_NAME):
             nc = Dataset(FILE_NAME)
             ncvar = nc.variables[DATAFIELD_NAME]
             ncvar.set_auto_maskandscale(False)
+            step = 1
             data = ncvar[:].astype(np.float64)
 
             # Get any needed attributes.
@@ -89,7 +84,6 @@ def run(FILE_NAME):
             valid_range = ncvar.valid_range
             units = ncvar.units
             long_name = ncvar.long_name
-            gridmeta = getattr(nc, 'StructMetadata.0')
 
         else:
             from pyhdf.SD import SD, SDC
@@ -97,6 +91,7 @@ def run(FILE_NAME):
 
             # Read dataset.
             data2D = hdf.select(DATAFIELD_NAME)
+            step = 1
             data = data2D[:,:].astype(np.double)
 
         
@@ -114,45 +109,15 @@ def run(FILE_NAME):
             scale_factor = sfa[0]        
             ua=attrs["units"]
             units = ua[0]
-            fattrs = hdf.attributes(full=1)
-            ga = fattrs["StructMetadata.0"]
-            gridmeta = ga[0]
-
-        # Construct the grid.  The needed information is in a global attribute
-        # called 'StructMetadata.0'.  Use regular expressions to tease out the
-        # extents of the grid.  In addition, the grid is in packed decimal
-        # degrees, so we need to normalize to degrees.
-
-        ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                                  (?P<upper_left_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<upper_left_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = ul_regex.search(gridmeta)
-        x0 = np.float(match.group('upper_left_x'))
-        y0 = np.float(match.group('upper_left_y'))
-
-        lr_regex = re.compile(r'''LowerRightMtrs=\(
-                                  (?P<lower_right_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<lower_right_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = lr_regex.search(gridmeta)
-        x1 = np.float(match.group('lower_right_x'))
-        y1 = np.float(match.group('lower_right_y'))
-        
-        ny, nx = data.shape
-        x = np.linspace(x0, x1, nx)
-        y = np.linspace(y0, y1, ny)
-        xv, yv = np.meshgrid(x, y)
     
 
-    # In basemap, the sinusoidal projection is global, so we won't use it.
-    # Instead we'll convert the grid back to lat/lons so we can use a local 
-    # projection.
-    sinu = pyproj.Proj("+proj=sinu +R=6371007.181 +nadgrids=@null +wktext")
-    wgs84 = pyproj.Proj("+init=EPSG:4326") 
-    lon, lat= pyproj.transform(sinu, wgs84, xv, yv)
+    # Construct the grid.  The needed information is in a global attribute
+    # called 'StructMetadata.0'.  In basemap, the sinusoidal projection is
+    # global, so we won't use it.  Instead we'll convert the grid back to
+    # lat/lons so we can use a local projection.  Subset the grid the same
+    # way as the data.
+    modis = grid.from_file(FILE_NAME, 'MODIS_Grid_16DAY_500m_VI')
+    lat, lon = modis.latlon(slice(None, None, step), slice(None, None, step))
 
     # Apply the attributes to the data.
     invalid = np.logical_or(data < valid_range[0], data > valid_range[1])
@@ -24,15 +24,15 @@ with HDF4 support.  Please see the README for details.
 """
 
 import os
-import re
 
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid, reader
+
 USE_NETCDF = True
 USE_GDAL = False
 def run(FILE_NAME):
@@ -71,86 +71,30 @@ def run(FILE_NAME):
         del gdset
 
     else:
-        if USE_NETCDF:
-
-            from netCDF4 import Dataset
-
-            # The scaling equation isn't what netcdf4 expects, so turn it off.
-            # Scale down the data by a factor of 6 so that low-memory machines
-            # can handle it.
-            nc = Dataset(FILE_NAME)
-            ncvar = nc.variables[DATAFIELD_NAME]
-            ncvar.set_auto_maskandscale(False)
-
-            # Scale down the data by a factor of 6 so that low-memory machines
-            # can handle it.
-            data = ncvar[::6, ::6].astype(np.float64)
-
-            # Get any needed attributes.  The valid_range attribute is a string,
-            # which is not usually the case.
-            scale = ncvar.scale_factor
-            fillvalue = ncvar._FillValue
-            valid_range = [np.float64(x) for x in ncvar.valid_range.split(', ')]
-            units = ncvar.units
-            long_name = ncvar.long_name
-            gridmeta = getattr(nc, 'StructMetadata.0')
-
-        else:
-            from pyhdf.SD import SD, SDC
-            hdf = SD(FILE_NAME, SDC.READ)
-
-            # Read dataset.
-            data2D = hdf.select(DATAFIELD_NAME)
-            data = data2D[:,:].astype(np.double)
-
-            # Scale down the data by a factor of 6 so that low-memory machines
-            # can handle it.
-            data = data[::6, ::6]
-
-        
-            # Read attributes.
-            attrs = data2D.attributes(full=1)
-            lna=attrs["long_name"]
-            long_name = lna[0]
-            vra=attrs["valid_range"]
-            valid_range = vra[0]
-            fva=attrs["_FillValue"]
-            fillvalue = fva[0]
-            sfa=attrs["scale_factor"]
-            scale = sfa[0]        
-            ua=attrs["units"]
-            units = ua[0]
-            fattrs = hdf.attributes(full=1)
-            ga = fattrs["StructMetadata.0"]
-            gridmeta = ga[0]
-            
+        # Open the file with netCDF4, or pyhdf if netCDF4 isn't wanted.
+        # Values are read unscaled: the scaling equation isn't what netcdf4
+        # expects.
+        f = reader.open_file(FILE_NAME, 'netcdf4' if USE_NETCDF else 'pyhdf')
+        var = f[DATAFIELD_NAME]
+
+        # Scale down the data by a factor of 6 so that low-memory machines
+        # can handle it.
+        data = var[::6, ::6].astype(np.float64)
+
+        # Get any needed attributes.  The valid_range attribute is a string,
+        # which is not usually the case.
+        scale = var.attrs['scale_factor']
+        fillvalue = var.attrs['_FillValue']
+        valid_range = [np.float64(x)
+                       for x in var.attrs['valid_range'].split(', ')]
+        units = var.attrs['units']
+        long_name = var.attrs['long_name']
+        gridmeta = f.attrs['StructMetadata.0']
+
         # Construct the grid.  The needed information is in a global attribute
-        # called 'StructMetadata.0'.  Use regular expressions to tease out the
-        # extents of the grid.  In addition, the grid is in packed decimal
-        # degrees, so we need to normalize to degrees.
-
-        ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                                  (?P<upper_left_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<upper_left_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = ul_regex.search(gridmeta)
-        x0 = np.float(match.group('upper_left_x')) / 1e6
-        y0 = np.float(match.group('upper_left_y')) / 1e6
-
-        lr_regex = re.compile(r'''LowerRightMtrs=\(
-                                  (?P<lower_right_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<lower_right_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = lr_regex.search(gridmeta)
-        x1 = np.float(match.group('lower_right_x')) / 1e6
-        y1 = np.float(match.group('lower_right_y')) / 1e6
-        
-        ny, nx = data.shape
-        x = np.linspace(x0, x1, nx)
-        y = np.linspace(y0, y1, ny)
-        lon, lat = np.meshgrid(x, y)
+        # called 'StructMetadata.0'.  Subset it the same way as the data.
+        cmg = grid.from_metadata(gridmeta, 'VIP_CMG_GRID')
+        lat, lon = cmg.latlon(slice(None, None, 6), slice(None, None, 6))
     
 
     # Apply the attributes to the data.
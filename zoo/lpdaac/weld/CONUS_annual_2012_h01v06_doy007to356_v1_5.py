@@ -21,15 +21,15 @@ specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import re
 
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid
+
 USE_GDAL = False
 USE_NETCDF = False
 
@@ -49,7 +49,8 @@ def run(FILE_NAME):
         # Scale down the data by a factor of 5 so that low-memory machines
         # can handle it.
         gdset = gdal.Open(gname)
-        data = gdset.ReadAsArray().astype(np.float64)[::5, ::5]
+        step = 5
+        data = gdset.ReadAsArray().astype(np.float64)[::step, ::step]
     
         # Get any needed attributes.
         meta = gdset.GetMetadata()
@@ -58,13 +59,6 @@ def run(FILE_NAME):
         valid_range = [np.float(x) for x in meta['valid_range'].split(', ')]
         units = meta['units']
     
-        # Construct the grid.
-        x0, xinc, _, y0, _, yinc = gdset.GetGeoTransform()
-        ny, nx = (gdset.RasterYSize / 5, gdset.RasterXSize / 5)
-        x = np.linspace(x0, x0 + xinc*5*nx, nx)
-        y = np.linspace(y0, y0 + yinc*5*ny, ny)
-        xv, yv = np.meshgrid(x, y)
-
         del gdset
 
     else:
@@ -77,14 +71,14 @@ def run(FILE_NAME):
             nc = Dataset(FILE_NAME)
             ncvar = nc.variables[DATAFIELD_NAME]
             ncvar.set_auto_maskandscale(False)
-            data = ncvar[::5, ::5].astype(np.float64)
+            step = 5
+            data = ncvar[::step, ::step].astype(np.float64)
 
             # Get any needed attributes.
             scale = ncvar.scale_factor
             fillvalue = ncvar._FillValue
             valid_range = ncvar.valid_range
             units = ncvar.units
-            gridmeta = getattr(nc, 'StructMetadata.0')
         else:
             from pyhdf.SD import SD, SDC
             hdf = SD(FILE_NAME, SDC.READ)
@@ -95,7 +89,8 @@ def run(FILE_NAME):
 
             # Scale down the data by a factor of 6 so that low-memory machines
             # can handle it.
-            data = data[::6, ::6]
+            step = 6
+            data = data[::step, ::step]
 
         
             # Read attributes.
@@ -108,35 +103,6 @@ def run(FILE_NAME):
             scale = sfa[0]        
             ua=attrs["units"]
             units = ua[0]
-            fattrs = hdf.attributes(full=1)
-            ga = fattrs["StructMetadata.0"]
-            gridmeta = ga[0]
-        # Construct the grid.  The needed information is in a global attribute
-        # called 'StructMetadata.0'.  Use regular expressions to tease out the
-        # extents of the grid.  
-
-        ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                                  (?P<upper_left_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<upper_left_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = ul_regex.search(gridmeta)
-        x0 = np.float(match.group('upper_left_x'))
-        y0 = np.float(match.group('upper_left_y'))
-
-        lr_regex = re.compile(r'''LowerRightMtrs=\(
-                                  (?P<lower_right_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<lower_right_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = lr_regex.search(gridmeta)
-        x1 = np.float(match.group('lower_right_x'))
-        y1 = np.float(match.group('lower_right_y'))
-        
-        ny, nx = data.shape
-        x = np.linspace(x0, x1, nx)
-        y = np.linspace(y0, y1, ny)
-        xv, yv = np.meshgrid(x, y)
 
     # Apply the attributes to the data.
     invalid = np.logical_or(data < valid_range[0], data > valid_range[1])
@@ -145,27 +111,16 @@ def run(FILE_NAME):
     data = data * scale
     data = np.ma.masked_array(data, np.isnan(data))
     
-    # Convert the grid back to lat/lon.  The 1st and 2nd standard parallels,
-    # the center meridian, and the latitude of projected origin are in the
-    # projection parameters contained in the "StructMetadata.0" global
-    # attribute.  The following regular expression could have been used to 
-    # retrieve them.
+    # Construct the grid and convert it back to lat/lon.  The grid extents,
+    # the 1st and 2nd standard parallels, the center meridian, and the
+    # latitude of projected origin are all in the "StructMetadata.0" global
+    # attribute.  Subset the grid the same way as the data.
     #
     # Ref:  HDF-EOS Library User's Guide for the EOSDIS Evolution and
     #       Development (EED) Contract, Volume 2, Revision 02:  Function
     #       Reference Guide, pages 1-6 through 1-13.
-    #
-    # aea_regex = re.compile(r'''Projection=GCTP_ALBERS\s+ProjParams=
-    #                            \(\d+,\d+
-    #                            (?P<stdpr1>[-]?\d+),
-    #                            (?P<stdpr2>[-]?\d+),
-    #                            (?P<centmer>[-]?\d+),
-    #                            (?P<origlat>[-]?\d+)
-    #                            ,0{7}\)''', re.VERBOSE)
-    #
-    aea = pyproj.Proj("+proj=aea +lat_1=29.5 +lat2=45.5 +lon_0=-96 +lat_0=23")
-    wgs84 = pyproj.Proj("+init=EPSG:4326") 
-    lon, lat= pyproj.transform(aea, wgs84, xv, yv)
+    weld = grid.from_file(FILE_NAME, 'WELD_GRID')
+    lat, lon = weld.latlon(slice(None, None, step), slice(None, None, step))
 
     m = Basemap(projection='aea', resolution='i',
                 lat_1=29.5, lat_2=45.5, lon_0=-96, lat_0=23,
@@ -31,6 +31,8 @@ from mpl_toolkits.basemap import Basemap
 
 import numpy as np
 
+from zoo.lib import decode
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -41,7 +43,7 @@ def run(FILE_NAME):
         from netCDF4 import Dataset
         nc = Dataset(FILE_NAME)
 
-        data = nc.variables[DATAFIELD_NAME][:].astype(np.float64)
+        data = nc.variables[DATAFIELD_NAME][:]
         latitude = nc.variables['Latitude'][:]
         longitude = nc.variables['Longitude'][:]
     
@@ -57,7 +59,7 @@ def run(FILE_NAME):
 
         # Read dataset.
         data2D = hdf.select(DATAFIELD_NAME)
-        data = data2D[:,:].astype(np.float64)
+        data = data2D[:,:]
 
         # Read geolocation dataset.
 		# This product has multiple 'Latitude' and 'Longitude' pair under different groups.
@@ -73,9 +75,8 @@ def run(FILE_NAME):
         aoa=attrs["OFFSET"]
         add_offset = aoa[0]
         
-    data[data == -32768] = np.nan
-    data = data * scale_factor + add_offset
-    datam = np.ma.masked_array(data, np.isnan(data))
+    datam = decode.decode(data, convention='amsre', scale=scale_factor,
+                          offset=add_offset, fill=-32768)
 
     units = "degrees K"
     long_name = DATAFIELD_NAME
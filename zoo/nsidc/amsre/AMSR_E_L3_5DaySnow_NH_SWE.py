@@ -22,13 +22,14 @@ specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid, proj
+
 USE_GDAL = False
 
 def run(FILE_NAME):
@@ -38,7 +39,6 @@ def run(FILE_NAME):
 
     if USE_GDAL:
         import gdal
-        import mpl_toolkits.basemap.pyproj as pyproj
         GRID_NAME = 'Northern Hemisphere'
         gname = 'HDF4_EOS:EOS_GRID:"{0}":{1}:{2}'.format(FILE_NAME,
                                                          GRID_NAME,
@@ -51,12 +51,10 @@ def run(FILE_NAME):
         nx, ny = (gdset.RasterXSize, gdset.RasterYSize)
         x = np.linspace(x0, x0 + xinc*nx, nx)
         y = np.linspace(y0, y0 + yinc*ny, ny)
-        xv, yv = np.meshgrid(x, y)
 
         # Reproject the coordinates out of lamaz into lat/lon.
-        lamaz = pyproj.Proj("+proj=laea +a=6371228 +lat_0=90 +lon_0=0 +units=m")
-        wgs84 = pyproj.Proj("+init=EPSG:4326") 
-        lon, lat= pyproj.transform(lamaz, wgs84, xv, yv)
+        lamaz = "+proj=laea +a=6371228 +lat_0=90 +lon_0=0 +units=m"
+        lon, lat = proj.transform(lamaz, x[np.newaxis, :], y[:, np.newaxis])
         del gdset
     else:
         from pyhdf.SD import SD, SDC
@@ -65,24 +63,9 @@ def run(FILE_NAME):
         data2D = hdf.select(DATAFIELD_NAME)
         data = data2D[:,:].astype(np.float64)
 
-	    # Read geolocation dataset from HDF-EOS2 dumper output.
-        GEO_FILE_NAME = 'lat_AMSR_E_L3_5DaySnow_V09_20050126.Northern_Hemisphere.output'
-        try:
-            GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                         GEO_FILE_NAME)
-        except KeyError:
-            pass
-
-        lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lat = lat.reshape(data.shape)
-        GEO_FILE_NAME = 'lon_AMSR_E_L3_5DaySnow_V09_20050126.Northern_Hemisphere.output'
-        try: 
-            GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                         GEO_FILE_NAME)
-        except KeyError:
-            pass
-        lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        lon = lon.reshape(data.shape)
+        # Construct the grid.  The needed information is in a global attribute
+        # called 'StructMetadata.0'.
+        lat, lon = grid.from_file(FILE_NAME, 'Northern Hemisphere').latlon()
     # Filter out invalid range values, multiply by two according to the data
     # spec.
     data[data > 240] = np.nan
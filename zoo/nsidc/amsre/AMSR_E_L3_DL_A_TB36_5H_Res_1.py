@@ -21,13 +21,14 @@ specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid, proj
+
 USE_GDAL = False
 
 def run(FILE_NAME):
@@ -37,7 +38,6 @@ def run(FILE_NAME):
 
     if USE_GDAL:
         import gdal
-        import mpl_toolkits.basemap.pyproj as pyproj        
         GRID_NAME = 'Ascending_Land_Grid'    
         gname = 'HDF4_EOS:EOS_GRID:"{0}":{1}:{2}'.format(FILE_NAME,
                                                          GRID_NAME,
@@ -55,16 +55,14 @@ def run(FILE_NAME):
         nx, ny = (gdset.RasterXSize, gdset.RasterYSize)
         x = np.linspace(x0, x0 + xinc*nx, nx)
         y = np.linspace(y0, y0 + yinc*ny, ny)
-        xv, yv = np.meshgrid(x, y)
         args = ["+proj=cea",
                 "+lat_0=0",
                 "+lon_0=0",
                 "+lat_ts=30",
                 "+a=6371228",
                 "+units=m"]
-        pstereo = pyproj.Proj(' '.join(args))
-        wgs84 = pyproj.Proj("+init=EPSG:4326") 
-        lon, lat= pyproj.transform(pstereo, wgs84, xv, yv)
+        cea = ' '.join(args)
+        lon, lat = proj.transform(cea, x[np.newaxis, :], y[:, np.newaxis])
         del gdset
     else:
         from pyhdf.SD import SD, SDC
@@ -74,22 +72,9 @@ def run(FILE_NAME):
         data2D = hdf.select(DATAFIELD_NAME)
         data = data2D[:,:].astype(np.float64)
 
-	    # Read geolocation dataset from HDF-EOS2 dumper output.
-        GEO_FILE_NAME = 'lat_AMSR_E_L3_DailyLand_V06_20050118_Ascending_Land_Grid.output'
-        try:
-            GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                         GEO_FILE_NAME)
-        except KeyError:
-            pass
-
-        lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        GEO_FILE_NAME = 'lon_AMSR_E_L3_DailyLand_V06_20050118_Ascending_Land_Grid.output'
-        try: 
-            GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
-                                         GEO_FILE_NAME)
-        except KeyError:
-            pass
-        lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
+        # Construct the grid.  The needed information is in a global attribute
+        # called 'StructMetadata.0'.
+        lat, lon = grid.from_file(FILE_NAME, 'Ascending_Land_Grid').latlon()
 
         # Read attributes.
         attrs = data2D.attributes(full=1)
@@ -21,13 +21,13 @@ specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import re
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid
+
 USE_GDAL = False
 
 def run(FILE_NAME):
@@ -45,10 +45,6 @@ def run(FILE_NAME):
         gdset = gdal.Open(gname)
         data = gdset.ReadAsArray().astype(np.float64)
 
-        # Read projection parameters from global attribute.
-        meta = gdset.GetMetadata()
-        x0, xinc, _, y0, _, yinc = gdset.GetGeoTransform()
-        nx, ny = (gdset.RasterXSize, gdset.RasterYSize)
         del gdset
     else:
         from pyhdf.SD import SD, SDC
@@ -58,58 +54,16 @@ def run(FILE_NAME):
         data2D = hdf.select(DATAFIELD_NAME)
         data = data2D[:,:].astype(np.float64)
 
-        # Read global attribute.
-        fattrs = hdf.attributes(full=1)
-        ga = fattrs["StructMetadata.0"]
-        gridmeta = ga[0]
-            
-        # Construct the grid.  The needed information is in a global attribute
-        # called 'StructMetadata.0'.  Use regular expressions to tease out the
-        # extents of the grid. 
-        ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                                  (?P<upper_left_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<upper_left_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = ul_regex.search(gridmeta)
-        x0 = np.float(match.group('upper_left_x')) 
-        y0 = np.float(match.group('upper_left_y')) 
-
-        lr_regex = re.compile(r'''LowerRightMtrs=\(
-                                  (?P<lower_right_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<lower_right_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = lr_regex.search(gridmeta)
-        x1 = np.float(match.group('lower_right_x'))
-        y1 = np.float(match.group('lower_right_y'))
-        ny, nx = data.shape
-        xinc = (x1 - x0) / nx
-        yinc = (y1 - y0) / ny
-
     # Apply the attributes information.
     # Ref:  http://nsidc.org/data/docs/daac/ae_si6_6km_tbs.gd.html#2
     data[data == 0] = np.nan
     data *= 0.1
     data = np.ma.masked_array(data, np.isnan(data))
 
-    x = np.linspace(x0, x0 + xinc*nx, nx)
-    y = np.linspace(y0, y0 + yinc*ny, ny)
-    xv, yv = np.meshgrid(x, y)
-    args = ["+proj=stere",
-            "+lat_0=90",
-            "+lon_0=-45",
-            "+lat_ts=70",
-            "+k=1",
-            "+es=0.006693883",
-            "+a=6378273",
-            "+x_0=0",
-            "+y_0=0",
-            "+ellps=WGS84",
-            "+datum=WGS84"]
-    pstereo = pyproj.Proj(' '.join(args))
-    wgs84 = pyproj.Proj("+init=EPSG:4326") 
-    lon, lat= pyproj.transform(pstereo, wgs84, xv, yv)
+    # Construct the grid.  The needed information is in a global attribute
+    # called 'StructMetadata.0'.  Reproject out of the GCTP stereographic
+    # into lat/lon.
+    lat, lon = grid.from_file(FILE_NAME, 'NpPolarGrid06km').latlon()
 
     units = 'K'
     long_name = DATAFIELD_NAME
@@ -25,14 +25,14 @@ Last updated: 2016-03-04
 """
 
 import os
-import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid
+
 
 def run(FILE_NAME):
     
@@ -45,52 +45,15 @@ def run(FILE_NAME):
     data2D = hdf.select(DATAFIELD_NAME)
     data = data2D[:,:].astype(np.float64)
 
-
-    # There are multiple girds in this file.
-    # Thus, simple regular expression search for 
-    # UpperLeft/LowerRightPoint from StructMetadata.0 won't work. 
-    # 
-    # Use HDFView and look for the following parameters:
-    #
-    # GROUP=GRID_2
-    #       GridName="SpPolarGrid06km"
-    #	XDim=1264
-    #	YDim=1328
-    #	UpperLeftPointMtrs=(-3950000.000000,4350000.000000)
-    #	LowerRightMtrs=(3950000.000000,-3950000.000000)
-    ny, nx = data.shape
-    x1 = 3950000
-    x0 = -3950000
-    y0 = 4350000
-    y1 = -3950000
-    xinc = (x1 - x0) / nx
-    yinc = (y1 - y0) / ny
-
-
     # Handle land mask.
     # http://nsidc.org/data/docs/daac/ae_si12_12km_seaice/data.html
     data[data > 100.0] = np.nan
     data = np.ma.masked_array(data, np.isnan(data))
 
-    # Construct the grid.  
-    # Reproject out of the GCTP stereographic into lat/lon.
-    x = np.linspace(x0, x0 + xinc*nx, nx)
-    y = np.linspace(y0, y0 + yinc*ny, ny)
-    xv, yv = np.meshgrid(x, y)
-    args = ["+proj=stere",
-            "+lat_0=-90",
-            "+lon_0=0",
-            "+lat_ts=-70",
-            "+k=1",
-            "+es=0.006693883",
-            "+a=6378273",
-            "+x_0=0",
-            "+y_0=0",
-            "+ellps=WGS84",
-            "+datum=WGS84"]
-    pstereo = pyproj.Proj(' '.join(args))
-    wgs84 = pyproj.Proj("+init=EPSG:4326") 
-    lon, lat= pyproj.transform(pstereo, wgs84, xv, yv)
+    # Construct the grid.  The needed information is in a global attribute
+    # called 'StructMetadata.0'.  Reproject out of the GCTP polar
+    # stereographic into lat/lon.
+    lat, lon = grid.from_file(FILE_NAME, 'SpPolarGrid12km').latlon()
 
     units = 'Percent'
     long_name = DATAFIELD_NAME
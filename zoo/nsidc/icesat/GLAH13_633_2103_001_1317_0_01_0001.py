@@ -27,6 +27,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import raster
+
 # Can do this using either netCDF4 or h5py.
 USE_NETCDF4 = False
 
@@ -110,8 +112,7 @@ def run(FILE_NAME):
     m.drawparallels(np.arange(-90., 120., 30.))
     m.drawmeridians(np.arange(-180, 180., 45.))
     # m.pcolormesh(longitude, latitude, temp, latlon=True, vmin=0, vmax=1)
-    m.scatter(longitude, latitude, c=temp, s=1, cmap=plt.cm.jet,
-              edgecolors=None, linewidth=0)
+    raster.draw(longitude, latitude, temp, m=m, cmap=plt.cm.jet)
     cb = m.colorbar()
     cb.set_label(units)
 
@@ -21,14 +21,14 @@ specified by the environment variable HDFEOS_ZOO_DIR.
 """
 
 import os
-import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid, lod, reader
+
 USE_GDAL = False
 
 def run(FILE_NAME):
@@ -36,77 +36,26 @@ def run(FILE_NAME):
     # Identify the data field.
     DATAFIELD_NAME = 'Snow_Cover_Daily_Tile'
 
-    if USE_GDAL:    
-        import gdal
-        GRID_NAME = 'MOD_Grid_Snow_500m'
-    
-        gname = 'HDF4_EOS:EOS_GRID:"{0}":{1}:{2}'.format(FILE_NAME,
-                                                         GRID_NAME,
-                                                         DATAFIELD_NAME)
-        gdset = gdal.Open(gname)
-
-        data = gdset.ReadAsArray()
-
-        # Construct the grid.
-        meta = gdset.GetMetadata()
-        x0, xinc, _, y0, _, yinc = gdset.GetGeoTransform()
-        nx, ny = (gdset.RasterXSize, gdset.RasterYSize)
-
-        del gdset
-
-    else:
-        from pyhdf.SD import SD, SDC
-        hdf = SD(FILE_NAME, SDC.READ)
-
-        # Read dataset.
-        data2D = hdf.select(DATAFIELD_NAME)
-        data = data2D[:,:].astype(np.float64)
-
-        # Read global attribute.
-        fattrs = hdf.attributes(full=1)
-        ga = fattrs["StructMetadata.0"]
-        gridmeta = ga[0]
-            
-        # Construct the grid.  The needed information is in a global attribute
-        # called 'StructMetadata.0'.  Use regular expressions to tease out the
-        # extents of the grid. 
-        ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                                  (?P<upper_left_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<upper_left_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = ul_regex.search(gridmeta)
-        x0 = np.float(match.group('upper_left_x')) 
-        y0 = np.float(match.group('upper_left_y')) 
-
-        lr_regex = re.compile(r'''LowerRightMtrs=\(
-                                  (?P<lower_right_x>[+-]?\d+\.\d+)
-                                  ,
-                                  (?P<lower_right_y>[+-]?\d+\.\d+)
-                                  \)''', re.VERBOSE)
-        match = lr_regex.search(gridmeta)
-        x1 = np.float(match.group('lower_right_x')) 
-        y1 = np.float(match.group('lower_right_y')) 
-        ny, nx = data.shape
-        xinc = (x1 - x0) / nx
-        yinc = (y1 - y0) / ny
-
-
-    x = np.linspace(x0, x0 + xinc*nx, nx)
-    y = np.linspace(y0, y0 + yinc*ny, ny)
-    xv, yv = np.meshgrid(x, y)
-
-    # In basemap, the sinusoidal projection is global, so we won't use it.
-    # Instead we'll convert the grid back to lat/lons.
-    sinu = pyproj.Proj("+proj=sinu +R=6371007.181 +nadgrids=@null +wktext")
-    wgs84 = pyproj.Proj("+init=EPSG:4326") 
-    lon, lat= pyproj.transform(sinu, wgs84, xv, yv)
+    # Open the file with pyhdf, or GDAL if asked to.
+    f = reader.open_file(FILE_NAME, 'gdal' if USE_GDAL else None)
+
+    # 2400x2400 is more than the figure can show, so read the field at the
+    # resolution of the figure.  The values are categories, so each block of
+    # cells is reduced to its most frequent value.
+    data, rows, cols = lod.read(f[DATAFIELD_NAME], method='mode')
+
+    # Construct the grid at the block centers.  The needed information is in
+    # a global attribute called 'StructMetadata.0'.  In basemap, the
+    # sinusoidal projection is global, so we won't use it.  Instead we'll
+    # convert the grid back to lat/lons.
+    lat, lon = grid.from_file(FILE_NAME, 'MOD_Grid_Snow_500m').latlon(rows,
+                                                                      cols)
 
     # There's a wraparound issue for the longitude, as part of the tile extends
     # over the international dateline, and pyproj wraps longitude values west
     # of 180W (< -180) into positive territory.  Basemap's pcolormesh method
     # doesn't like that.
-    lon[lon > 0] -= 360
+    lon = np.where(lon > 0, lon - 360, lon)
 
 
 
@@ -125,9 +74,7 @@ def run(FILE_NAME):
     bounds = [0, 25, 39, 255, 256]
     norm = mpl.colors.BoundaryNorm(bounds, cmap.N)
     
-    # 2400x2400 seems to be too much, so we'll subset it.
-    m.pcolormesh(lon[::2,::2], lat[::2,::2], data[::2,::2], latlon=True,
-                 cmap=cmap, norm=norm)
+    m.pcolormesh(lon, lat, data, latlon=True, cmap=cmap, norm=norm)
     
     color_bar = plt.colorbar()
     color_bar.set_ticks([12, 32, 147, 255.5])
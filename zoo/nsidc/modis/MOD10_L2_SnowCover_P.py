@@ -30,6 +30,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import geocache
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -58,14 +60,12 @@ def run(FILE_NAME):
         GEO_FILE_NAME = 'lat_MOD10_L2.A2000065.0040.005.2008235221207.output'
         GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
                                      GEO_FILE_NAME)
-        lat = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        latitude = lat.reshape(data.shape)
+        latitude = geocache.load(GEO_FILE_NAME, data.shape)
         
         GEO_FILE_NAME = 'lon_MOD10_L2.A2000065.0040.005.2008235221207.output'
         GEO_FILE_NAME = os.path.join(os.environ['HDFEOS_ZOO_DIR'], 
                                      GEO_FILE_NAME)
-        lon = np.genfromtxt(GEO_FILE_NAME, delimiter=',', usecols=[0])
-        longitude = lon.reshape(data.shape)
+        longitude = geocache.load(GEO_FILE_NAME, data.shape)
 
     
     # Draw a polar stereographic projection using the low resolution coastline
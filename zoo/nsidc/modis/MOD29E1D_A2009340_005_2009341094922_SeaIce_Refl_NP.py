@@ -24,14 +24,14 @@ code to work.  Please see the README for details.
 """
 
 import os
-import re
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
-import mpl_toolkits.basemap.pyproj as pyproj
 import numpy as np
 
+from zoo.lib import grid, structmeta
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -58,35 +58,11 @@ def run(FILE_NAME):
         gridmeta = ga[0]
 
     # Construct the grid.  The needed information is in a global attribute
-    # called 'StructMetadata.0'.  Use regular expressions to tease out the
-    # extents of the grid.  
-    ul_regex = re.compile(r'''UpperLeftPointMtrs=\(
-                              (?P<upper_left_x>[+-]?\d+\.\d+)
-                              ,
-                              (?P<upper_left_y>[+-]?\d+\.\d+)
-                              \)''', re.VERBOSE)
-    match = ul_regex.search(gridmeta)
-    x0 = np.float(match.group('upper_left_x'))
-    y0 = np.float(match.group('upper_left_y'))
-
-    lr_regex = re.compile(r'''LowerRightMtrs=\(
-                              (?P<lower_right_x>[+-]?\d+\.\d+)
-                              ,
-                              (?P<lower_right_y>[+-]?\d+\.\d+)
-                              \)''', re.VERBOSE)
-    match = lr_regex.search(gridmeta)
-    x1 = np.float(match.group('lower_right_x'))
-    y1 = np.float(match.group('lower_right_y'))
-        
-    ny, nx = data.shape
-    x = np.linspace(x0, x1, nx)
-    y = np.linspace(y0, y1, ny)
-    xv, yv = np.meshgrid(x, y)
-    
-    # Reproject into latlon
-    lamaz = pyproj.Proj("+proj=laea +a=6371228 +lat_0=90 +lon_0=0 +units=m")
-    wgs84 = pyproj.Proj("+init=EPSG:4326") 
-    lon, lat= pyproj.transform(lamaz, wgs84, xv, yv)
+    # called 'StructMetadata.0'.  The file holds a grid for each hemisphere,
+    # so use the one that holds the field, and reproject the coordinates out
+    # of lamaz into lat/lon.
+    gridmeta = structmeta.parse(gridmeta).find_field(DATAFIELD_NAME)
+    lat, lon = grid.from_structure(gridmeta).latlon()
 
     # Use a north polar azimuthal equal area projection.
     m = Basemap(projection='nplaea', resolution='l',
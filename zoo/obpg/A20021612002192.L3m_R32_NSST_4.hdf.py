@@ -29,35 +29,18 @@ from mpl_toolkits.basemap import Basemap
 import numpy as np
 from pyhdf.SD import SD, SDC
 
+from zoo.lib import grid
+
 # Open HDF4 file.
 FILE_NAME = 'A20021612002192.L3m_R32_NSST_4.hdf'
 hdf = SD(FILE_NAME, SDC.READ)
 
-# The lat and lon should be calculated using lat and lon of southwest point.
-# Then, we need number of lines and columns to calculate the lat and lon
-# step. Assume even space between lat and lon points to get all lat and lon
-# data.
-# Extract southwest point from global attribute.
+# Standard mapped images are global equal-angle grids of 'Number of Lines'
+# by 'Number of Columns' cells, from the north west corner.
 gattrs =  hdf.attributes(full=1)
-swlata = gattrs['SW Point Latitude']
-swlat = swlata[0]
-swlona = gattrs['SW Point Longitude']
-swlon = swlona[0]
-linesa = gattrs['Number of Lines']
-nlat = linesa[0]
-colsa = gattrs['Number of Columns']
-nlon = colsa[0]
-latstepa = gattrs['Latitude Step']
-latstep = latstepa[0]
-lonstepa = gattrs['Longitude Step']
-lonstep = lonstepa[0]
-
-
-nmlat = swlat + (nlat)*latstep;
-emlon = swlon + (nlon)*lonstep;
-
-longitude = np.r_[nmlat :  swlat : (-latstep)]
-latitude =  np.r_[swlon :  emlon : (lonstep)]
+nlat = gattrs['Number of Lines'][0]
+nlon = gattrs['Number of Columns'][0]
+latitude, longitude = grid.equal_angle(nlat, nlon).axes()
 
 # Read dataset.
 DATAFIELD_NAME='l3m_data'
@@ -84,7 +67,7 @@ m = Basemap(projection='cyl', resolution='l',
 m.drawcoastlines(linewidth=0.5)
 m.drawparallels(np.arange(-90, 91, 45))
 m.drawmeridians(np.arange(-180, 180, 45), labels=[True,False,False,True])
-m.pcolormesh(latitude, longitude, dataf, latlon=True)
+m.pcolormesh(longitude, latitude, dataf, latlon=True)
 
 # Draw color bar.
 cb = m.colorbar()
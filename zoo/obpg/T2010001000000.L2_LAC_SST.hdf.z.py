@@ -28,6 +28,8 @@ from mpl_toolkits.basemap import Basemap
 import numpy as np
 from pyhdf.SD import SD, SDC
 
+from zoo.lib import obpg
+
 # Open HDF4 file.
 FILE_NAME = 'T2010001000000.L2_LAC_SST.hdf'
 hdf = SD(FILE_NAME, SDC.READ)
@@ -36,49 +38,10 @@ hdf = SD(FILE_NAME, SDC.READ)
 # Read dataset.
 DATAFIELD_NAME='sst'
 data = hdf.select(DATAFIELD_NAME)
-lat = hdf.select('latitude')
-latnp = lat[:,:]
-lon = hdf.select('longitude')[:,:]
-lonnp = lon[:,:]
-
 # We need to blow up lat/lon values using control point columns parameter
 # to match data size.
-
-# Read global attributes
-gattrs =  hdf.attributes(full=1)
-nopcp = gattrs['Number of Pixel Control Points']
-cpc = hdf.select('cntl_pt_cols')
-step1 =  cpc[2] - cpc[1]
-step2 = cpc[nopcp[0] - 1] - cpc[nopcp[0] - 2]
-
-m = data.dim(0).length()
 n = data.dim(1).length()
-
-# We need to interpolate lat and lon to match the size of data.
-longitude = np.zeros((m,n), dtype=np.float)
-latitude = np.zeros((m,n), dtype=np.float)
-    
-for i in range (0,  m):
-    for j in range (0,  nopcp[0]):
-        if j == 0:
-            latitude[i,j] = latnp[i,j]
-            longitude[i,j] = lonnp[i,j]
-            continue
-        if j > 0 and j < nopcp[0]-1:
-            # print 'step1='+str(step1)
-            count=step1*(j-1)+1
-            arr_fill=np.linspace(latnp[i,(j-1)], latnp[i, j], (step1+1))
-            latitude[i, count:count+(step1)] = arr_fill[0:step1]
-            arr_fill=np.linspace(lonnp[i,(j-1)], lonnp[i, j], (step1+1))
-            longitude[i, count:count+(step1)] = arr_fill[0:step1]
-            continue
-        if j == nopcp[0]-1:
-            count=step1*(j-1)+1 
-            arr_fill=np.linspace(latnp[i,(j-1)], latnp[i, j], (step2+1)) 
-            latitude[i, count:count+(step2)] = arr_fill[0:step2]
-            arr_fill=np.linspace(lonnp[i,(j-1)], lonnp[i, j], (step2+1)) 
-            longitude[i, count:count+(step2)] = arr_fill[0:step2]
-            continue
+latitude, longitude = obpg.geolocation(hdf, n)
 
 dataf = data[:,:].astype(float)
 
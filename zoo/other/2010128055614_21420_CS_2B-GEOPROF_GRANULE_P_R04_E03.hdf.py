@@ -28,7 +28,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 from pyhdf.SD import SD, SDC
-from pyhdf import HDF, VS, V
+
+from zoo.lib import vdata
 
 # Open HDF4 file.
 FILE_NAME = '2010128055614_21420_CS_2B-GEOPROF_GRANULE_P_R04_E03.hdf'
@@ -60,29 +61,12 @@ attrs_h = ht.attributes(full=1)
 uah=attrs_h["units"]
 units_h = uah[0]
 
-h = HDF.HDF(FILE_NAME)
-vs = h.vstart()
-
-xid = vs.find('Latitude')
-latid = vs.attach(xid)
-latid.setfields('Latitude')
-nrecs, _, _, _, _ = latid.inquire()
-latitude = latid.read(nRec=nrecs)
-latid.detach()
-
-lonid = vs.attach(vs.find('Longitude'))
-lonid.setfields('Longitude')
-nrecs, _, _, _, _ = lonid.inquire()
-longitude = lonid.read(nRec=nrecs)
-lonid.detach()
-
-timeid = vs.attach(vs.find('Profile_time'))
-timeid.setfields('Profile_time')
-nrecs, _, _, _, _ = timeid.inquire()
-time = timeid.read(nRec=nrecs)
-units_t =  timeid.attr('units').get()
-longname_t = timeid.attr('long_name').get()
-timeid.detach()
+# Read the geolocation and time vdatas.
+latitude, longitude, time = vdata.read_fields(
+    FILE_NAME, ('Latitude', 'Longitude', 'Profile_time'))
+attrs_t = vdata.attrs(FILE_NAME, 'Profile_time')
+units_t = attrs_t['units']
+longname_t = attrs_t['long_name']
 
 # Process valid range.
 invalid = np.logical_or(data < valid_min, data > valid_max)
@@ -29,6 +29,8 @@ import numpy as np
 
 from pyhdf import HDF, SD, VS, V
 
+from zoo.lib import raster
+
 # Open the HDF4 file.
 FILE_NAME='MASTERL1B_1300406_01_20130619_2135_2138_V01.hdf'
 sd = SD.SD(FILE_NAME)
@@ -83,8 +85,7 @@ m = Basemap(projection='cyl', resolution='l',
 m.drawcoastlines(linewidth=0.5)
 m.drawparallels(np.arange(np.floor(np.min(lat)), np.ceil(np.max(lat)), 1), labels=[1, 0, 0, 0])
 m.drawmeridians(np.arange(np.floor(np.min(lon)), np.ceil(np.max(lon)), 1), labels=[0, 0, 0, 1])
-m.scatter(lon, lat, c=data, s=1, cmap=plt.cm.jet,
-          edgecolors=None, linewidth=0)
+raster.draw(lon, lat, data, m=m, cmap=plt.cm.jet)
 
 cb = m.colorbar(location='bottom')
 cb.set_label(units)
@@ -25,6 +25,8 @@ from mpl_toolkits.basemap import Basemap
 import numpy as np
 from pyhdf import SD
 
+from zoo.lib import grid
+
 
 
 # Open the HDF4 file.
@@ -47,9 +49,7 @@ sds.endaccess()
 sd.end()
 
 # Set lat / lon variable based on FAQ [2].
-x = np.linspace(-179.5, 179.5, 4320)
-y = np.linspace(-89.5, 89.5, 2160)[::-1]
-longitude, latitude = np.meshgrid(x, y)
+latitude, longitude = grid.standard('npp_5min').latlon()
 
 # The max value goes up to 13K. Limit the value to get a good plot ...
 #  like [2].
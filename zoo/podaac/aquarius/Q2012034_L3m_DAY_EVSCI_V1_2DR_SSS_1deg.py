@@ -30,6 +30,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
 import numpy as np
 
+from zoo.lib import grid
+
 def run(FILE_NAME):
     
     with h5py.File(FILE_NAME, mode='r') as f:
@@ -43,9 +45,7 @@ def run(FILE_NAME):
         invalid = np.logical_or(data < 32, data > 38)
         data[invalid] = np.nan
 
-    x = np.linspace(-179.5, 179.5, 360)
-    y = np.linspace(-89.5, 89.5, 180)[::-1]
-    longitude, latitude = np.meshgrid(x, y)
+    latitude, longitude = grid.standard('aquarius_1.0').latlon()
 
     m = Basemap(projection='cyl', resolution='l',
                 llcrnrlat=-90, urcrnrlat=90,
@@ -31,6 +31,8 @@ from mpl_toolkits.basemap import Basemap
 
 import numpy as np
 
+from zoo.lib import decode, lod, reader
+
 USE_NETCDF4 = False
 
 def run(FILE_NAME):
@@ -38,33 +40,24 @@ def run(FILE_NAME):
     # Identify the data field.
     DATAFIELD_NAME = 'bsst'
 
-    if USE_NETCDF4:
-        from netCDF4 import Dataset
-        nc = Dataset(FILE_NAME)
-        # Subset the data to match the size of the swath geolocation fields.
-        # Turn off autoscaling, we'll handle that ourselves due to non-standard
-        # naming of the offset attribute.
-        var = nc.variables[DATAFIELD_NAME]
-        var.set_auto_maskandscale(False)
-        lat = nc.variables['lat']
-        lon = nc.variables['lon']
-    else:
-        from pyhdf.SD import SD, SDC
-        hdf = SD(FILE_NAME, SDC.READ)
-
-        # Read dataset.
-        var = hdf.select(DATAFIELD_NAME)
-        lat = hdf.select('lat')
-        lon = hdf.select('lon')
-
-    latitude = lat[::8]
-    longitude = lon[::8]
-    data = var[::8, ::8].astype(np.float64)
-    
+    # Open the file with pyhdf, or netCDF4 if asked to.  Values are read
+    # unscaled, we'll handle that ourselves due to non-standard naming of the
+    # offset attribute.
+    f = reader.open_file(FILE_NAME, 'netcdf4' if USE_NETCDF4 else None)
+    var = f[DATAFIELD_NAME]
+
     # Apply the attributes.  By inspection, fill value is 0
-    data[data==0] = np.nan
-    data = data * var.scale_factor + var.add_off
-    datam = np.ma.masked_array(data, mask=np.isnan(data))
+    attrs = {'scale_factor': var.attrs['scale_factor'],
+             'add_offset': var.attrs['add_off'],
+             '_FillValue': 0}
+    def apply_attrs(raw):
+        return decode.decode(raw, attrs)
+
+    # Read the field at the resolution of the figure, averaging blocks of
+    # points, and the geolocation of the block centers.
+    datam, rows, cols = lod.read(var, method='mean', decode=apply_attrs)
+    latitude = f['lat'][rows]
+    longitude = f['lon'][cols]
     
     m = Basemap(projection='cyl', resolution='l',
                 llcrnrlat=-90, urcrnrlat=90,